@@ -0,0 +1,68 @@
+"""Benchmark the card and phone detectors against the old regexes on adversarial inputs.
+
+Each input is scaled up; time per input should grow linearly with its size.
+The old regexes are kept here only as a reference.
+
+Usage: python benchmarks/bench_dlp_adversarial.py [--sizes 10000,100000,1000000] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import time
+
+from agent_governance.dlp.detectors import CreditCardDetector, PhoneNumberDetector
+
+LEGACY_CARD = re.compile(r"\b(?:\d[ -]*?){13,19}\b")
+LEGACY_PHONE = re.compile(r"\b\+?\d{1,3}?[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b")
+
+# Inputs that make digit-run regexes try many split points or restart often.
+INPUTS = {
+    "digits": "1",
+    "digit_space": "1 ",
+    "digit_dash_space": "1 - ",
+    "digits_then_word": "12345678901234567890x",
+    "plus_one": "+1 ",
+    "near_phone": "415-555-013 ",
+}
+
+
+def _text(unit: str, size: int) -> str:
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def _timeit(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    card, phone = CreditCardDetector(), PhoneNumberDetector()
+    print(
+        f"{'input':>17} {'chars':>9} {'legacy_card_ms':>15} {'card_ms':>9} "
+        f"{'legacy_phone_ms':>16} {'phone_ms':>9} {'ns/char':>8}"
+    )
+    for name, unit in INPUTS.items():
+        for size in (int(value) for value in args.sizes.split(",")):
+            text = _text(unit, size)
+            legacy_card = _timeit(lambda: LEGACY_CARD.findall(text), args.repeat)
+            new_card = _timeit(lambda: list(card.spans(text)), args.repeat)
+            legacy_phone = _timeit(lambda: LEGACY_PHONE.findall(text), args.repeat)
+            new_phone = _timeit(lambda: list(phone.spans(text)), args.repeat)
+            per_char = (new_card + new_phone) * 1e6 / size
+            print(
+                f"{name:>17} {size:>9} {legacy_card:>15.2f} {new_card:>9.2f} "
+                f"{legacy_phone:>16.2f} {new_phone:>9.2f} {per_char:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark InputValidator.check_injection against a naive per-pattern scan.
+
+Usage: python benchmarks/bench_injection_matcher.py [--sizes 10 1000 50000] [--text-chars 10000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import tempfile
+import time
+from pathlib import Path
+
+from agent_governance.guardrails.input_validator import InputValidator
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+
+
+def _naive_first_match(patterns: list[str], text: str) -> str | None:
+    lower = text.lower()
+    for pattern in patterns:
+        if pattern.lower() in lower:
+            return pattern
+    return None
+
+
+def _timeit(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1_000, 50_000])
+    parser.add_argument("--text-chars", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    text = ""
+    while len(text) < args.text_chars:
+        text += _word(rng).capitalize() + " "
+
+    print(f"text: {len(text)} chars, no pattern present (full scan)")
+    print(f"{'patterns':>10} {'build_s':>9} {'compiled_ms':>12} {'naive_ms':>10} {'speedup':>8}")
+    for size in args.sizes:
+        patterns = [" ".join(_word(rng) for _ in range(3)) for _ in range(size)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "patterns.txt"
+            path.write_text("\n".join(patterns))
+            start = time.perf_counter()
+            validator = InputValidator({"input_validation": {"injection_patterns_file": str(path)}})
+            build_s = time.perf_counter() - start
+
+        assert validator.check_injection(text).rule_name == "no_injection"
+        assert validator.check_injection(text + patterns[-1]).details["pattern"] == patterns[-1]
+
+        naive_repeat = max(1, args.repeat if size <= 1_000 else 3)
+        compiled_ms = _timeit(lambda: validator.check_injection(text), args.repeat)
+        naive_ms = _timeit(lambda: _naive_first_match(patterns, text), naive_repeat)
+        print(f"{size:>10} {build_s:>9.2f} {compiled_ms:>12.3f} {naive_ms:>10.3f} {naive_ms / compiled_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark sequential vs parallel guardrail stages in GuardrailsEngine.check_input.
+
+Usage: python benchmarks/bench_parallel_stages.py [--text-chars 10000] [--patterns 5000] [--executor process]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import string
+import tempfile
+import time
+from pathlib import Path
+
+from agent_governance.guardrails.engine import GuardrailsEngine
+from agent_governance.models import RequestContext
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+
+
+async def _mean_ms(engine: GuardrailsEngine, text: str, repeat: int) -> float:
+    ctx = RequestContext()
+    await engine.check_input(ctx, text)  # warm up the worker pool
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = await engine.check_input(ctx, text)
+        assert result.rule_name == "all_passed", result
+    return (time.perf_counter() - start) / repeat * 1000.0
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--text-chars", type=int, default=10_000)
+    parser.add_argument("--patterns", type=int, default=5_000)
+    parser.add_argument("--executor", choices=["process", "thread"], default="process")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    text = ""
+    while len(text) < args.text_chars:
+        text += _word(rng) + " "
+
+    with tempfile.TemporaryDirectory() as tmp:
+        patterns_path = Path(tmp) / "patterns.txt"
+        patterns_path.write_text("\n".join(" ".join(_word(rng) for _ in range(3)) for _ in range(args.patterns)))
+        schema_path = Path(tmp) / "schema.json"
+        schema_path.write_text(
+            json.dumps({"input_schema": {"type": "object", "properties": {"text": {"type": "string", "pattern": "^[a-z ]*$"}}}})
+        )
+        base = {
+            "enabled": True,
+            "model_schema_file": str(schema_path),
+            "input_validation": {
+                "injection_patterns_file": str(patterns_path),
+                "max_input_length": 10**9,
+                "max_input_tokens": 10**9,
+            },
+            "content_safety": {"enabled": True, "block_categories": ["violence", "harassment"]},
+            "rate_limiting": {"requests_per_minute_per_user": 10**9, "requests_per_minute_global": 10**9},
+            "pipeline": {"profile": True},
+        }
+        sequential = GuardrailsEngine(base)
+        parallel_cfg = {"enabled": True, "min_chars": 1, "executor": args.executor}
+        parallel = GuardrailsEngine({**base, "pipeline": {"profile": True, "parallel": parallel_cfg}})
+        try:
+            sequential_ms = await _mean_ms(sequential, text, args.repeat)
+            parallel_ms = await _mean_ms(parallel, text, args.repeat)
+        finally:
+            parallel.close()
+
+    print(f"text: {len(text)} chars, {args.patterns} injection patterns, executor={args.executor}, cpus={os.cpu_count()}")
+    for stage, stats in sequential.stage_latency.snapshot().items():
+        print(f"  {stage:<16} mean {stats['mean_ms']:.3f} ms")
+    print(f"sequential: {sequential_ms:.3f} ms  parallel: {parallel_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
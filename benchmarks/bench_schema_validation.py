@@ -0,0 +1,65 @@
+"""Benchmark compiled tool-param schema validation against jsonschema iter_errors.
+
+Usage: python benchmarks/bench_schema_validation.py [--filters 5] [--repeat 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from jsonschema import Draft202012Validator
+
+from agent_governance.guardrails.model_schema import CompiledSchema
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "q": {"type": "string", "maxLength": 200},
+        "filters": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "field": {"type": "string"},
+                    "op": {"enum": ["eq", "lt", "gt"]},
+                    "value": {"type": ["string", "number"]},
+                },
+                "required": ["field", "op"],
+            },
+        },
+        "limit": {"type": "integer", "minimum": 1, "maximum": 100},
+    },
+    "required": ["q"],
+    "additionalProperties": False,
+}
+
+
+def _timeit(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1_000_000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filters", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    reference = Draft202012Validator(SCHEMA)
+    compiled = CompiledSchema(SCHEMA)
+    valid = {"q": "hello", "filters": [{"field": "a", "op": "eq", "value": 1}] * args.filters, "limit": 10}
+    invalid = {**valid, "limit": 0}
+
+    print(f"{'payload':>8} {'iter_errors_us':>15} {'compiled_us':>12} {'speedup':>8}")
+    for name, payload in (("valid", valid), ("invalid", invalid)):
+        assert compiled.errors(payload) == [e.message for e in reference.iter_errors(payload)]
+        slow = _timeit(lambda: [e.message for e in reference.iter_errors(payload)], args.repeat)
+        fast = _timeit(lambda: compiled.errors(payload), args.repeat)
+        print(f"{name:>8} {slow:>15.1f} {fast:>12.1f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -269,6 +269,8 @@ def load_config(
         policy_data = _normalize_guardrails_policy(policy_data)
         _apply_dlp_from_guardrails(data, policy_data)
         data["guardrails"] = _deep_merge(guardrails_cfg, policy_data)
+        # Record the resolved path so the policy can be watched and reloaded.
+        data["guardrails"]["policy_file"] = str(policy_path)
     else:
         _apply_dlp_from_guardrails(data, guardrails_cfg)
 
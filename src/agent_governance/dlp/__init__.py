@@ -1,3 +1,5 @@
 from .scanner import DLPScanner
+from .streaming import StreamingDLPScanner
+from .structured import StructuredDLPScanner
 
-__all__ = ["DLPScanner"]
+__all__ = ["DLPScanner", "StreamingDLPScanner", "StructuredDLPScanner"]
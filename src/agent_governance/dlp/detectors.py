@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import re
+from itertools import accumulate
+from typing import Iterator, List, Protocol, Tuple
+
+# Runs of at least 13 digits, in groups joined by single spaces or dashes. The
+# lookahead is bounded and a separator is required between groups, so each run
+# can be tokenized only one way. A run may follow a dash ("ref-4111..."): a
+# dash inside a longer run is consumed by the run that started before it.
+_DIGIT_RUN = re.compile(r"(?<!\w)(?=(?:\d[ -]?){13})\d+(?:[ -]\d+)*")
+_DIGIT_GROUP = re.compile(r"\d+")
+_CARD_MIN_DIGITS = 13
+_CARD_MAX_DIGITS = 19
+
+# North American numbers with separators or parentheses (optionally +1), and
+# E.164-style numbers with a leading +. Every repeat is bounded or needs a
+# separator, so each start offset does a bounded amount of work. The leading
+# lookahead lets the regex engine skip offsets that cannot start a number.
+_PHONE = re.compile(
+    r"(?=[+(1-9])(?<![\w+])(?:"
+    r"(?P<nanp_cc>\+?1[ .-]?)?"
+    r"(?:\((?P<paren_area>[2-9]\d{2})\)[ ]?|(?P<area>[2-9]\d{2})(?P<sep1>[ .-]?))"
+    r"(?P<exchange>[2-9]\d{2})(?P<sep2>[ .-]?)(?P<line>\d{4})"
+    r"|(?P<intl>\+[1-9]\d{0,2}(?:[ .-]\d{1,4}){2,6}|\+[1-9]\d{7,14})"
+    r")(?![\w]|[.-]\d)"
+)
+_PHONE_MIN_DIGITS = 8
+_PHONE_MAX_DIGITS = 15
+
+_LUHN_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+
+def _word_follows(text: str, end: int) -> bool:
+    return end < len(text) and (text[end].isalnum() or text[end] == "_")
+
+
+class Detector(Protocol):
+    def spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield ``(start, end)`` of every detection, in text order."""
+
+
+def luhn_valid(digits: str) -> bool:
+    total = 0
+    for position, char in enumerate(reversed(digits)):
+        digit = ord(char) - 48
+        total += _LUHN_DOUBLED[digit] if position % 2 else digit
+    return total % 10 == 0
+
+
+class CreditCardDetector:
+    """Card numbers: 13-19 digits, optionally grouped by spaces or dashes, passing Luhn.
+
+    Digit runs are found with one separator-delimited regex that cannot
+    backtrack across groups. A run of 13-19 digits is checked as a whole.
+    Inside a longer run, windows of whole groups are tried from each group and
+    the longest one passing Luhn wins. Luhn sums of any window come from two
+    prefix sums over the run, so each window costs O(1), at most seven windows
+    end within 13-19 digits of a start, and the scan stays linear.
+    """
+
+    def spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        for run in _DIGIT_RUN.finditer(text):
+            run_start, run_end = run.span()
+            if _word_follows(text, run_end):
+                continue
+            groups = [match.span() for match in _DIGIT_GROUP.finditer(text, run_start, run_end)]
+            if len(groups) == 1:
+                if run_end - run_start <= _CARD_MAX_DIGITS and luhn_valid(run.group()):
+                    yield run_start, run_end
+                continue
+            yield from self._windows(run.group().replace(" ", "").replace("-", ""), groups)
+
+    @staticmethod
+    def _windows(digits: str, groups: List[Tuple[int, int]]) -> Iterator[Tuple[int, int]]:
+        values = [ord(char) - 48 for char in digits]
+        # even[b] - even[a] is the Luhn sum of digits[a:b] when b is even,
+        # odd[b] - odd[a] when b is odd (doubling every second digit from the right).
+        even_doubled, odd_doubled = values[:], values[:]
+        even_doubled[0::2] = [_LUHN_DOUBLED[value] for value in values[0::2]]
+        odd_doubled[1::2] = [_LUHN_DOUBLED[value] for value in values[1::2]]
+        even = [0, *accumulate(even_doubled)]
+        odd = [0, *accumulate(odd_doubled)]
+        ends = list(accumulate(end - start for start, end in groups))
+        # A window [offset, end) passes Luhn when its end key equals the
+        # matching prefix sum at its offset, modulo 10.
+        end_keys = [(even if end % 2 == 0 else odd)[end] % 10 for end in ends]
+        count = len(groups)
+        first = last = 0
+        while first < count:
+            offset = ends[first - 1] if first else 0
+            if last < first:
+                last = first
+            while last + 1 < count and ends[last + 1] - offset <= _CARD_MAX_DIGITS:
+                last += 1
+            even_key, odd_key = even[offset] % 10, odd[offset] % 10
+            found = -1
+            for candidate in range(last, first - 1, -1):
+                end = ends[candidate]
+                if end - offset < _CARD_MIN_DIGITS:
+                    break
+                if end - offset <= _CARD_MAX_DIGITS and end_keys[candidate] == (odd_key if end % 2 else even_key):
+                    found = candidate
+                    break
+            if found < 0:
+                first += 1
+                continue
+            yield groups[first][0], groups[found][1]
+            first = found + 1
+
+
+class PhoneNumberDetector:
+    """Phone numbers that pass structural checks, in one linear regex pass.
+
+    North American numbers need a valid area code and exchange (first digit
+    2-9) and either parentheses, matching separators, or a ``+1`` prefix, so
+    bare 10-digit ids are not flagged. International numbers need a leading
+    ``+`` and 8-15 digits. Numbers embedded in longer digit or word runs are
+    skipped.
+    """
+
+    def spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        for match in _PHONE.finditer(text):
+            if match.group("intl") is not None:
+                digit_count = sum(char.isdigit() for char in match.group("intl"))
+                if _PHONE_MIN_DIGITS <= digit_count <= _PHONE_MAX_DIGITS:
+                    yield match.start(), match.end()
+                continue
+            if match.group("area") is not None:
+                sep1, sep2 = match.group("sep1"), match.group("sep2")
+                if sep1 != sep2 or (not sep1 and not (match.group("nanp_cc") or "").startswith("+")):
+                    continue
+            yield match.start(), match.end()
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+from .detectors import Detector
+
+# (info_type, start, end)
+Span = Tuple[str, int, int]
+
+_BOUNDARY = r"\b"
+
+# Where two info types match at the same offset, the one listed first wins.
+PATTERN_PRIORITY = (
+    "EMAIL_ADDRESS",
+    "US_SSN",
+    "CREDIT_CARD_NUMBER",
+    "PHONE_NUMBER",
+    "ADDRESS",
+    "PERSON_NAME",
+)
+
+
+def _priority(info_type: str) -> Tuple[int, str]:
+    try:
+        return PATTERN_PRIORITY.index(info_type), info_type
+    except ValueError:
+        return len(PATTERN_PRIORITY), info_type
+
+
+def _alternation(
+    info_types: Sequence[str], patterns: Dict[str, Pattern[str]]
+) -> Tuple[Optional[Pattern[str]], Dict[str, str]]:
+    """One regex with a named group per info type, in the order given, and the group -> info type map."""
+    group_types: Dict[str, str] = {}
+    parts: List[str] = []
+    bounded: List[str] = []
+    for index, info_type in enumerate(info_types):
+        pattern = patterns[info_type]
+        source = pattern.pattern
+        at_boundary = source.startswith(_BOUNDARY)
+        if at_boundary:
+            source = source[len(_BOUNDARY) :]
+        if pattern.flags & re.IGNORECASE:
+            source = f"(?i:{source})"
+        group = f"t{index}"
+        group_types[group] = info_type
+        if at_boundary:
+            bounded.append(f"(?P<{group}>{source})")
+            continue
+        if bounded:
+            parts.append(_BOUNDARY + "(?:" + "|".join(bounded) + ")")
+            bounded = []
+        parts.append(f"(?P<{group}>{source})")
+    if bounded:
+        parts.append(_BOUNDARY + "(?:" + "|".join(bounded) + ")")
+    return (re.compile("|".join(parts)) if parts else None), group_types
+
+
+class CompiledPatternSet:
+    """Every enabled info type in one alternation of named groups, compiled once.
+
+    ``spans`` reads the text once, however many info types are enabled, and
+    returns matches in text order. The alternation finds the leftmost match at
+    each offset, preferring the info type earlier in ``PATTERN_PRIORITY``. A
+    match of another info type can start inside that match (an email glued to
+    an address, say), so each offset inside a match is also tried against an
+    alternation of the other info types. Spans of different info types may
+    therefore overlap; redaction merges them. Neighbouring patterns that start
+    with ``\\b`` share a single boundary test, so positions inside words are
+    rejected once instead of once per info type. Case-insensitive patterns keep
+    their flag through a scoped ``(?i:...)`` group. Patterns must not use
+    numbered backreferences, since groups are renumbered when they are combined.
+
+    Info types in ``detectors`` are found by their detector instead of a regex
+    (see ``detectors.py``) and their spans are added to the regex spans.
+    """
+
+    def __init__(self, patterns: Dict[str, Pattern[str]], detectors: Dict[str, Detector] | None = None) -> None:
+        detectors = detectors or {}
+        self.info_types: Tuple[str, ...] = tuple(sorted({*patterns, *detectors}, key=_priority))
+        self._detectors: Tuple[Tuple[str, Detector], ...] = tuple(
+            (info_type, detectors[info_type]) for info_type in self.info_types if info_type in detectors
+        )
+        regex_types = [info_type for info_type in self.info_types if info_type not in detectors]
+        self._regex, self._group_types = _alternation(regex_types, patterns)
+        # info type -> alternation of every other regex info type, for offsets inside its matches
+        self._others: Dict[str, Tuple[Optional[Pattern[str]], Dict[str, str]]] = {
+            info_type: _alternation([other for other in regex_types if other != info_type], patterns)
+            for info_type in regex_types
+        }
+
+    def spans(self, text: str) -> List[Span]:
+        if not text:
+            return []
+        spans: List[Span] = []
+        if self._regex is not None:
+            group_types = self._group_types
+            for match in self._regex.finditer(text):
+                start, end = match.span()
+                if end > start:
+                    info_type = group_types[match.lastgroup]  # type: ignore[index]
+                    spans.append((info_type, start, end))
+                    self._overlapping(text, info_type, start, end, spans)
+        for info_type, detector in self._detectors:
+            spans.extend((info_type, start, end) for start, end in detector.spans(text) if end > start)
+        if len(spans) < 2:
+            return spans
+        spans.sort(key=lambda span: (span[1], _priority(span[0]), span[2]))
+        # Matches of one info type never overlap each other, as with a per-type scan.
+        kept: List[Span] = []
+        type_ends: Dict[str, int] = {}
+        for span in spans:
+            if span[1] >= type_ends.get(span[0], 0):
+                kept.append(span)
+                type_ends[span[0]] = span[2]
+        return kept
+
+    def _overlapping(self, text: str, info_type: str, start: int, end: int, spans: List[Span]) -> None:
+        """Add matches of other info types that start inside ``text[start:end]``."""
+        regex, group_types = self._others[info_type]
+        if regex is None:
+            return
+        covered: Dict[str, int] = {}
+        for position in range(start, end):
+            match = regex.match(text, position)
+            if match is None or match.end() == position:
+                continue
+            other = group_types[match.lastgroup]  # type: ignore[index]
+            if position >= covered.get(other, 0):
+                spans.append((other, position, match.end()))
+                covered[other] = match.end()
+
+    @classmethod
+    def for_info_types(
+        cls,
+        info_types: Sequence[str],
+        patterns: Dict[str, Pattern[str]],
+        aliases: Dict[str, str],
+        detectors: Dict[str, Detector] | None = None,
+    ) -> "CompiledPatternSet":
+        """Resolve ``aliases`` and drop unknown info types once, at construction."""
+        detectors = detectors or {}
+        resolved: Dict[str, Pattern[str]] = {}
+        resolved_detectors: Dict[str, Detector] = {}
+        for info_type in info_types:
+            normalized = aliases.get(info_type, info_type)
+            if normalized in detectors:
+                resolved_detectors[normalized] = detectors[normalized]
+            elif normalized in patterns:
+                resolved[normalized] = patterns[normalized]
+        return cls(resolved, resolved_detectors)
@@ -1,15 +1,71 @@
 from __future__ import annotations
 
-from typing import Iterable
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from ..exceptions import ConfigError
 from ..models import DLPFinding
 
 REDACTION_TOKEN = "[REDACTED]"
 
+INFO_TYPE_TOKENS = {
+    "EMAIL_ADDRESS": "[EMAIL]",
+    "PHONE_NUMBER": "[PHONE]",
+    "US_SSN": "[SSN]",
+    "CREDIT_CARD_NUMBER": "[CREDIT_CARD]",
+    "PERSON_NAME": "[NAME]",
+    "ADDRESS": "[ADDRESS]",
+}
 
-def redact_text(text: str, findings: Iterable[DLPFinding]) -> str:
-    redacted = text
+
+def redaction_tokens(style: str = "fixed", overrides: Dict[str, str] | None = None) -> Dict[str, str]:
+    """Tokens per info type: ``[REDACTED]`` everywhere (``fixed``) or ``[EMAIL]``-style (``info_type``)."""
+    if style not in ("fixed", "info_type"):
+        raise ConfigError(f"Unsupported dlp.redaction_style: {style} (expected fixed or info_type)")
+    tokens = dict(INFO_TYPE_TOKENS) if style == "info_type" else {}
+    tokens.update(overrides or {})
+    return tokens
+
+
+def merge_spans(spans: Iterable[Tuple[int, int, str]]) -> List[Tuple[int, int, Optional[str]]]:
+    """Sort ``(start, end, info_type)`` spans and merge overlapping ones.
+
+    A merged span keeps its info type only if every part had the same one.
+    """
+    merged: List[Tuple[int, int, Optional[str]]] = []
+    for start, end, info_type in sorted(spans):
+        if merged and start < merged[-1][1]:
+            last_start, last_end, last_type = merged[-1]
+            merged[-1] = (last_start, max(last_end, end), last_type if last_type == info_type else None)
+        else:
+            merged.append((start, end, info_type))
+    return merged
+
+
+def redact_text(text: str, findings: Iterable[DLPFinding], tokens: Dict[str, str] | None = None) -> str:
+    """Replace every finding in one pass over ``text``.
+
+    Findings with ``start``/``end`` offsets are redacted exactly where they were
+    found. A finding without offsets redacts every occurrence of its quote.
+    Overlapping spans are merged first, so each character is replaced at most
+    once. ``tokens`` maps info types to replacement tokens.
+    """
+    tokens = tokens or {}
+    spans: List[Tuple[int, int, str]] = []
     for finding in findings:
-        if finding.quote:
-            redacted = redacted.replace(finding.quote, REDACTION_TOKEN)
-    return redacted
+        if finding.start is not None and finding.end is not None:
+            spans.append((finding.start, finding.end, finding.info_type))
+        elif finding.quote:
+            position = text.find(finding.quote)
+            while position != -1:
+                spans.append((position, position + len(finding.quote), finding.info_type))
+                position = text.find(finding.quote, position + len(finding.quote))
+    if not spans:
+        return text
+    parts: List[str] = []
+    cursor = 0
+    for start, end, info_type in merge_spans(spans):
+        parts.append(text[cursor:start])
+        parts.append(tokens.get(info_type, REDACTION_TOKEN) if info_type else REDACTION_TOKEN)
+        cursor = end
+    parts.append(text[cursor:])
+    return "".join(parts)
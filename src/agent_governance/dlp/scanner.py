@@ -1,28 +1,36 @@
 from __future__ import annotations
 
 import re
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, Iterator, List, Tuple
 
 from ..models import DLPAction, DLPFinding, DLPScanResult
-from .redactor import redact_text
+from .detectors import CreditCardDetector, Detector, PhoneNumberDetector
+from .engine import CompiledPatternSet
+from .redactor import redact_text, redaction_tokens
+from .streaming import DEFAULT_CHUNK_CHARS, DEFAULT_OVERLAP_CHARS, StreamingDLPScanner, TextSource
 
 
 DEFAULT_PATTERNS = {
-    "EMAIL_ADDRESS": re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"),
-    "PHONE_NUMBER": re.compile(r"\b\+?\d{1,3}?[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b"),
+    # The lookbehind only skips start offsets inside a local part; matches are unchanged.
+    "EMAIL_ADDRESS": re.compile(r"(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"),
     "US_SSN": re.compile(r"\b\d{3}-\d{2}-\d{4}\b"),
-    "CREDIT_CARD_NUMBER": re.compile(r"\b(?:\d[ -]*?){13,19}\b"),
     "PERSON_NAME": re.compile(r"\b[A-Z][a-z]+\s+[A-Z][a-z]+\b"),
     "ADDRESS": re.compile(r"\b\d{1,5}\s+\w+(?:\s+\w+)*\s+(?:St|Street|Ave|Avenue|Rd|Road|Blvd|Lane|Ln|Dr|Drive|Ct|Court)\b", re.IGNORECASE),
 }
 
+# Card and phone numbers need checks a regex cannot express in linear time.
+DEFAULT_DETECTORS: Dict[str, Detector] = {
+    "PHONE_NUMBER": PhoneNumberDetector(),
+    "CREDIT_CARD_NUMBER": CreditCardDetector(),
+}
+
 MODEL_ARMOR_PATTERNS = {
     "EMAIL_ADDRESS": DEFAULT_PATTERNS["EMAIL_ADDRESS"],
-    "PHONE_NUMBER": DEFAULT_PATTERNS["PHONE_NUMBER"],
     "US_SSN": DEFAULT_PATTERNS["US_SSN"],
-    "CREDIT_CARD_NUMBER": DEFAULT_PATTERNS["CREDIT_CARD_NUMBER"],
 }
 
+MODEL_ARMOR_DETECTORS: Dict[str, Detector] = dict(DEFAULT_DETECTORS)
+
 INFO_TYPE_ALIASES = {
     "SSN": "US_SSN",
     "CREDIT_CARD": "CREDIT_CARD_NUMBER",
@@ -31,45 +39,70 @@ INFO_TYPE_ALIASES = {
 }
 
 
+def _provider_types(provider: str) -> Tuple[Dict[str, re.Pattern[str]], Dict[str, Detector]]:
+    if provider == "model_armor":
+        return MODEL_ARMOR_PATTERNS, MODEL_ARMOR_DETECTORS
+    return DEFAULT_PATTERNS, DEFAULT_DETECTORS
+
+
 class DLPScanner:
     def __init__(
         self,
         action: DLPAction = DLPAction.LOG_ONLY,
         info_types: Iterable[str] | None = None,
         provider: str = "sensitive_data_protection",
+        redaction_tokens: Dict[str, str] | None = None,
+        stream_overlap_chars: int = DEFAULT_OVERLAP_CHARS,
     ) -> None:
         self.action = action
         self.provider = provider
-        patterns = MODEL_ARMOR_PATTERNS if provider == "model_armor" else DEFAULT_PATTERNS
-        self.info_types = list(info_types or patterns.keys())
+        self.redaction_tokens = dict(redaction_tokens or {})
+        self.stream_overlap_chars = stream_overlap_chars
+        patterns, detectors = _provider_types(provider)
+        self.info_types = list(info_types or [*patterns, *detectors])
+        self._patterns = CompiledPatternSet.for_info_types(self.info_types, patterns, INFO_TYPE_ALIASES, detectors)
 
     @classmethod
     def from_config(cls, config: Dict[str, object]) -> "DLPScanner":
         action = DLPAction(config.get("action_on_input_pii", "log"))
         provider = str(config.get("provider", "sensitive_data_protection") or "sensitive_data_protection").lower()
-        patterns = MODEL_ARMOR_PATTERNS if provider == "model_armor" else DEFAULT_PATTERNS
-        info_types = config.get("info_types") or list(patterns.keys())
-        return cls(action=action, info_types=info_types, provider=provider)
+        patterns, detectors = _provider_types(provider)
+        info_types = config.get("info_types") or [*patterns, *detectors]
+        tokens = redaction_tokens(str(config.get("redaction_style", "fixed")).lower(), config.get("redaction_tokens"))
+        return cls(
+            action=action,
+            info_types=info_types,
+            provider=provider,
+            redaction_tokens=tokens,
+            stream_overlap_chars=int(config.get("stream_holdback_chars", DEFAULT_OVERLAP_CHARS)),
+        )
 
     def scan_text(self, text: str) -> DLPScanResult:
-        findings: List[DLPFinding] = []
-        patterns = MODEL_ARMOR_PATTERNS if self.provider == "model_armor" else DEFAULT_PATTERNS
-        for info_type in self.info_types:
-            normalized = INFO_TYPE_ALIASES.get(info_type, info_type)
-            pattern = patterns.get(normalized)
-            if not pattern:
-                continue
-            for match in pattern.findall(text):
-                findings.append(DLPFinding(info_type=normalized, quote=match, likelihood="possible"))
+        findings: List[DLPFinding] = [
+            DLPFinding(info_type=info_type, quote=text[start:end], likelihood="possible", start=start, end=end)
+            for info_type, start, end in self._patterns.spans(text)
+        ]
 
         if not findings:
             return DLPScanResult(action=self.action, findings=[])
 
         if self.action == DLPAction.REDACT:
-            redacted = redact_text(text, findings)
+            redacted = redact_text(text, findings, self.redaction_tokens)
             return DLPScanResult(action=self.action, findings=findings, redacted_text=redacted)
         return DLPScanResult(action=self.action, findings=findings)
 
+    def match_spans(self, text: str) -> List[Tuple[str, int, int]]:
+        """Return ``(info_type, start, end)`` for every match, in text order, from one pass."""
+        return self._patterns.spans(text)
+
+    def scan_stream(self, source: TextSource, chunk_chars: int = DEFAULT_CHUNK_CHARS) -> Iterator[DLPFinding]:
+        """Scan chunks or a text file in bounded memory, yielding findings with stream offsets."""
+        return StreamingDLPScanner(self, self.stream_overlap_chars, chunk_chars).scan(source)
+
+    def redact_stream(self, source: TextSource, chunk_chars: int = DEFAULT_CHUNK_CHARS) -> Iterator[str]:
+        """Redact chunks or a text file in bounded memory, yielding the redacted text piece by piece."""
+        return StreamingDLPScanner(self, self.stream_overlap_chars, chunk_chars).redact(source)
+
     def scan_and_process(self, text: str, action: DLPAction) -> tuple[str, DLPScanResult]:
         scan = self.scan_text(text)
         scan.action = action
@@ -77,7 +110,7 @@ class DLPScanner:
             return text, scan
         if action == DLPAction.REDACT:
             if scan.redacted_text is None and scan.findings:
-                scan.redacted_text = redact_text(text, scan.findings)
+                scan.redacted_text = redact_text(text, scan.findings, self.redaction_tokens)
             if scan.redacted_text is not None:
                 return scan.redacted_text, scan
         return text, scan
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from typing import IO, TYPE_CHECKING, Iterable, Iterator, List, Tuple, Union
+
+from ..models import DLPFinding
+from .redactor import redact_text
+
+if TYPE_CHECKING:
+    from .scanner import DLPScanner
+
+DEFAULT_OVERLAP_CHARS = 64
+DEFAULT_CHUNK_CHARS = 64 * 1024
+
+# Text chunks, or a file-like object opened in text mode.
+TextSource = Union[Iterable[str], IO[str]]
+
+
+def iter_chunks(source: TextSource, chunk_chars: int = DEFAULT_CHUNK_CHARS) -> Iterator[str]:
+    """Yield ``source`` in pieces of at most ``chunk_chars`` characters."""
+    read = getattr(source, "read", None)
+    if read is not None:
+        chunk = read(chunk_chars)
+        while chunk:
+            yield chunk
+            chunk = read(chunk_chars)
+        return
+    for chunk in source:  # type: ignore[union-attr]
+        for offset in range(0, len(chunk), chunk_chars):
+            yield chunk[offset : offset + chunk_chars]
+
+
+class StreamingDLPScanner:
+    """Scans text of any length in bounded memory.
+
+    Text is read in chunks of at most ``chunk_chars`` (raised to
+    ``overlap_chars`` if smaller). Each time a chunk's
+    worth of new text is buffered, matches ending at least ``overlap_chars``
+    before the end of the buffer are final and are reported, so
+    ``overlap_chars`` should be at least the longest expected match. The rest is
+    carried into the next round, together with ``overlap_chars`` of already
+    reported text as left context, so a match that crosses a chunk boundary is
+    found whole and never depends on where a chunk happened to start. A match
+    that straddles all of the new text waits for one more chunk; if it still
+    does, it is cut at the boundary and not reported. The buffer stays under
+    ``3 * chunk_chars + overlap_chars`` characters.
+    """
+
+    def __init__(
+        self,
+        scanner: "DLPScanner",
+        overlap_chars: int = DEFAULT_OVERLAP_CHARS,
+        chunk_chars: int = DEFAULT_CHUNK_CHARS,
+    ) -> None:
+        self._scanner = scanner
+        self.overlap_chars = max(0, int(overlap_chars))
+        # A chunk shorter than the overlap would put the cutoff before text already reported.
+        self.chunk_chars = max(1, int(chunk_chars), self.overlap_chars)
+
+    def scan(self, source: TextSource) -> Iterator[DLPFinding]:
+        """Yield every finding in text order, with offsets into the whole stream."""
+        for base, _, spans in self._segments(source):
+            for info_type, start, end, quote in spans:
+                yield DLPFinding(info_type=info_type, quote=quote, likelihood="possible", start=base + start, end=base + end)
+
+    def redact(self, source: TextSource) -> Iterator[str]:
+        """Yield the redacted stream piece by piece; joined, the pieces are the redacted text."""
+        tokens = self._scanner.redaction_tokens
+        for _, segment, spans in self._segments(source):
+            if spans:
+                segment = redact_text(
+                    segment, [DLPFinding(info_type=info_type, start=start, end=end) for info_type, start, end, _ in spans], tokens
+                )
+            if segment:
+                yield segment
+
+    def _segments(self, source: TextSource) -> Iterator[Tuple[int, str, List[Tuple[str, int, int, str]]]]:
+        """Yield ``(offset, segment, spans)`` for consecutive final segments of the stream.
+
+        Span offsets are relative to the segment.
+        """
+        buffer = ""
+        buffer_offset = 0  # stream offset of buffer[0]
+        reported = 0  # buffer index up to which text has been yielded
+        wanted = self.chunk_chars  # unreported chars to buffer before the next scan
+        for chunk in iter_chunks(source, self.chunk_chars):
+            buffer += chunk
+            if len(buffer) - reported < wanted:
+                continue
+            cutoff = len(buffer) - self.overlap_chars
+            spans = self._scanner.match_spans(buffer)
+            release = cutoff
+            # Spans may overlap, so walk back from the end until no span straddles the release point.
+            for _, start, end in reversed(spans):
+                if start < release < end:
+                    release = start
+            if release <= reported:
+                if wanted == self.chunk_chars:
+                    # A match straddles the whole new chunk: read one more before deciding.
+                    wanted = 2 * self.chunk_chars
+                    continue
+                release = cutoff
+            if release <= reported:
+                continue
+            wanted = self.chunk_chars
+            yield self._segment(buffer, buffer_offset, reported, release, spans)
+            keep = max(0, release - self.overlap_chars)
+            buffer = buffer[keep:]
+            buffer_offset += keep
+            reported = release - keep
+        if len(buffer) > reported:
+            yield self._segment(buffer, buffer_offset, reported, len(buffer), self._scanner.match_spans(buffer))
+
+    @staticmethod
+    def _segment(
+        buffer: str, buffer_offset: int, first: int, last: int, spans: List[Tuple[str, int, int]]
+    ) -> Tuple[int, str, List[Tuple[str, int, int, str]]]:
+        return (
+            buffer_offset + first,
+            buffer[first:last],
+            [
+                (info_type, start - first, end - first, buffer[start:end])
+                for info_type, start, end in spans
+                if start >= first and end <= last
+            ],
+        )
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import TYPE_CHECKING, Any, Iterable, List, Set, Tuple
+
+from ..models import DLPAction, DLPFinding, DLPScanResult
+from .redactor import redact_text
+
+if TYPE_CHECKING:
+    from .scanner import DLPScanner
+
+ROOT = "$"
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def child_path(path: str, key: Any) -> str:
+    """``$.a.b[0]`` style path of ``key`` under ``path``; odd keys are quoted, ``$["a b"]``."""
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    key = str(key)
+    if _IDENTIFIER.fullmatch(key):
+        return f"{path}.{key}"
+    return f"{path}[{json.dumps(key)}]"
+
+
+class StructuredDLPScanner:
+    """Scans the string leaves of nested dicts, lists and tuples, such as tool params.
+
+    Keys, numbers, booleans and ``None`` are never scanned. Any other object
+    (a set, a dataclass, a model) is scanned as its ``str()``, so nothing
+    leaves unscanned; on redact it is replaced by its redacted string. Each
+    finding carries the JSON path of its leaf (``$.user.emails[0]``), with
+    ``start``/``end`` relative to that string. ``safe_fields`` skips whole
+    subtrees: a plain name skips that key at any depth, and a ``$``-rooted path
+    skips one location, where ``[*]`` matches any list index
+    (``$.rows[*].id``). The walk uses an explicit stack, so deeply nested
+    payloads cannot hit the recursion limit, and a container reached again
+    (a cycle or a shared reference) is not walked twice.
+    """
+
+    def __init__(self, scanner: "DLPScanner", safe_fields: Iterable[str] = ()) -> None:
+        self._scanner = scanner
+        self.safe_fields = tuple(safe_fields or ())
+        self._safe_names = frozenset(field for field in self.safe_fields if not field.startswith(ROOT))
+        self._safe_paths = frozenset(field for field in self.safe_fields if field.startswith(ROOT))
+
+    def scan(self, value: Any) -> DLPScanResult:
+        findings: List[DLPFinding] = []
+        self._visit(value, ROOT, ROOT, findings, False, set())
+        return DLPScanResult(action=self._scanner.action, findings=findings)
+
+    def scan_and_process(self, value: Any, action: DLPAction) -> Tuple[Any, DLPScanResult]:
+        """Scan ``value``; on ``REDACT``, replace findings in place in its dicts and lists.
+
+        Returns the (possibly redacted) value. It is a new object only when
+        ``value`` itself is a string, a tuple or another non-JSON object, since
+        those cannot be changed in place.
+        """
+        findings: List[DLPFinding] = []
+        value = self._visit(value, ROOT, ROOT, findings, action == DLPAction.REDACT, set())
+        return value, DLPScanResult(action=action, findings=findings)
+
+    def _visit(
+        self, value: Any, path: str, pattern: str, findings: List[DLPFinding], redact: bool, seen: Set[int]
+    ) -> Any:
+        """Scan ``value`` and return it, or its redacted replacement."""
+        if isinstance(value, str):
+            return self._leaf(value, path, findings, redact)
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        if not isinstance(value, (dict, list, tuple)):
+            return self._leaf(str(value), path, findings, redact, original=value)
+        if id(value) in seen:
+            return value
+        seen.add(id(value))
+        # Containers being walked, innermost last: [container, items, next item index, new tuple items].
+        # A tuple with a redacted item is rebuilt from the list in the last slot once it is done.
+        stack: List[List[Any]] = [self._frame(value, path, pattern)]
+        while stack:
+            frame = stack[-1]
+            container, items, index = frame[:3]
+            if index == len(items):
+                stack.pop()
+                done = tuple(frame[3]) if frame[3] is not None else container
+                if done is container:
+                    continue
+                if stack:
+                    self._store(stack[-1], stack[-1][2] - 1, done)
+                else:
+                    value = done
+                continue
+            frame[2] += 1
+            key, child, child_path_, child_pattern = items[index]
+            if isinstance(child, (dict, list, tuple)):
+                if id(child) not in seen:
+                    seen.add(id(child))
+                    stack.append(self._frame(child, child_path_, child_pattern))
+                continue
+            replaced = self._visit(child, child_path_, child_pattern, findings, redact, seen)
+            if replaced is not child:
+                self._store(frame, index, replaced)
+        return value
+
+    def _frame(self, container: Any, path: str, pattern: str) -> List[Any]:
+        if isinstance(container, dict):
+            items = [
+                (key, child, child_path(path, key), child_path(pattern, key))
+                for key, child in container.items()
+                if not (isinstance(key, str) and key in self._safe_names)
+            ]
+        else:
+            wildcard = f"{pattern}[*]"
+            items = [(index, child, child_path(path, index), wildcard) for index, child in enumerate(container)]
+        items = [item for item in items if item[3] not in self._safe_paths]
+        return [container, items, 0, None]
+
+    @staticmethod
+    def _store(frame: List[Any], index: int, value: Any) -> None:
+        key = frame[1][index][0]
+        if isinstance(frame[0], tuple):
+            if frame[3] is None:
+                frame[3] = list(frame[0])
+            frame[3][key] = value
+        else:
+            frame[0][key] = value
+
+    def _leaf(self, text: str, path: str, findings: List[DLPFinding], redact: bool, original: Any = None) -> Any:
+        leaf = [
+            DLPFinding(
+                info_type=info_type, quote=text[start:end], likelihood="possible", start=start, end=end, path=path
+            )
+            for info_type, start, end in self._scanner.match_spans(text)
+        ]
+        if not leaf:
+            return text if original is None else original
+        findings.extend(leaf)
+        if not redact:
+            return text if original is None else original
+        return redact_text(text, leaf, self._scanner.redaction_tokens)
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from ..models import GuardrailAction, GuardrailResult
+
+DEFAULT_MAX_QUEUED_CALLS = 0
+DEFAULT_QUEUE_TIMEOUT_SECONDS = 10.0
+
+logger = logging.getLogger(__name__)
+
+
+class ToolBulkhead:
+    """Caps the in-flight calls to one tool across all requests.
+
+    Up to ``max_concurrency`` calls hold a slot at once. Further calls wait in a
+    FIFO queue of at most ``max_queued_calls`` for up to
+    ``queue_timeout_seconds``; anything beyond that is rejected at once. A
+    released slot is handed straight to the oldest waiter. Slots are counted
+    per request id, so ``release_request`` can return the slots of a request
+    that ended without reporting its tool results. A release for no request
+    id, or one holding no slot, frees nothing. The counters are guarded by
+    a lock and waiters are woken on their own event loop, so one bulkhead can
+    be shared across threads and loops.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queued_calls: int = DEFAULT_MAX_QUEUED_CALLS,
+        queue_timeout_seconds: float | None = DEFAULT_QUEUE_TIMEOUT_SECONDS,
+    ) -> None:
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queued_calls = max(0, int(max_queued_calls))
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._held: Dict[str, int] = {}
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.rejected_total = 0
+        self.timeouts_total = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, request_id: str) -> Optional[str]:
+        """Take a slot for ``request_id``; return None, or the rule name of the rejection."""
+        with self._lock:
+            if self._in_flight < self.max_concurrency and not self._waiters:
+                self._take(request_id)
+                return None
+            if len(self._waiters) >= self.max_queued_calls:
+                self.rejected_total += 1
+                return "tool_concurrency_limit"
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            if self._abandon(waiter, request_id):
+                return None
+            self.timeouts_total += 1
+            return "tool_concurrency_timeout"
+        except BaseException:
+            if self._abandon(waiter, request_id):
+                self.release(request_id)
+            raise
+        with self._lock:
+            self._held[request_id] = self._held.get(request_id, 0) + 1
+        return None
+
+    def release(self, request_id: str | None = None) -> None:
+        with self._lock:
+            if request_id is None or request_id not in self._held:
+                # Freeing another request's slot would let the tool exceed its limit.
+                logger.debug("Ignoring tool slot release for request %r, which holds no slot", request_id)
+                return
+            self._drop(request_id, 1)
+            self._hand_off()
+
+    def release_request(self, request_id: str) -> None:
+        with self._lock:
+            for _ in range(self._held.get(request_id, 0)):
+                self._drop(request_id, 1)
+                self._hand_off()
+
+    def _take(self, request_id: str) -> None:
+        self._in_flight += 1
+        self._held[request_id] = self._held.get(request_id, 0) + 1
+
+    def _drop(self, request_id: str, count: int) -> None:
+        remaining = self._held.get(request_id, 0) - count
+        if remaining > 0:
+            self._held[request_id] = remaining
+        else:
+            self._held.pop(request_id, None)
+        self._in_flight = max(0, self._in_flight - count)
+
+    def _hand_off(self) -> None:
+        # Lock held. The slot passes to the waiter without touching _in_flight.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._in_flight += 1
+            waiter.get_loop().call_soon_threadsafe(self._grant, waiter)
+            return
+
+    def _grant(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # The waiter gave up after the slot was handed over: pass it on.
+            with self._lock:
+                self._in_flight = max(0, self._in_flight - 1)
+                self._hand_off()
+            return
+        waiter.set_result(True)
+
+    def _abandon(self, waiter: asyncio.Future, request_id: str) -> bool:
+        """Leave the queue; True if a slot was granted anyway and is now held."""
+        with self._lock:
+            try:
+                self._waiters.remove(waiter)
+                return False
+            except ValueError:
+                pass
+            if waiter.done() and not waiter.cancelled():
+                self._held[request_id] = self._held.get(request_id, 0) + 1
+                return True
+            return False
+
+
+class BulkheadRegistry:
+    """Per-tool bulkheads for tools whose policy sets ``max_concurrency``."""
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        tools_cfg = config.get("tools", {}) or {}
+        default_policy = tools_cfg.get("default_policy", {}) or {}
+        self._tools: Dict[str, ToolBulkhead] = {}
+        for policy in tools_cfg.get("policies", []) or []:
+            max_concurrency = policy.get("max_concurrency", default_policy.get("max_concurrency"))
+            if not max_concurrency:
+                continue
+            timeout = policy.get(
+                "queue_timeout_seconds", default_policy.get("queue_timeout_seconds", DEFAULT_QUEUE_TIMEOUT_SECONDS)
+            )
+            self._tools[policy.get("tool_name")] = ToolBulkhead(
+                int(max_concurrency),
+                max_queued_calls=int(
+                    policy.get("max_queued_calls", default_policy.get("max_queued_calls", DEFAULT_MAX_QUEUED_CALLS))
+                ),
+                queue_timeout_seconds=float(timeout) if timeout is not None else None,
+            )
+
+    def __bool__(self) -> bool:
+        return bool(self._tools)
+
+    async def acquire(self, request_id: str, tool_name: str) -> GuardrailResult:
+        bulkhead = self._tools.get(tool_name)
+        if bulkhead is None:
+            return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="no_concurrency_limit", reason="OK")
+        rule_name = await bulkhead.acquire(request_id)
+        if rule_name is None:
+            return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="within_concurrency_limit", reason="OK")
+        waited = "" if rule_name == "tool_concurrency_limit" else f" after {bulkhead.queue_timeout_seconds}s"
+        return GuardrailResult(
+            action=GuardrailAction.BLOCK,
+            rule_name=rule_name,
+            reason=f"Tool '{tool_name}' is at its limit of {bulkhead.max_concurrency} concurrent calls{waited}",
+            details={"in_flight": bulkhead.in_flight, "queued": bulkhead.queued},
+        )
+
+    def release(self, tool_name: str, request_id: str | None = None) -> None:
+        bulkhead = self._tools.get(tool_name)
+        if bulkhead is not None:
+            bulkhead.release(request_id)
+
+    def release_request(self, request_id: str) -> None:
+        for bulkhead in self._tools.values():
+            bulkhead.release_request(request_id)
+
+    def gauges(self) -> Dict[str, Any]:
+        return {
+            "tool_concurrency_in_flight": {name: b.in_flight for name, b in self._tools.items()},
+            "tool_concurrency_queued": {name: b.queued for name, b in self._tools.items()},
+            "tool_concurrency_rejected_total": sum(b.rejected_total + b.timeouts_total for b in self._tools.values()),
+        }
@@ -1,50 +1,378 @@
 from __future__ import annotations
 
+import threading
 import time
-from typing import Dict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from ..models import GuardrailAction, GuardrailResult
+from .state_backend import StateBackend
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_MAX_FAILURES = 5
+DEFAULT_RESET_SECONDS = 60.0
+DEFAULT_HALF_OPEN_CALLS = 1
+DEFAULT_WINDOW_SECONDS = 60.0
+DEFAULT_WINDOW_BUCKETS = 10
+DEFAULT_MIN_CALLS = 20
+
+
+class ErrorRateWindow:
+    """Calls and failures over the last ``window_seconds``, in fixed time buckets.
+
+    Memory is ``buckets`` slots regardless of traffic. A slot is reused once its
+    bucket falls out of the window, so the rate slides in steps of
+    ``window_seconds / buckets``.
+    """
+
+    def __init__(self, window_seconds: float = DEFAULT_WINDOW_SECONDS, buckets: int = DEFAULT_WINDOW_BUCKETS) -> None:
+        self.buckets = max(1, int(buckets))
+        self.bucket_seconds = max(float(window_seconds), 0.001) / self.buckets
+        self._ids: List[int] = [-1] * self.buckets
+        self._calls: List[int] = [0] * self.buckets
+        self._failures: List[int] = [0] * self.buckets
+
+    def record(self, now: float, failed: bool) -> None:
+        bucket = int(now // self.bucket_seconds)
+        slot = bucket % self.buckets
+        if self._ids[slot] != bucket:
+            self._ids[slot] = bucket
+            self._calls[slot] = 0
+            self._failures[slot] = 0
+        self._calls[slot] += 1
+        if failed:
+            self._failures[slot] += 1
+
+    def totals(self, now: float) -> Tuple[int, int]:
+        oldest = int(now // self.bucket_seconds) - self.buckets + 1
+        calls = failures = 0
+        for slot, bucket in enumerate(self._ids):
+            if bucket >= oldest:
+                calls += self._calls[slot]
+                failures += self._failures[slot]
+        return calls, failures
+
+    def reset(self) -> None:
+        self._ids = [-1] * self.buckets
+        self._calls = [0] * self.buckets
+        self._failures = [0] * self.buckets
 
 
 class CircuitBreaker:
-    def __init__(self, max_failures: int = 5, reset_seconds: int = 60) -> None:
+    """Closed -> open -> half-open breaker for one tool.
+
+    The circuit opens after ``max_failures`` consecutive failures or, when
+    ``error_rate_threshold`` is set, once at least ``min_calls`` results in the
+    rolling window have an error rate at or above the threshold. After
+    ``reset_seconds`` it turns half-open and admits at most
+    ``half_open_max_calls`` probes: it closes when all of them succeed and
+    reopens on the first probe failure. Successes reported while open, from
+    calls admitted before the trip, are ignored. A probe reserved by ``allow``
+    for a call that will not run is returned with ``release``; probes that
+    never report a result are given up on after another ``reset_seconds``.
+    Time comes from a monotonic clock, and state is guarded by a lock.
+    """
+
+    def __init__(
+        self,
+        max_failures: int = DEFAULT_MAX_FAILURES,
+        reset_seconds: float = DEFAULT_RESET_SECONDS,
+        half_open_max_calls: int = DEFAULT_HALF_OPEN_CALLS,
+        error_rate_threshold: float | None = None,
+        window_seconds: float = DEFAULT_WINDOW_SECONDS,
+        window_buckets: int = DEFAULT_WINDOW_BUCKETS,
+        min_calls: int = DEFAULT_MIN_CALLS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
         self.max_failures = max_failures
         self.reset_seconds = reset_seconds
+        self.half_open_max_calls = max(1, int(half_open_max_calls))
+        self.error_rate_threshold = error_rate_threshold
+        self.min_calls = max(1, int(min_calls))
+        self._window = ErrorRateWindow(window_seconds, window_buckets)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
         self._failures = 0
-        self._opened_at: float | None = None
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        self.opened_total = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._advance(self._clock())
+            return self._state
+
+    def allow(self) -> bool:
+        """Admit a call, reserving a probe slot while half-open."""
+        with self._lock:
+            now = self._clock()
+            self._advance(now)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes_started < self.half_open_max_calls:
+                self._probes_started += 1
+                return True
+            return False
+
+    def is_open(self) -> bool:
+        """True if a call would be rejected right now; never reserves a probe."""
+        with self._lock:
+            self._advance(self._clock())
+            if self._state == HALF_OPEN:
+                return self._probes_started >= self.half_open_max_calls
+            return self._state == OPEN
+
+    def release(self) -> None:
+        """Return a probe slot reserved by ``allow`` for a call that will not run."""
+        with self._lock:
+            self._advance(self._clock())
+            if self._state == HALF_OPEN and self._probes_started > 0:
+                self._probes_started -= 1
 
     def record_failure(self) -> None:
-        self._failures += 1
-        if self._failures >= self.max_failures:
-            self._opened_at = time.time()
+        with self._lock:
+            now = self._clock()
+            self._advance(now)
+            if self._state == HALF_OPEN:
+                self._open(now)
+                return
+            if self._state == OPEN:
+                return
+            self._failures += 1
+            self._window.record(now, failed=True)
+            if self._failures >= self.max_failures or self._rate_tripped(now):
+                self._open(now)
 
     def record_success(self) -> None:
+        with self._lock:
+            now = self._clock()
+            self._advance(now)
+            if self._state == OPEN:
+                # A late success from a call admitted before the trip says nothing about recovery.
+                return
+            if self._state == HALF_OPEN:
+                self._probes_succeeded += 1
+                if self._probes_succeeded >= self.half_open_max_calls:
+                    self._close()
+                return
+            self._failures = 0
+            self._window.record(now, failed=False)
+
+    def error_rate(self) -> float:
+        with self._lock:
+            calls, failures = self._window.totals(self._clock())
+        return failures / calls if calls else 0.0
+
+    def _rate_tripped(self, now: float) -> bool:
+        if self.error_rate_threshold is None:
+            return False
+        calls, failures = self._window.totals(now)
+        return calls >= self.min_calls and failures / calls >= self.error_rate_threshold
+
+    def _advance(self, now: float) -> None:
+        if self._state == CLOSED or now - self._opened_at < self.reset_seconds:
+            return
+        # Open long enough, or a half-open round whose probes never reported back.
+        self._state = HALF_OPEN
+        self._opened_at = now
+        self._probes_started = 0
+        self._probes_succeeded = 0
+
+    def _open(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
         self._failures = 0
-        self._opened_at = None
+        self.opened_total += 1
 
-    def is_open(self) -> bool:
-        if self._opened_at is None:
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._failures = 0
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        self._window.reset()
+
+
+class SharedCircuitBreaker:
+    """Circuit breaker whose failure count and open state live in a ``StateBackend``.
+
+    The open state is a key with a TTL of ``reset_seconds``, so it expires in the
+    store itself and replicas never compare each other's clocks. When it expires,
+    a ``half_open`` marker left behind limits the fleet to ``half_open_max_calls``
+    probes per ``reset_seconds``, and ``half_open_max_calls`` successes close the
+    circuit again. Successes reported while the open key is set are ignored.
+    The error-rate window is kept in per-bucket counters keyed by wall-clock
+    bucket number, shared by all replicas. A check or a success costs one
+    backend round trip; taking a half-open probe, opening or closing the
+    circuit cost more.
+    """
+
+    def __init__(
+        self,
+        backend: StateBackend,
+        tool_name: str,
+        max_failures: int = DEFAULT_MAX_FAILURES,
+        reset_seconds: float = DEFAULT_RESET_SECONDS,
+        half_open_max_calls: int = DEFAULT_HALF_OPEN_CALLS,
+        error_rate_threshold: float | None = None,
+        window_seconds: float = DEFAULT_WINDOW_SECONDS,
+        window_buckets: int = DEFAULT_WINDOW_BUCKETS,
+        min_calls: int = DEFAULT_MIN_CALLS,
+    ) -> None:
+        self.max_failures = max_failures
+        self.reset_seconds = reset_seconds
+        self.half_open_max_calls = max(1, int(half_open_max_calls))
+        self.error_rate_threshold = error_rate_threshold
+        self.window_seconds = max(float(window_seconds), 0.001)
+        self.window_buckets = max(1, int(window_buckets))
+        self.min_calls = max(1, int(min_calls))
+        self._backend = backend
+        self._tool_name = tool_name
+        self._failures_key = backend.key("cb", tool_name, "failures")
+        self._open_key = backend.key("cb", tool_name, "open")
+        self._half_open_key = backend.key("cb", tool_name, "half_open")
+        self._probes_key = backend.key("cb", tool_name, "probes")
+        self._successes_key = backend.key("cb", tool_name, "probe_successes")
+
+    def allow(self) -> bool:
+        # One round trip unless a probe is actually taken: closed, open and a
+        # full half-open round are all decided from this read.
+        open_flag, half_open, probes = self._read(self._open_key, self._half_open_key, self._probes_key)
+        if open_flag is not None:
             return False
-        if time.time() - self._opened_at > self.reset_seconds:
-            self.record_success()
+        if half_open is None:
+            return True
+        if (probes or 0) >= self.half_open_max_calls:
+            return False
+        probes = self._backend.incr(self._probes_key, 1, self.reset_seconds)
+        if probes > self.half_open_max_calls:
+            # Give the slot back, so the count is only probes in flight and a release frees one.
+            self._backend.incr(self._probes_key, -1, self.reset_seconds)
             return False
         return True
 
+    def is_open(self) -> bool:
+        open_flag, half_open, probes = self._read(self._open_key, self._half_open_key, self._probes_key)
+        if open_flag is not None:
+            return True
+        return half_open is not None and (probes or 0) >= self.half_open_max_calls
+
+    def release(self) -> None:
+        open_flag, half_open, probes = self._read(self._open_key, self._half_open_key, self._probes_key)
+        if open_flag is None and half_open is not None and (probes or 0) > 0:
+            self._backend.incr(self._probes_key, -1, self.reset_seconds)
+
+    def record_failure(self) -> None:
+        open_flag, half_open = self._read(self._open_key, self._half_open_key)
+        if open_flag is not None:
+            return
+        if half_open is not None:
+            self._open()
+            return
+        increments = [(self._failures_key, 1)]
+        reads: List[str] = []
+        if self.error_rate_threshold is not None:
+            calls_key, errors_key = self._bucket_keys(self._bucket())
+            increments += [(calls_key, 1), (errors_key, 1)]
+            reads = self._window_keys()
+        values, window = self._backend.incr_and_get(increments, reads, self._failures_ttl())
+        if values[0] >= self.max_failures or self._rate_tripped(window):
+            self._open()
+
+    def record_success(self) -> None:
+        # The state read and the error-rate call count share one batch; the
+        # failure count is reset only when it is set.
+        increments: List[Tuple[str, int]] = []
+        if self.error_rate_threshold is not None:
+            increments.append((self._bucket_keys(self._bucket())[0], 1))
+        _, (open_flag, half_open, failures) = self._backend.incr_and_get(
+            increments, [self._open_key, self._half_open_key, self._failures_key], self._failures_ttl()
+        )
+        if open_flag is not None:
+            return
+        if half_open is not None:
+            successes = self._backend.incr(self._successes_key, 1, self._failures_ttl())
+            if successes >= self.half_open_max_calls:
+                self._backend.delete(
+                    self._failures_key, self._open_key, self._half_open_key, self._probes_key, self._successes_key
+                )
+            return
+        if failures:
+            self._backend.delete(self._failures_key)
+
+    def _open(self) -> None:
+        self._backend.set(self._open_key, 1, self.reset_seconds)
+        self._backend.set(self._half_open_key, 1, self._failures_ttl())
+        self._backend.delete(self._failures_key, self._probes_key, self._successes_key)
+
+    def _read(self, *keys: str) -> List[Optional[int]]:
+        return self._backend.incr_and_get([], keys, 0)[1]
+
+    def _failures_ttl(self) -> float:
+        return max(self.reset_seconds, self.window_seconds, 1) * 10
+
+    def _bucket(self) -> int:
+        return int(time.time() // (self.window_seconds / self.window_buckets))
+
+    def _bucket_keys(self, bucket: int) -> Tuple[str, str]:
+        return (
+            self._backend.key("cb", self._tool_name, "calls", bucket),
+            self._backend.key("cb", self._tool_name, "errors", bucket),
+        )
+
+    def _window_keys(self) -> List[str]:
+        current = self._bucket()
+        keys: List[str] = []
+        for bucket in range(current - self.window_buckets + 1, current + 1):
+            keys.extend(self._bucket_keys(bucket))
+        return keys
+
+    def _rate_tripped(self, window: List[Optional[int]]) -> bool:
+        if self.error_rate_threshold is None or not window:
+            return False
+        calls = sum(value or 0 for value in window[0::2])
+        failures = sum(value or 0 for value in window[1::2])
+        return calls >= self.min_calls and failures / calls >= self.error_rate_threshold
+
+
+def _breaker_settings(policy: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+    def pick(key: str, fallback: Any) -> Any:
+        value = policy.get(key, defaults.get(key))
+        return fallback if value is None else value
+
+    error_rate = pick("circuit_breaker_error_rate", None)
+    return {
+        "max_failures": int(pick("circuit_breaker_threshold", DEFAULT_MAX_FAILURES)),
+        "reset_seconds": float(pick("circuit_breaker_reset_seconds", DEFAULT_RESET_SECONDS)),
+        "half_open_max_calls": int(pick("circuit_breaker_half_open_calls", DEFAULT_HALF_OPEN_CALLS)),
+        "error_rate_threshold": float(error_rate) if error_rate is not None else None,
+        "window_seconds": float(pick("circuit_breaker_window_seconds", DEFAULT_WINDOW_SECONDS)),
+        "min_calls": int(pick("circuit_breaker_min_calls", DEFAULT_MIN_CALLS)),
+    }
+
 
 class CircuitBreakerRegistry:
-    def __init__(self, config: Dict[str, object]) -> None:
+    def __init__(self, config: Dict[str, object], backend: StateBackend | None = None) -> None:
         tools_cfg = config.get("tools", {})
-        default_policy = tools_cfg.get("default_policy", {})
-        self._default_threshold = int(default_policy.get("circuit_breaker_threshold", 5))
-        self._tools: Dict[str, CircuitBreaker] = {}
+        default_policy = tools_cfg.get("default_policy", {}) or {}
+        self._default_threshold = int(default_policy.get("circuit_breaker_threshold", DEFAULT_MAX_FAILURES))
+        self._tools: Dict[str, CircuitBreaker | SharedCircuitBreaker] = {}
         for policy in tools_cfg.get("policies", []) or []:
             tool_name = policy.get("tool_name")
-            threshold = int(policy.get("circuit_breaker_threshold", self._default_threshold))
-            self._tools[tool_name] = CircuitBreaker(max_failures=threshold)
+            settings = _breaker_settings(policy, default_policy)
+            if backend is not None:
+                self._tools[tool_name] = SharedCircuitBreaker(backend, tool_name, **settings)
+            else:
+                self._tools[tool_name] = CircuitBreaker(**settings)
 
     def check(self, tool_name: str) -> GuardrailResult:
+        """Block if the tool's circuit is open; admitting a call while half-open takes a probe."""
         cb = self._tools.get(tool_name)
-        if cb and cb.is_open():
+        if cb and not cb.allow():
             return GuardrailResult(
                 action=GuardrailAction.BLOCK,
                 rule_name="circuit_open",
@@ -52,6 +380,11 @@ class CircuitBreakerRegistry:
             )
         return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="circuit_ok", reason="OK")
 
+    def release(self, tool_name: str) -> None:
+        cb = self._tools.get(tool_name)
+        if cb:
+            cb.release()
+
     def record_success(self, tool_name: str) -> None:
         cb = self._tools.get(tool_name)
         if cb:
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable
+from typing import Dict, List, Tuple
 
 from ..models import GuardrailAction, GuardrailResult
+from .matcher import KeywordMatcher
+from .text_view import normalization_mode, normalize_text
 
 
 CATEGORY_KEYWORDS = {
@@ -21,31 +23,39 @@ class ContentFilter:
         self.block_categories = [c.lower() for c in (cfg.get("block_categories") or [])]
         self.topic_blocklist = [t.lower() for t in (cfg.get("topic_blocklist") or [])]
         self.blocklist_keywords = [k.lower() for k in (cfg.get("blocklist_keywords") or [])]
+        self.normalization = normalization_mode(config)
+        self._rules, keywords = self._compile_rules()
+        self._matcher = KeywordMatcher(normalize_text(keyword, self.normalization) for keyword in keywords)
 
-    def check(self, text: str) -> GuardrailResult:
-        if not self.enabled or not self.block_categories:
-            return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="content_safety_disabled", reason="OK")
-        lower = text.lower()
+    def _compile_rules(self) -> Tuple[List[Tuple[str, str]], List[str]]:
+        """Flatten categories, topics and keywords into one list in check order."""
+        rules: List[Tuple[str, str]] = []
+        keywords: List[str] = []
         for category in self.block_categories:
             for keyword in CATEGORY_KEYWORDS.get(category, []):
-                if keyword in lower:
-                    return GuardrailResult(
-                        action=GuardrailAction.BLOCK,
-                        rule_name=f"content_{category}",
-                        reason=f"Content blocked for category: {category}",
-                    )
+                keywords.append(keyword)
+                rules.append((f"content_{category}", f"Content blocked for category: {category}"))
         for topic in self.topic_blocklist:
-            if topic in lower:
-                return GuardrailResult(
-                    action=GuardrailAction.BLOCK,
-                    rule_name="content_topic",
-                    reason=f"Content blocked for topic: {topic}",
-                )
+            keywords.append(topic)
+            rules.append(("content_topic", f"Content blocked for topic: {topic}"))
         for keyword in self.blocklist_keywords:
-            if keyword in lower:
-                return GuardrailResult(
-                    action=GuardrailAction.BLOCK,
-                    rule_name="content_keyword",
-                    reason="Content blocked by keyword",
-                )
+            keywords.append(keyword)
+            rules.append(("content_keyword", "Content blocked by keyword"))
+        return rules, keywords
+
+    @property
+    def active(self) -> bool:
+        return self.enabled and bool(self.block_categories)
+
+    @property
+    def max_keyword_length(self) -> int:
+        return max((len(keyword) for keyword in self._matcher.keywords), default=0)
+
+    def check(self, text: str, normalized: str | None = None) -> GuardrailResult:
+        if not self.active:
+            return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="content_safety_disabled", reason="OK")
+        index = self._matcher.first_match(normalize_text(text, self.normalization) if normalized is None else normalized)
+        if index is not None:
+            rule_name, reason = self._rules[index]
+            return GuardrailResult(action=GuardrailAction.BLOCK, rule_name=rule_name, reason=reason)
         return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="content_safe", reason="OK")
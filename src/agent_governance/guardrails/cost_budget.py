@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..exceptions import ConfigError
+from ..models import GuardrailAction, GuardrailResult
+from ..telemetry.cost_tracker import CostTracker, CostUsage
+from .request_state import DEFAULT_MAX_REQUESTS, DEFAULT_TTL_SECONDS, RequestStateStore
+from .state_backend import StateBackend
+
+# Prices a model call, e.g. ``CostTracker.estimate``.
+CostEstimator = Callable[[str, int, int], CostUsage]
+
+TOKENS = "tokens"
+USD = "usd"
+BUDGET_UNITS = (TOKENS, USD)
+DEFAULT_BUDGET_WINDOW_SECONDS = 3600.0
+# Budgets are counted in integer units so shared backends can hold them.
+_UNITS_PER_USD = 1_000_000
+
+
+class CostBudget:
+    """Per-user budget of tokens or estimated USD over a sliding window.
+
+    ``reserve`` runs before a request starts. It prices the input tokens plus
+    ``estimated_output_tokens`` with ``estimator`` and blocks the request if
+    that would take the user over ``per_user`` in the current window. The first
+    ``reconcile`` for a request swaps the reservation for the actual usage;
+    later calls add their usage. ``release`` refunds a reservation that was
+    never reconciled, and so does a reservation aging out of the request store. Each user costs a fixed ``[window, current, previous]``
+    triple, the same approximate sliding window as the rate limiter's
+    ``sliding_window`` algorithm, or two counters in a shared backend.
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        backend: StateBackend | None = None,
+        estimator: CostEstimator | None = None,
+    ) -> None:
+        cfg = (config.get("rate_limiting", {}) or {}).get("budget", {}) or {}
+        self.enabled = bool(cfg.get("enabled", False))
+        self.unit = str(cfg.get("unit", TOKENS)).lower()
+        if self.unit not in BUDGET_UNITS:
+            raise ConfigError(f"Unsupported rate_limiting.budget.unit: {self.unit}")
+        if self.enabled and not cfg.get("per_user"):
+            raise ConfigError("rate_limiting.budget.per_user is required when the budget is enabled")
+        self.per_user = float(cfg.get("per_user") or 0)
+        self.window_seconds = float(cfg.get("window_seconds", DEFAULT_BUDGET_WINDOW_SECONDS))
+        self.model = str(cfg.get("model", ""))
+        self.estimated_output_tokens = int(cfg.get("estimated_output_tokens", 0))
+        self._limit = self._to_units(self.per_user)
+        self._estimator = estimator or CostTracker().estimate
+        self._backend = backend
+        self._clock = time.monotonic if backend is None else time.time
+        self._lock = threading.Lock()
+        self._counters: Dict[str, List[int]] = {}
+        self._next_reap = self._clock() + self.window_seconds
+        # request id -> [user key, reserved units, window index]
+        self._reservations: RequestStateStore[List[Any]] = RequestStateStore(
+            DEFAULT_MAX_REQUESTS, DEFAULT_TTL_SECONDS, on_discard=self._refund
+        )
+
+    def reserve(self, request_id: str, user_key: str | None, input_tokens: int) -> Optional[GuardrailResult]:
+        """Charge the pre-estimate of a request; return a BLOCK result if it does not fit."""
+        if not self.enabled or not user_key:
+            return None
+        amount = self._units(self._estimator(self.model, input_tokens, self.estimated_output_tokens))
+        now = self._clock()
+        index = int(now // self.window_seconds)
+        elapsed = (now % self.window_seconds) / self.window_seconds
+        if self._backend is not None:
+            current, previous = self._shared_add(user_key, index, amount)
+            used = previous * (1.0 - elapsed) + current - amount
+            if used + amount > self._limit:
+                self._shared_add(user_key, index, -amount)
+        else:
+            with self._lock:
+                if now >= self._next_reap:
+                    self._reap(index)
+                state = self._window(user_key, index)
+                used = state[2] * (1.0 - elapsed) + state[1]
+                if used + amount <= self._limit:
+                    state[1] += amount
+        if used + amount > self._limit:
+            return GuardrailResult(
+                action=GuardrailAction.BLOCK,
+                rule_name="rate_limit_budget",
+                reason=f"User {self.unit} budget exceeded",
+                details={
+                    "unit": self.unit,
+                    "budget": self.per_user,
+                    "used": round(self._from_units(used), 6),
+                    "estimate": round(self._from_units(amount), 6),
+                },
+            )
+        # Store calls stay outside our lock: a discarded reservation is refunded under it.
+        reservation = self._reservations.get_or_create(request_id, list)
+        with self._lock:
+            reservation[:] = [user_key, amount, index]
+        return None
+
+    def reconcile(self, request_id: str, user_key: str | None, usage: CostUsage) -> None:
+        """Charge the actual usage of one model call, replacing the pre-estimate on the first call."""
+        if not self.enabled:
+            return
+        reservation = self._reservations.get(request_id)
+        if reservation:
+            user_key = reservation[0]
+            self._refund(request_id, reservation)
+        if not user_key:
+            return
+        self._adjust(user_key, int(self._clock() // self.window_seconds), self._units(usage))
+
+    def release(self, request_id: str) -> None:
+        reservation = self._reservations.pop(request_id)
+        if reservation:
+            self._refund(request_id, reservation)
+
+    def adopt_request_state(self, previous: "CostBudget") -> None:
+        self._reservations = previous._reservations
+        self._reservations.on_discard = self._refund
+
+    def _refund(self, request_id: str, reservation: List[Any]) -> None:
+        """Give back the units still reserved for a request; each reservation is refunded once."""
+        with self._lock:
+            if not reservation or not reservation[1]:
+                return
+            user_key, amount, index = reservation
+            reservation[1] = 0
+        self._adjust(user_key, index, -amount)
+
+    @property
+    def tracked_users(self) -> int:
+        return len(self._counters)
+
+    def _units(self, usage: CostUsage) -> int:
+        if self.unit == USD:
+            return self._to_units(usage.estimated_usd)
+        return usage.input_tokens + usage.output_tokens
+
+    def _to_units(self, value: float) -> int:
+        return int(round(value * _UNITS_PER_USD)) if self.unit == USD else int(value)
+
+    def _from_units(self, value: float) -> float:
+        return value / _UNITS_PER_USD if self.unit == USD else value
+
+    def _window(self, user_key: str, index: int) -> List[int]:
+        state = self._counters.get(user_key)
+        if state is None:
+            state = self._counters[user_key] = [index, 0, 0]
+        elif state[0] != index:
+            state[2] = state[1] if state[0] == index - 1 else 0
+            state[1] = 0
+            state[0] = index
+        return state
+
+    def _adjust(self, user_key: str, index: int, delta: int) -> None:
+        if not delta:
+            return
+        if self._backend is not None:
+            if index >= int(self._clock() // self.window_seconds) - 1:
+                self._backend.incr(self._key(user_key, index), delta, 2 * self.window_seconds)
+            return
+        with self._lock:
+            state = self._window(user_key, int(self._clock() // self.window_seconds))
+            if index == state[0]:
+                state[1] = max(0, state[1] + delta)
+            elif index == state[0] - 1:
+                state[2] = max(0, state[2] + delta)
+
+    def _reap(self, index: int) -> None:
+        self._next_reap = self._clock() + self.window_seconds
+        for key in [key for key, state in self._counters.items() if state[0] < index - 1]:
+            del self._counters[key]
+
+    def _key(self, user_key: str, index: int) -> str:
+        assert self._backend is not None
+        return self._backend.key("budget", user_key, index)
+
+    def _shared_add(self, user_key: str, index: int, amount: int) -> Tuple[int, int]:
+        assert self._backend is not None
+        counts, previous = self._backend.incr_and_get(
+            [(self._key(user_key, index), amount)], [self._key(user_key, index - 1)], 2 * self.window_seconds
+        )
+        return counts[0], previous[0] or 0
@@ -1,74 +1,545 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+from ..exceptions import ConfigError
 from ..models import GuardrailAction, GuardrailResult, RequestContext
+from ..telemetry.cost_tracker import CostUsage
 from ..telemetry.logger import GovernanceLogger
+from .bulkhead import BulkheadRegistry
 from .circuit_breaker import CircuitBreakerRegistry
 from .content_filter import ContentFilter
+from .cost_budget import CostBudget, CostEstimator
 from .input_validator import InputValidator
+from .load_shedder import LoadShedder, LoadSignal
 from .model_schema import ModelSchemaValidator
 from .output_validator import OutputValidator
+from .profiling import StageLatencyHistogram, StageProfiler
 from .rate_limiter import RateLimiter
+from .state_backend import StateBackend, create_state_backend
+from .streaming import StreamingOutputCheck
+from .text_checks import (
+    DEFAULT_INPUT_STAGES,
+    DEFAULT_OUTPUT_STAGES,
+    INPUT,
+    INPUT_STAGE_NAMES,
+    OUTPUT,
+    OUTPUT_STAGE_NAMES,
+    PARALLEL_STAGES,
+    RATE_LIMIT,
+    StageTiming,
+    TextChecks,
+    Verdict,
+    error_result,
+    init_stage_worker,
+    passed_result,
+    run_stage,
+    run_text_checks,
+    run_worker_stage,
+    stage_order,
+)
+from .text_view import TextView
 from .tool_policy import ToolPolicyEnforcer
+from .verdict_cache import DEFAULT_MAX_ENTRIES, DEFAULT_MAX_TEXT_CHARS, VerdictCache, policy_fingerprint
+
+DEFAULT_BATCH_CHUNK_SIZE = 256
+DEFAULT_PARALLEL_MIN_CHARS = 8192
+PARALLEL_EXECUTORS = ("process", "thread")
 
 
 class GuardrailsEngine:
-    """Orchestrates guardrail checks. Fail-closed on internal errors."""
+    """Orchestrates guardrail checks. Fail-closed on internal errors.
+
+    Input and output checks run as ordered stage pipelines configured under
+    ``pipeline.input_stages`` / ``pipeline.output_stages``. Each stage's latency
+    goes to ``profiler`` when given, or to a built-in histogram when
+    ``pipeline.profile`` is true.
+
+    With ``pipeline.parallel.enabled``, the independent stages of inputs of at
+    least ``min_chars`` run concurrently in a worker pool; verdicts are still
+    resolved in stage order. Call ``close`` to shut the pool down.
+
+    With ``verdict_cache.enabled`` (or a shared ``verdict_cache`` instance),
+    stateless stage verdicts for repeated texts are served from an LRU cache
+    that is invalidated whenever the policy fingerprint changes.
+
+    With ``load_shedding.enabled`` and a ``load_signal`` (the ADK middleware
+    passes ``AgentMetricsTracker.load``), ``check_input`` sheds low-priority
+    requests first once latency or concurrency passes its targets.
+    """
 
-    def __init__(self, config: Dict[str, Any], logger: GovernanceLogger | None = None) -> None:
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        logger: GovernanceLogger | None = None,
+        state_backend: StateBackend | None = None,
+        profiler: StageProfiler | None = None,
+        stage_executor: Executor | None = None,
+        verdict_cache: VerdictCache | None = None,
+        load_signal: LoadSignal | None = None,
+        cost_estimator: CostEstimator | None = None,
+    ) -> None:
         self._config = config
         self._enabled = bool(config.get("enabled", True))
         self._logger = logger
         self._tool_enforcer = ToolPolicyEnforcer(config)
         self._input_validator = InputValidator(config)
         self._output_validator = OutputValidator(config)
-        self._rate_limiter = RateLimiter(config)
+        self._state_backend = state_backend or create_state_backend(config.get("state_backend"))
+        self._rate_limiter = RateLimiter(config, backend=self._state_backend)
+        self._cost_estimator = cost_estimator
+        self._cost_budget = CostBudget(config, backend=self._state_backend, estimator=cost_estimator)
         self._content_filter = ContentFilter(config)
-        self._circuit_breakers = CircuitBreakerRegistry(config)
+        self._circuit_breakers = CircuitBreakerRegistry(config, backend=self._state_backend)
+        self._bulkheads = BulkheadRegistry(config)
+        load_shedder = LoadShedder(config)
+        self._load_shedder = load_shedder if load_shedder.enabled else None
+        self._load_signal = load_signal
         schema_path = config.get("model_schema_file") or config.get("model_schema_path")
         self._schema_validator = ModelSchemaValidator(schema_path) if schema_path else None
+        self._text_checks = TextChecks(
+            self._input_validator,
+            self._output_validator,
+            self._content_filter,
+            self._schema_validator,
+        )
+
+        pipeline_cfg = config.get("pipeline", {}) or {}
+        input_stages = stage_order(pipeline_cfg.get("input_stages"), DEFAULT_INPUT_STAGES, INPUT_STAGE_NAMES, INPUT)
+        self._output_stages = stage_order(
+            pipeline_cfg.get("output_stages"), DEFAULT_OUTPUT_STAGES, OUTPUT_STAGE_NAMES, OUTPUT
+        )
+        # Rate limiting is stateful and runs outside TextChecks, so split around it.
+        self._rate_limit_stage = RATE_LIMIT in input_stages
+        split = input_stages.index(RATE_LIMIT) if self._rate_limit_stage else len(input_stages)
+        self._input_stages_before_rate_limit = input_stages[:split]
+        self._input_stages_after_rate_limit = input_stages[split + 1 :]
+        self._stage_histogram = StageLatencyHistogram() if pipeline_cfg.get("profile") and not profiler else None
+        self._profiler: Optional[StageProfiler] = profiler or self._stage_histogram
+        self._external_profiler = profiler
+
+        parallel_cfg = pipeline_cfg.get("parallel", {}) or {}
+        self._parallel = bool(parallel_cfg.get("enabled", False))
+        self._parallel_min_chars = int(parallel_cfg.get("min_chars", DEFAULT_PARALLEL_MIN_CHARS))
+        self._parallel_executor_type = str(parallel_cfg.get("executor", "process")).lower()
+        if self._parallel_executor_type not in PARALLEL_EXECUTORS:
+            raise ConfigError(
+                f"Unknown guardrail pipeline.parallel.executor: {self._parallel_executor_type} "
+                f"(expected one of {', '.join(PARALLEL_EXECUTORS)})"
+            )
+        self._parallel_max_workers = parallel_cfg.get("max_workers")
+        self._stage_executor = stage_executor
+        self._external_verdict_cache = verdict_cache is not None
+        self._owned_stage_executor: Executor | None = None
+        self._stage_pool_lock = threading.Lock()
+        # Set by retire/close: requests still running on this engine check their stages inline.
+        self._retired = False
+
+        cache_cfg = config.get("verdict_cache", {}) or {}
+        if verdict_cache is None and cache_cfg.get("enabled"):
+            verdict_cache = VerdictCache(
+                int(cache_cfg.get("max_entries", DEFAULT_MAX_ENTRIES)),
+                int(cache_cfg.get("max_text_chars", DEFAULT_MAX_TEXT_CHARS)),
+            )
+        self._verdict_cache = verdict_cache
+        if verdict_cache is not None:
+            verdict_cache.bind(self.policy_fingerprint)
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return self._config
+
+    def reconfigure(self, config: Dict[str, Any]) -> "GuardrailsEngine":
+        """Compile a replacement engine for ``config`` that keeps this engine's runtime state.
+
+        Per-request tool counters, the state backend, shared caches and the
+        stage histogram always carry over. Rate limit windows, circuit
+        breakers and tool concurrency slots carry over when their settings are
+        unchanged; otherwise they restart under the new settings.
+        """
+        cache_cfg = config.get("verdict_cache", {}) or {}
+        keep_cache = self._external_verdict_cache or bool(cache_cfg.get("enabled"))
+        engine = GuardrailsEngine(
+            config,
+            self._logger,
+            state_backend=self._state_backend,
+            profiler=self._external_profiler,
+            stage_executor=self._stage_executor,
+            verdict_cache=self._verdict_cache if keep_cache else None,
+            load_signal=self._load_signal,
+            cost_estimator=self._cost_estimator,
+        )
+        engine._external_verdict_cache = self._external_verdict_cache
+        if engine._stage_histogram is not None and self._stage_histogram is not None:
+            engine._stage_histogram = engine._profiler = self._stage_histogram
+        engine._tool_enforcer.adopt_request_state(self._tool_enforcer)
+        engine._cost_budget.adopt_request_state(self._cost_budget)
+        if config.get("rate_limiting") == self._config.get("rate_limiting"):
+            engine._rate_limiter = self._rate_limiter
+            engine._cost_budget = self._cost_budget
+        if config.get("tools") == self._config.get("tools"):
+            engine._circuit_breakers = self._circuit_breakers
+            engine._bulkheads = self._bulkheads
+        return engine
+
+    @property
+    def policy_fingerprint(self) -> str:
+        """Digest of every setting and file that can change an input or output text verdict."""
+        return policy_fingerprint(
+            {
+                "input_validation": self._config.get("input_validation"),
+                "output_validation": self._config.get("output_validation"),
+                "content_safety": self._config.get("content_safety"),
+                "normalization": self._text_checks.normalization,
+                "injection_patterns": self._input_validator.patterns,
+                "model_schema": self._schema_validator.schema if self._schema_validator else None,
+            }
+        )
+
+    @property
+    def verdict_cache(self) -> VerdictCache | None:
+        return self._verdict_cache
+
+    @property
+    def stage_latency(self) -> StageLatencyHistogram | None:
+        return self._stage_histogram
 
     async def check_input(self, ctx: RequestContext, input_text: str, agent=None) -> GuardrailResult:
         if not self._enabled:
             return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="disabled", reason="Guardrails disabled")
 
         try:
-            rate_result = self._rate_limiter.check(ctx.user_id_hash)
-            if rate_result.action == GuardrailAction.BLOCK:
-                self._emit(agent, ctx, "rate_limited", rate_result)
-                return rate_result
-
-            input_result = self._input_validator.validate(input_text)
-            if input_result.action == GuardrailAction.BLOCK:
-                self._emit(agent, ctx, "input_rejected", input_result)
-                return input_result
-
-            inj_result = self._input_validator.check_injection(input_text)
-            if inj_result.action == GuardrailAction.BLOCK:
-                self._emit(agent, ctx, "injection_detected", inj_result)
-                return inj_result
-
-            if self._schema_validator:
-                errors = self._schema_validator.validate_input({"text": input_text})
-                if errors:
-                    result = GuardrailResult(
-                        action=GuardrailAction.BLOCK,
-                        rule_name="input_schema",
-                        reason="Input schema validation failed",
-                        details={"errors": errors},
+            event_name, result = await self._run_input(ctx, input_text)
+            if event_name:
+                self._emit(agent, ctx, event_name, result)
+            return result
+        except Exception:
+            return error_result()
+
+    async def _run_input(self, ctx: RequestContext, text: str) -> Verdict:
+        view = self._text_checks.view(text)
+        timings: List[StageTiming] | None = [] if self._profiler else None
+        try:
+            verdict = self._check_load(ctx)
+            if verdict is None:
+                verdict = await self._run_stages(INPUT, self._input_stages_before_rate_limit, view, timings)
+            reserved = False
+            if verdict is None and self._rate_limit_stage:
+                verdict = self._check_rate_limit(ctx, view.text, timings)
+                reserved = verdict is None and self._cost_budget.enabled
+            if verdict is None:
+                blocked = True
+                try:
+                    verdict = await self._run_stages(INPUT, self._input_stages_after_rate_limit, view, timings)
+                    blocked = verdict is not None
+                finally:
+                    if reserved and blocked:
+                        # A request turned away after its budget was reserved never runs.
+                        self._cost_budget.release(ctx.request_id)
+        finally:
+            self._report_timings(INPUT, timings)
+        return verdict or (None, passed_result())
+
+    async def _run_stages(
+        self,
+        pipeline: str,
+        stages: Sequence[str],
+        view: TextView,
+        timings: List[StageTiming] | None,
+    ) -> Optional[Verdict]:
+        if not stages:
+            return None
+        cache = self._verdict_cache
+        if cache is None or not cache.accepts(view.text):
+            return await self._run_stages_uncached(pipeline, stages, view, timings)
+        key = cache.key(pipeline, stages, view.text)
+        hit, verdict = cache.get(key)
+        if not hit:
+            verdict = await self._run_stages_uncached(pipeline, stages, view, timings)
+            cache.put(key, verdict)
+        return verdict
+
+    async def _run_stages_uncached(
+        self,
+        pipeline: str,
+        stages: Sequence[str],
+        view: TextView,
+        timings: List[StageTiming] | None,
+    ) -> Optional[Verdict]:
+        if not self._parallel or view.length < self._parallel_min_chars:
+            return self._text_checks.run(pipeline, stages, view, timings)
+        for group in _parallel_groups(stages):
+            if len(group) == 1:
+                verdict = self._text_checks.run(pipeline, group, view, timings)
+            else:
+                verdict = await self._run_stages_parallel(pipeline, group, view.text, timings)
+            if verdict is not None:
+                return verdict
+        return None
+
+    async def _run_stages_parallel(
+        self, pipeline: str, stages: Sequence[str], text: str, timings: List[StageTiming] | None
+    ) -> Optional[Verdict]:
+        """Run ``stages`` concurrently; the first blocking verdict in stage order wins.
+
+        A stage error surfaces only if every earlier stage passed, exactly as in
+        sequential execution, and is then failed closed by the caller.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._stage_executor or self._stage_pool()
+        if executor is None:
+            return self._text_checks.run(pipeline, stages, text, timings)
+        try:
+            if isinstance(executor, ProcessPoolExecutor) and executor is not self._stage_executor:
+                # Our own process workers hold the checks already (see init_stage_worker).
+                futures = [
+                    loop.run_in_executor(executor, run_worker_stage, pipeline, stage, text) for stage in stages
+                ]
+            else:
+                futures = [
+                    loop.run_in_executor(executor, run_stage, self._text_checks, pipeline, stage, text)
+                    for stage in stages
+                ]
+        except RuntimeError:
+            if not self._retired:
+                raise
+            # The pool was shut down by retire after this request picked it up.
+            return self._text_checks.run(pipeline, stages, text, timings)
+        try:
+            for stage, future in zip(stages, futures):
+                verdict, elapsed_ms = await future
+                if timings is not None:
+                    timings.append((stage, elapsed_ms))
+                if verdict is not None:
+                    return verdict
+            return None
+        finally:
+            for future in futures:
+                if not future.done():
+                    future.cancel()
+                elif not future.cancelled():
+                    future.exception()
+
+    def _stage_pool(self) -> Optional[Executor]:
+        """The engine's own stage pool, started on first use; None once the engine is retired."""
+        with self._stage_pool_lock:
+            if self._retired:
+                return None
+            if self._owned_stage_executor is None:
+                if self._parallel_executor_type == "process":
+                    self._owned_stage_executor = ProcessPoolExecutor(
+                        max_workers=self._parallel_max_workers,
+                        initializer=init_stage_worker,
+                        initargs=(self._text_checks,),
                     )
-                    self._emit(agent, ctx, "schema_validation", result)
-                    return result
+                else:
+                    self._owned_stage_executor = ThreadPoolExecutor(
+                        max_workers=self._parallel_max_workers, thread_name_prefix="guardrail-stage"
+                    )
+            return self._owned_stage_executor
 
-            safety_result = self._content_filter.check(input_text)
-            if safety_result.action == GuardrailAction.BLOCK:
-                self._emit(agent, ctx, "content_filtered", safety_result)
-                return safety_result
+    def close(self) -> None:
+        """Shut down the worker pool used for parallel stages, if one was started."""
+        self._shutdown_stage_pool(cancel_futures=True)
 
-            return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="all_passed", reason="OK")
-        except Exception:
-            return GuardrailResult(action=GuardrailAction.BLOCK, rule_name="guardrail_error", reason="Error")
+    def retire(self) -> None:
+        """Release the stage pool once a replacement engine is live, letting queued stages finish.
+
+        Requests still running on this engine check their remaining stages inline.
+        """
+        self._shutdown_stage_pool(cancel_futures=False)
+
+    def _shutdown_stage_pool(self, cancel_futures: bool) -> None:
+        with self._stage_pool_lock:
+            self._retired = True
+            executor, self._owned_stage_executor = self._owned_stage_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=cancel_futures)
+
+    def _check_load(self, ctx: RequestContext) -> Optional[Verdict]:
+        if self._load_shedder is None or self._load_signal is None:
+            return None
+        result = self._load_shedder.check(ctx.priority, self._load_signal())
+        return ("load_shed", result) if result is not None else None
+
+    def _check_rate_limit(self, ctx: RequestContext, text: str, timings: List[StageTiming] | None) -> Optional[Verdict]:
+        start = time.perf_counter()
+        result = self._rate_limiter.check(ctx.user_id_hash)
+        if result.action != GuardrailAction.BLOCK and self._cost_budget.enabled:
+            # Bounded like the length stage, so an oversized input is never tokenized in full.
+            limit = self._input_validator.max_tokens + 1
+            input_tokens = self._input_validator.token_counter.count(text, limit)
+            budget_result = self._cost_budget.reserve(ctx.request_id, ctx.user_id_hash, input_tokens)
+            if budget_result is not None:
+                self._rate_limiter.refund(ctx.user_id_hash)
+                result = budget_result
+        if timings is not None:
+            timings.append((RATE_LIMIT, (time.perf_counter() - start) * 1000.0))
+        return ("rate_limited", result) if result.action == GuardrailAction.BLOCK else None
+
+    async def check_input_many(
+        self,
+        items: Sequence[Tuple[RequestContext, str]],
+        agent=None,
+        executor: Executor | None = None,
+        chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE,
+    ) -> List[GuardrailResult]:
+        """Check many ``(ctx, text)`` inputs; results are returned in input order.
+
+        Rate limits are applied item by item in order. Every other stage runs
+        once per distinct text still undecided, inline or in ``executor`` chunks
+        (a process pool suits large pattern sets).
+        """
+        if not self._enabled:
+            return [
+                GuardrailResult(action=GuardrailAction.ALLOW, rule_name="disabled", reason="Guardrails disabled")
+                for _ in items
+            ]
+        results: List[GuardrailResult | None] = [None] * len(items)
+        pending = _group_by_text(items, range(len(items)))
+        pending = await self._scan_batch(
+            INPUT, self._input_stages_before_rate_limit, items, results, pending, agent, executor, chunk_size
+        )
+        if self._rate_limit_stage:
+            timings: List[StageTiming] | None = [] if self._profiler else None
+            undecided = []
+            for index in sorted(i for indices in pending.values() for i in indices):
+                ctx = items[index][0]
+                try:
+                    verdict = self._check_rate_limit(ctx, items[index][1], timings)
+                except Exception:
+                    verdict = (None, error_result())
+                if verdict is None:
+                    undecided.append(index)
+                    continue
+                event_name, result = verdict
+                if event_name:
+                    self._emit(agent, ctx, event_name, result)
+                results[index] = result
+            self._report_timings(INPUT, timings)
+            pending = _group_by_text(items, undecided)
+        pending = await self._scan_batch(
+            INPUT, self._input_stages_after_rate_limit, items, results, pending, agent, executor, chunk_size
+        )
+        if self._rate_limit_stage and self._cost_budget.enabled:
+            for index in undecided:
+                if results[index] is not None:
+                    self._cost_budget.release(items[index][0].request_id)
+        _fill_passed(results, pending)
+        return results  # type: ignore[return-value]
+
+    async def check_output_many(
+        self,
+        items: Sequence[Tuple[RequestContext, str]],
+        agent=None,
+        executor: Executor | None = None,
+        chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE,
+    ) -> List[GuardrailResult]:
+        """Batch counterpart of ``check_output``; see ``check_input_many``."""
+        if not self._enabled:
+            return [
+                GuardrailResult(action=GuardrailAction.ALLOW, rule_name="disabled", reason="Guardrails disabled")
+                for _ in items
+            ]
+        results: List[GuardrailResult | None] = [None] * len(items)
+        pending = _group_by_text(items, range(len(items)))
+        pending = await self._scan_batch(
+            OUTPUT, self._output_stages, items, results, pending, agent, executor, chunk_size
+        )
+        _fill_passed(results, pending)
+        return results  # type: ignore[return-value]
+
+    async def _scan_batch(
+        self,
+        pipeline: str,
+        stages: Sequence[str],
+        items: Sequence[Tuple[RequestContext, str]],
+        results: List[GuardrailResult | None],
+        pending: Dict[str, List[int]],
+        agent,
+        executor: Executor | None,
+        chunk_size: int,
+    ) -> Dict[str, List[int]]:
+        """Run ``stages`` once per distinct pending text; return the items still undecided."""
+        if not stages or not pending:
+            return pending
+        cache = self._verdict_cache
+        cached: Dict[str, Optional[Verdict]] = {}
+        if cache is not None:
+            for text in filter(cache.accepts, pending):
+                hit, verdict = cache.get(cache.key(pipeline, stages, text))
+                if hit:
+                    cached[text] = verdict
+        texts = [text for text in pending if text not in cached]
+        profile = self._profiler is not None
+        if executor is None:
+            verdicts, timings = run_text_checks(self._text_checks, pipeline, stages, texts, profile)
+        else:
+            verdicts, timings = await self._run_text_checks_in(executor, pipeline, stages, texts, profile, chunk_size)
+        self._report_timings(pipeline, timings)
+        if cache is not None:
+            for text, verdict in zip(texts, verdicts):
+                if cache.accepts(text) and (verdict is None or verdict[1].rule_name != "guardrail_error"):
+                    cache.put(cache.key(pipeline, stages, text), verdict)
+
+        undecided: Dict[str, List[int]] = {}
+        for text, verdict in [*cached.items(), *zip(texts, verdicts)]:
+            if verdict is None:
+                undecided[text] = pending[text]
+                continue
+            event_name, result = verdict
+            for position, index in enumerate(pending[text]):
+                item_result = result if position == 0 else result.model_copy(deep=True)
+                if event_name:
+                    self._emit(agent, items[index][0], event_name, item_result)
+                results[index] = item_result
+        return undecided
+
+    async def _run_text_checks_in(
+        self,
+        executor: Executor,
+        pipeline: str,
+        stages: Sequence[str],
+        texts: Sequence[str],
+        profile: bool,
+        chunk_size: int,
+    ) -> Tuple[List[Optional[Verdict]], List[StageTiming]]:
+        """``run_text_checks`` in ``executor`` chunks; a chunk the executor fails on fails closed per item."""
+        loop = asyncio.get_running_loop()
+        chunk_size = max(1, chunk_size)
+        starts = range(0, len(texts), chunk_size)
+        try:
+            chunks: List[Any] = await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        executor,
+                        run_text_checks,
+                        self._text_checks,
+                        pipeline,
+                        stages,
+                        texts[start : start + chunk_size],
+                        profile,
+                    )
+                    for start in starts
+                ),
+                return_exceptions=True,
+            )
+        except Exception as exc:
+            # The executor refused the work outright, e.g. after shutdown.
+            chunks = [exc] * len(starts)
+        verdicts: List[Optional[Verdict]] = []
+        timings: List[StageTiming] = []
+        for start, chunk in zip(starts, chunks):
+            if isinstance(chunk, BaseException):
+                verdicts.extend((None, error_result()) for _ in texts[start : start + chunk_size])
+                continue
+            verdicts.extend(chunk[0])
+            timings.extend(chunk[1])
+        return verdicts, timings
 
     async def check_tool_call(
         self,
@@ -81,21 +552,24 @@ class GuardrailsEngine:
             return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="disabled", reason="Guardrails disabled")
 
         try:
-            allow_result = self._tool_enforcer.check_allowed(tool_name)
+            policy = self._tool_enforcer.resolve(tool_name)
+            allow_result = self._tool_enforcer.check_allowed(tool_name, policy)
             if allow_result.action == GuardrailAction.BLOCK:
                 self._emit(agent, ctx, "tool_blocked", allow_result, tool_name=tool_name)
                 return allow_result
 
-            limit_result = self._tool_enforcer.check_call_limit(ctx.request_id, tool_name)
-            if limit_result.action == GuardrailAction.BLOCK:
-                self._emit(agent, ctx, "tool_blocked", limit_result, tool_name=tool_name)
-                return limit_result
+            if policy.max_calls_per_request:
+                limit_result = self._tool_enforcer.check_call_limit(ctx.request_id, tool_name, policy)
+                if limit_result.action == GuardrailAction.BLOCK:
+                    self._emit(agent, ctx, "tool_blocked", limit_result, tool_name=tool_name)
+                    return limit_result
 
             if tool_params:
-                param_result = self._tool_enforcer.check_params(tool_name, tool_params)
-                if param_result.action == GuardrailAction.BLOCK:
-                    self._emit(agent, ctx, "tool_blocked", param_result, tool_name=tool_name)
-                    return param_result
+                if policy.has_param_rules:
+                    param_result = self._tool_enforcer.check_params(tool_name, tool_params, policy)
+                    if param_result.action == GuardrailAction.BLOCK:
+                        self._emit(agent, ctx, "tool_blocked", param_result, tool_name=tool_name)
+                        return param_result
 
                 if self._schema_validator:
                     errors = self._schema_validator.validate_tool_params(tool_name, tool_params)
@@ -109,56 +583,93 @@ class GuardrailsEngine:
                         self._emit(agent, ctx, "schema_validation", result, tool_name=tool_name)
                         return result
 
+            if policy.requires_confirmation:
+                confirm_result = self._tool_enforcer.check_confirmation_required(tool_name, policy)
+                self._emit(agent, ctx, "confirmation_required", confirm_result, tool_name=tool_name)
+                return confirm_result
+
+            if self._bulkheads:
+                bulkhead_result = await self._bulkheads.acquire(ctx.request_id, tool_name)
+                if bulkhead_result.action == GuardrailAction.BLOCK:
+                    self._emit(agent, ctx, "tool_blocked", bulkhead_result, tool_name=tool_name)
+                    return bulkhead_result
+
+            # The circuit is checked last: a half-open probe is only taken once nothing else can refuse the call.
             cb_result = self._circuit_breakers.check(tool_name)
             if cb_result.action == GuardrailAction.BLOCK:
+                if self._bulkheads:
+                    self._bulkheads.release(tool_name, ctx.request_id)
                 self._emit(agent, ctx, "tool_blocked", cb_result, tool_name=tool_name)
                 return cb_result
 
-            confirm_result = self._tool_enforcer.check_confirmation_required(tool_name)
-            if confirm_result.action == GuardrailAction.CONFIRM:
-                self._emit(agent, ctx, "confirmation_required", confirm_result, tool_name=tool_name)
-                return confirm_result
-
             return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="all_passed", reason="OK")
         except Exception:
-            return GuardrailResult(action=GuardrailAction.BLOCK, rule_name="guardrail_error", reason="Error")
+            return error_result()
 
     async def check_output(self, ctx: RequestContext, output_text: str, agent=None) -> GuardrailResult:
         if not self._enabled:
             return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="disabled", reason="Guardrails disabled")
         try:
-            length_result = self._output_validator.validate_length(output_text)
-            if length_result.action == GuardrailAction.BLOCK:
-                self._emit(agent, ctx, "output_filtered", length_result)
-                return length_result
-
-            if self._schema_validator:
-                errors = self._schema_validator.validate_output({"text": output_text})
-                if errors:
-                    result = GuardrailResult(
-                        action=GuardrailAction.BLOCK,
-                        rule_name="output_schema",
-                        reason="Output schema validation failed",
-                        details={"errors": errors},
-                    )
-                    self._emit(agent, ctx, "schema_validation", result)
-                    return result
+            timings: List[StageTiming] | None = [] if self._profiler else None
+            try:
+                verdict = await self._run_stages(
+                    OUTPUT, self._output_stages, self._text_checks.view(output_text), timings
+                )
+            finally:
+                self._report_timings(OUTPUT, timings)
+            event_name, result = verdict or (None, passed_result())
+            if event_name:
+                self._emit(agent, ctx, event_name, result)
+            return result
+        except Exception:
+            return error_result()
 
-            safety_result = self._content_filter.check(output_text)
-            if safety_result.action == GuardrailAction.BLOCK:
-                self._emit(agent, ctx, "output_filtered", safety_result)
-                return safety_result
+    def stream_output(self, ctx: RequestContext, agent=None) -> StreamingOutputCheck:
+        """Start an incremental output check for a streamed response; see ``StreamingOutputCheck``."""
+        return StreamingOutputCheck(
+            self._text_checks,
+            self._output_stages if self._enabled else (),
+            on_block=lambda event_name, result: self._emit(agent, ctx, event_name, result),
+        )
 
-            return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="all_passed", reason="OK")
-        except Exception:
-            return GuardrailResult(action=GuardrailAction.BLOCK, rule_name="guardrail_error", reason="Error")
+    def clear_request(self, request_id: str) -> None:
+        """Release per-request guardrail state once a request has finished."""
+        self._tool_enforcer.clear_request(request_id)
+        self._bulkheads.release_request(request_id)
+        self._cost_budget.release(request_id)
+
+    def gauges(self) -> Dict[str, Any]:
+        gauges = self._tool_enforcer.gauges()
+        if self._stage_histogram is not None:
+            gauges["guardrail_stage_latency_ms"] = self._stage_histogram.snapshot()
+        if self._verdict_cache is not None:
+            gauges.update(self._verdict_cache.gauges("guardrail_verdict_cache"))
+        if self._bulkheads:
+            gauges.update(self._bulkheads.gauges())
+        if self._load_shedder is not None:
+            gauges.update(self._load_shedder.gauges())
+        return gauges
+
+    def record_tool_result(self, tool_name: str, success: bool, request_id: str | None = None) -> None:
+        """Report a finished tool call: feeds its circuit breaker and frees its concurrency slot.
 
-    def record_tool_result(self, tool_name: str, success: bool) -> None:
+        Without ``request_id`` no slot is freed here; ``clear_request`` frees it.
+        """
+        self._bulkheads.release(tool_name, request_id)
         if success:
             self._circuit_breakers.record_success(tool_name)
         else:
             self._circuit_breakers.record_failure(tool_name)
 
+    def reconcile_usage(self, ctx: RequestContext, usage: CostUsage) -> None:
+        """Charge one model call's actual usage against the user's budget."""
+        self._cost_budget.reconcile(ctx.request_id, ctx.user_id_hash, usage)
+
+    def release_tool_call(self, tool_name: str, request_id: str | None = None) -> None:
+        """Free the concurrency slot and any half-open probe of an admitted tool call that will not run."""
+        self._bulkheads.release(tool_name, request_id)
+        self._circuit_breakers.release(tool_name)
+
     def _emit(self, agent, ctx: RequestContext, event_name: str, result: GuardrailResult, **details) -> None:
         if self._logger and agent:
             self._logger.safety_event(
@@ -170,3 +681,43 @@ class GuardrailsEngine:
                 reason=result.reason,
                 **details,
             )
+
+    def _report_timings(self, pipeline: str, timings: List[StageTiming] | None) -> None:
+        if not timings or self._profiler is None:
+            return
+        for stage, elapsed_ms in timings:
+            try:
+                self._profiler(pipeline, stage, elapsed_ms)
+            except Exception:
+                # Profiling must never change a guardrail verdict.
+                pass
+
+
+def _parallel_groups(stages: Sequence[str]) -> List[Tuple[str, ...]]:
+    """Split stages into runs of parallelizable stages and single inline stages, keeping order."""
+    groups: List[Tuple[str, ...]] = []
+    run: List[str] = []
+    for stage in stages:
+        if stage in PARALLEL_STAGES:
+            run.append(stage)
+            continue
+        if run:
+            groups.append(tuple(run))
+            run = []
+        groups.append((stage,))
+    if run:
+        groups.append(tuple(run))
+    return groups
+
+
+def _group_by_text(items: Sequence[Tuple[RequestContext, str]], indices) -> Dict[str, List[int]]:
+    grouped: Dict[str, List[int]] = {}
+    for index in indices:
+        grouped.setdefault(items[index][1], []).append(index)
+    return grouped
+
+
+def _fill_passed(results: List[GuardrailResult | None], pending: Dict[str, List[int]]) -> None:
+    for indices in pending.values():
+        for index in indices:
+            results[index] = passed_result()
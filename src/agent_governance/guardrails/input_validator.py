@@ -4,6 +4,9 @@ from pathlib import Path
 from typing import Dict, List
 
 from ..models import GuardrailAction, GuardrailResult
+from .matcher import KeywordMatcher
+from .text_view import normalization_mode, normalize_text
+from .token_counter import TokenCounter, create_token_counter
 
 
 class InputValidator:
@@ -11,8 +14,11 @@ class InputValidator:
         cfg = config.get("input_validation", {})
         self.max_length = int(cfg.get("max_input_length", 10000))
         self.max_tokens = int(cfg.get("max_input_tokens", 4096))
+        self.token_counter: TokenCounter = create_token_counter(cfg.get("token_counter"))
         self.block_injection = bool(cfg.get("block_known_injection_patterns", True))
         self.patterns = self._load_patterns(cfg.get("injection_patterns_file"))
+        self.normalization = normalization_mode(config)
+        self._injection_matcher = KeywordMatcher(normalize_text(p, self.normalization) for p in self.patterns)
 
     @staticmethod
     def _load_patterns(path: object) -> List[str]:
@@ -27,7 +33,7 @@ class InputValidator:
                 rule_name="max_input_length",
                 reason="Input exceeds max length",
             )
-        if self._token_count(input_text) > self.max_tokens:
+        if self.token_counter.count(input_text, self.max_tokens) > self.max_tokens:
             return GuardrailResult(
                 action=GuardrailAction.BLOCK,
                 rule_name="max_input_tokens",
@@ -35,20 +41,18 @@ class InputValidator:
             )
         return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="input_length_ok", reason="OK")
 
-    def check_injection(self, input_text: str) -> GuardrailResult:
+    def check_injection(self, input_text: str, normalized: str | None = None) -> GuardrailResult:
+        """``normalized`` is ``input_text`` in the configured normalization, if the caller has it."""
         if not self.block_injection or not self.patterns:
             return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="injection_disabled", reason="OK")
-        lower = input_text.lower()
-        for pattern in self.patterns:
-            if pattern.lower() in lower:
-                return GuardrailResult(
-                    action=GuardrailAction.BLOCK,
-                    rule_name="injection_pattern",
-                    reason="Input matches injection pattern",
-                    details={"pattern": pattern},
-                )
+        index = self._injection_matcher.first_match(
+            normalize_text(input_text, self.normalization) if normalized is None else normalized
+        )
+        if index is not None:
+            return GuardrailResult(
+                action=GuardrailAction.BLOCK,
+                rule_name="injection_pattern",
+                reason="Input matches injection pattern",
+                details={"pattern": self.patterns[index]},
+            )
         return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="no_injection", reason="OK")
-
-    @staticmethod
-    def _token_count(text: str) -> int:
-        return len(text.split())
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional
+
+from ..exceptions import ConfigError
+from ..models import GuardrailAction, GuardrailResult
+from ..telemetry.metrics import LoadSample
+
+# Returns the current load, e.g. ``AgentMetricsTracker.load``.
+LoadSignal = Callable[[], LoadSample]
+
+DEFAULT_PRIORITY = "normal"
+# Overload factor above which each priority is shed; unlisted priorities never are.
+DEFAULT_SHED_FACTORS = {"low": 1.0, "normal": 1.5}
+DEFAULT_MIN_SAMPLES = 20
+
+
+class LoadShedder:
+    """Adaptive admission control from observed latency and concurrency.
+
+    The overload factor is the larger of recent p95 latency over
+    ``target_p95_latency_ms`` and requests in flight over ``max_in_flight``.
+    A request is shed when the factor exceeds the threshold of its priority in
+    ``priorities``, so low-priority traffic goes first and priorities missing
+    from the map are always admitted. Latency only counts once the signal has
+    ``min_samples`` recent requests.
+    """
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        cfg = config.get("load_shedding", {}) or {}
+        self.enabled = bool(cfg.get("enabled", False))
+        target = cfg.get("target_p95_latency_ms")
+        max_in_flight = cfg.get("max_in_flight")
+        self.target_p95_latency_ms = float(target) if target else None
+        self.max_in_flight = int(max_in_flight) if max_in_flight else None
+        if self.enabled and self.target_p95_latency_ms is None and self.max_in_flight is None:
+            raise ConfigError("load_shedding needs target_p95_latency_ms or max_in_flight")
+        self.min_samples = int(cfg.get("min_samples", DEFAULT_MIN_SAMPLES))
+        self.default_priority = str(cfg.get("default_priority", DEFAULT_PRIORITY))
+        priorities = cfg.get("priorities")
+        self.shed_factors: Dict[str, float] = {
+            str(name): float(factor) for name, factor in (DEFAULT_SHED_FACTORS if priorities is None else priorities).items()
+        }
+        self.shed_total: Dict[str, int] = {}
+
+    def overload(self, sample: LoadSample) -> float:
+        factor = 0.0
+        if self.target_p95_latency_ms and sample.samples >= self.min_samples:
+            factor = sample.p95_latency_ms / self.target_p95_latency_ms
+        if self.max_in_flight:
+            factor = max(factor, sample.in_flight / self.max_in_flight)
+        return factor
+
+    def check(self, priority: Optional[str], sample: LoadSample) -> Optional[GuardrailResult]:
+        """Return a BLOCK result if the request should be shed, else None."""
+        priority = priority or self.default_priority
+        threshold = self.shed_factors.get(priority)
+        if threshold is None:
+            return None
+        factor = self.overload(sample)
+        if factor <= threshold:
+            return None
+        self.shed_total[priority] = self.shed_total.get(priority, 0) + 1
+        return GuardrailResult(
+            action=GuardrailAction.BLOCK,
+            rule_name="load_shed",
+            reason=f"Shedding {priority}-priority traffic: load is {factor:.2f}x target",
+            details={
+                "priority": priority,
+                "overload_factor": round(factor, 3),
+                "p95_latency_ms": sample.p95_latency_ms,
+                "in_flight": sample.in_flight,
+            },
+        )
+
+    def gauges(self) -> Dict[str, Any]:
+        return {"guardrail_load_shed_total": dict(self.shed_total)}
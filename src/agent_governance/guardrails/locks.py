@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import threading
+from contextlib import ExitStack, contextmanager
+from typing import Iterator, List
+
+DEFAULT_STRIPES = 64
+
+
+class StripedLock:
+    """A fixed pool of locks, one picked per key by hash.
+
+    Updates to different keys rarely contend, and memory does not grow with
+    the number of keys. Critical sections never await, so the same locks guard
+    callers on the event loop and in executor threads.
+    """
+
+    def __init__(self, stripes: int = DEFAULT_STRIPES) -> None:
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(max(1, int(stripes)))]
+
+    def __call__(self, key: object) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
+
+    @contextmanager
+    def all(self) -> Iterator[None]:
+        """Hold every stripe, always taken in the same order, for whole-map sweeps."""
+        with ExitStack() as stack:
+            for lock in self._locks:
+                stack.enter_context(lock)
+            yield
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+# Below this many keywords a sequence of ``in`` checks (memchr-backed) beats
+# building and scanning an automaton.
+SEQUENTIAL_SCAN_THRESHOLD = 256
+
+_END = ""
+
+
+class KeywordMatcher:
+    """Finds the first of many literal keywords that occurs in a text.
+
+    Keywords are indexed by position; ``first_match`` returns the lowest index
+    whose keyword is a substring of the text, which is exactly what a loop of
+    ``keyword in text`` checks returns. Large keyword sets are compiled once into a
+    trie rendered as a single regular expression, so a scan reads the text once
+    no matter how many keywords there are. The trie is only walked in Python at
+    offsets where the regex reports that some keyword starts.
+
+    Matching is case-sensitive; callers lowercase both sides.
+    """
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        self._keywords: List[str] = list(keywords)
+        self._empty_index: Optional[int] = None
+        self._trie: Dict[str, Any] = {}
+        self._max_length = 0
+        self._regex: Optional[re.Pattern[str]] = None
+        if len(self._keywords) > SEQUENTIAL_SCAN_THRESHOLD:
+            self._compile()
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    @property
+    def keywords(self) -> List[str]:
+        return self._keywords
+
+    def first_match(self, text: str) -> Optional[int]:
+        if self._regex is None:
+            for index, keyword in enumerate(self._keywords):
+                if keyword in text:
+                    return index
+            return None
+
+        best = self._empty_index
+        if best == 0:
+            return best
+        search = self._regex.search
+        match = search(text)
+        while match is not None:
+            pos = match.start()
+            best = self._best_at(text, pos, best)
+            if best == 0:
+                break
+            match = search(text, pos + 1)
+        return best
+
+    def _best_at(self, text: str, pos: int, best: Optional[int]) -> Optional[int]:
+        node = self._trie
+        for i in range(pos, min(len(text), pos + self._max_length)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            index = node.get(_END)
+            if index is not None and (best is None or index < best):
+                best = index
+        return best
+
+    def _compile(self) -> None:
+        for index, keyword in enumerate(self._keywords):
+            if not keyword:
+                if self._empty_index is None:
+                    self._empty_index = index
+                continue
+            node = self._trie
+            for ch in keyword:
+                node = node.setdefault(ch, {})
+            node.setdefault(_END, index)
+            self._max_length = max(self._max_length, len(keyword))
+        if not self._trie:
+            self._regex = re.compile(r"(?!)")
+            return
+        try:
+            self._regex = re.compile(_render(self._trie))
+        except (RecursionError, re.error):
+            # Pathologically long keywords: fall back to sequential checks.
+            self._regex = None
+
+
+def _render(node: Dict[str, Any]) -> str:
+    # A terminal node already proves a keyword starts here, so the regex only
+    # needs the shortest keyword per branch; the trie walk recovers the rest.
+    if _END in node:
+        return ""
+    branches = [re.escape(ch) + _render(child) for ch, child in node.items()]
+    if len(branches) == 1:
+        return branches[0]
+    return "(?:" + "|".join(branches) + ")"
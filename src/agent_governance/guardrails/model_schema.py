@@ -1,49 +1,118 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any, Dict, Optional
 
 import yaml
 from jsonschema import Draft202012Validator
 
+from .schema_compiler import Check, compile_schema
+
+
+class CompiledSchema:
+    """A JSON Schema with a compiled pass/fail fast path.
+
+    ``errors`` runs the compiled check first and collects jsonschema's full error
+    list only for payloads that fail it. Schemas the compiler does not cover use
+    jsonschema for both steps.
+    """
+
+    def __init__(self, schema: Dict[str, Any]) -> None:
+        self.schema = schema
+        self.validator = Draft202012Validator(schema)
+        self.fast_check: Optional[Check] = compile_schema(schema)
+
+    def errors(self, payload: Any) -> list[str]:
+        if self.fast_check is not None:
+            try:
+                if self.fast_check(payload):
+                    return []
+            except Exception:
+                pass
+        return [e.message for e in self.validator.iter_errors(payload)]
+
+
+# Least recently used compiled schemas, so policies reloaded many times do not grow memory.
+MAX_COMPILED_SCHEMAS = 256
+_compiled_schemas: "OrderedDict[str, CompiledSchema]" = OrderedDict()
+_compiled_schemas_lock = threading.Lock()
+
+
+def schema_hash(schema: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(schema, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def compiled_schema(schema: Dict[str, Any]) -> CompiledSchema:
+    """Return the process-wide compiled form of ``schema``, shared by every engine.
+
+    The newest ``MAX_COMPILED_SCHEMAS`` schemas are kept; engines hold their own
+    references, so an evicted schema stays valid for them.
+    """
+    key = schema_hash(schema)
+    with _compiled_schemas_lock:
+        compiled = _compiled_schemas.get(key)
+        if compiled is not None:
+            _compiled_schemas.move_to_end(key)
+            return compiled
+        compiled = _compiled_schemas[key] = CompiledSchema(schema)
+        while len(_compiled_schemas) > MAX_COMPILED_SCHEMAS:
+            _compiled_schemas.popitem(last=False)
+        return compiled
+
 
 class ModelSchemaValidator:
-    """Validates input/output/tool params using JSON Schema loaded from YAML."""
+    """Validates input/output/tool params using JSON Schema loaded from YAML.
+
+    Compiled schemas are cached by content hash, so engines that load the same
+    schema share one compiled validator.
+    """
 
     def __init__(self, schema_path: str | Path | None = None, schema: Optional[Dict[str, Any]] = None) -> None:
         self._schema = schema or (self._load(schema_path) if schema_path else {})
         self._input_validator = self._make_validator(self._schema.get("input_schema"))
         self._output_validator = self._make_validator(self._schema.get("output_schema"))
-        self._tool_validators: Dict[str, Draft202012Validator] = {}
+        self._tool_validators: Dict[str, CompiledSchema] = {}
         tool_params = self._schema.get("tool_params", {}) or {}
         for tool_name, spec in tool_params.items():
             validator = self._make_validator(spec.get("schema") if isinstance(spec, dict) else spec)
             if validator:
                 self._tool_validators[tool_name] = validator
 
+    def __reduce__(self):
+        # Compiled jsonschema validators are not picklable; rebuild them from the schema.
+        return (type(self), (None, self._schema))
+
+    @property
+    def schema(self) -> Dict[str, Any]:
+        return self._schema
+
     @staticmethod
     def _load(path: str | Path) -> Dict[str, Any]:
         data = yaml.safe_load(Path(path).read_text())
         return data or {}
 
     @staticmethod
-    def _make_validator(schema: Optional[Dict[str, Any]]) -> Optional[Draft202012Validator]:
+    def _make_validator(schema: Optional[Dict[str, Any]]) -> Optional[CompiledSchema]:
         if not schema:
             return None
-        return Draft202012Validator(schema)
+        return compiled_schema(schema)
 
     def validate_input(self, payload: Any) -> list[str]:
         if not self._input_validator:
             return []
-        return [e.message for e in self._input_validator.iter_errors(payload)]
+        return self._input_validator.errors(payload)
 
     def validate_output(self, payload: Any) -> list[str]:
         if not self._output_validator:
             return []
-        return [e.message for e in self._output_validator.iter_errors(payload)]
+        return self._output_validator.errors(payload)
 
     def validate_tool_params(self, tool_name: str, payload: Any) -> list[str]:
         validator = self._tool_validators.get(tool_name)
         if not validator:
             return []
-        return [e.message for e in validator.iter_errors(payload)]
+        return validator.errors(payload)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .engine import GuardrailsEngine
+
+DEFAULT_INTERVAL_SECONDS = 5.0
+
+# Returns a freshly loaded guardrails config section.
+PolicyLoader = Callable[[], Dict[str, Any]]
+
+logger = logging.getLogger(__name__)
+
+
+def policy_paths(config: Dict[str, Any]) -> List[Path]:
+    """The files a guardrails config was compiled from."""
+    candidates = [
+        config.get("policy_file") or config.get("policy_path"),
+        (config.get("input_validation", {}) or {}).get("injection_patterns_file"),
+        config.get("model_schema_file") or config.get("model_schema_path"),
+    ]
+    return [Path(str(path)) for path in candidates if path]
+
+
+def _signature(paths: List[Path]) -> Tuple[Tuple[str, int, int], ...]:
+    signature = []
+    for path in paths:
+        try:
+            stat = path.stat()
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((str(path), -1, -1))
+    return tuple(signature)
+
+
+class PolicyWatcher:
+    """Rebuilds the guardrails engine in the background when its policy files change.
+
+    A daemon thread polls the mtime and size of ``policy_file``,
+    ``injection_patterns_file`` and ``model_schema_file`` every
+    ``interval_seconds``. On a change it reloads the config with ``loader`` and
+    compiles a replacement with ``GuardrailsEngine.reconfigure``, off the
+    request path. The new engine is then published with a single reference
+    assignment: requests already in flight finish on the engine they started
+    with. If the new policy fails to load or compile, the current engine stays
+    in place and the error is reported to ``on_error``.
+    """
+
+    def __init__(
+        self,
+        engine: GuardrailsEngine,
+        loader: PolicyLoader,
+        interval_seconds: float = DEFAULT_INTERVAL_SECONDS,
+        on_reload: Callable[[GuardrailsEngine], None] | None = None,
+        on_error: Callable[[Exception], None] | None = None,
+    ) -> None:
+        self._engine = engine
+        self._loader = loader
+        self.interval_seconds = float(interval_seconds)
+        self._on_reload = on_reload
+        self._on_error = on_error
+        self._paths = policy_paths(engine.config)
+        self._signature = _signature(self._paths)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reloads_total = 0
+        self.reload_errors_total = 0
+
+    @property
+    def engine(self) -> GuardrailsEngine:
+        return self._engine
+
+    @property
+    def paths(self) -> List[Path]:
+        return list(self._paths)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="guardrails-policy-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=self.interval_seconds + 1.0)
+
+    def check_now(self) -> bool:
+        """Poll once; return True if a new engine was swapped in."""
+        with self._lock:
+            signature = _signature(self._paths)
+            if signature == self._signature:
+                return False
+            try:
+                config = self._loader()
+                engine = self._engine.reconfigure(config)
+            except Exception as exc:
+                # Keep serving the last good policy; retry on the next change.
+                self._signature = signature
+                self.reload_errors_total += 1
+                if self._on_error is not None:
+                    self._on_error(exc)
+                else:
+                    logger.warning("Guardrails policy reload failed: %s", exc)
+                return False
+            previous, self._engine = self._engine, engine
+            self._paths = policy_paths(config)
+            # What was loaded is the state seen before the load; a write during it is picked up next poll.
+            self._signature = signature
+            self.reloads_total += 1
+        if self._on_reload is not None:
+            self._on_reload(engine)
+        previous.retire()
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.check_now()
+            except Exception:  # pragma: no cover - never let the watcher thread die
+                logger.exception("Guardrails policy watcher failed")
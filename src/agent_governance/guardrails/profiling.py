@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import bisect
+from typing import Any, Callable, Dict, List, Sequence
+
+# (pipeline, stage, elapsed_ms); pipeline is "input" or "output".
+StageProfiler = Callable[[str, str, float], None]
+
+DEFAULT_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 1000.0)
+
+
+class StageLatencyHistogram:
+    """Fixed-bucket latency histogram per guardrail stage.
+
+    Callable as a ``StageProfiler``; memory does not grow with traffic.
+    """
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS) -> None:
+        self.buckets_ms = tuple(sorted(buckets_ms))
+        self._counts: Dict[str, List[int]] = {}
+        self._sums: Dict[str, float] = {}
+        self._max: Dict[str, float] = {}
+
+    def __call__(self, pipeline: str, stage: str, elapsed_ms: float) -> None:
+        key = f"{pipeline}.{stage}"
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets_ms) + 1)
+            self._sums[key] = 0.0
+            self._max[key] = 0.0
+        counts[bisect.bisect_left(self.buckets_ms, elapsed_ms)] += 1
+        self._sums[key] += elapsed_ms
+        self._max[key] = max(self._max[key], elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        summary: Dict[str, Dict[str, Any]] = {}
+        for key, counts in self._counts.items():
+            total = sum(counts)
+            summary[key] = {
+                "count": total,
+                "mean_ms": round(self._sums[key] / total, 4) if total else 0.0,
+                "p50_ms": self._quantile(key, counts, total, 0.50),
+                "p95_ms": self._quantile(key, counts, total, 0.95),
+                "p99_ms": self._quantile(key, counts, total, 0.99),
+                "max_ms": round(self._max[key], 4),
+            }
+        return summary
+
+    def _quantile(self, key: str, counts: List[int], total: int, quantile: float) -> float:
+        """Upper bound of the bucket holding the quantile; the overflow bucket reports the max seen."""
+        if not total:
+            return 0.0
+        target = quantile * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= target and index < len(self.buckets_ms):
+                return self.buckets_ms[index]
+        return round(self._max[key], 4)
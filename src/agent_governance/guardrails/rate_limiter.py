@@ -1,31 +1,186 @@
 from __future__ import annotations
 
 import time
-from collections import defaultdict
-from typing import Dict
+from collections import deque
+from typing import Deque, Dict, List, Tuple
 
+from ..exceptions import ConfigError
 from ..models import GuardrailAction, GuardrailResult
+from .locks import StripedLock
+from .state_backend import StateBackend
+
+WINDOW_SECONDS = 60.0
+
+
+class SlidingLogAlgorithm:
+    """Exact sliding window: one timestamp per admitted call, O(limit) memory per key."""
+
+    def __init__(self, window_seconds: float = WINDOW_SECONDS) -> None:
+        self.window = window_seconds
+        self._logs: Dict[str, Deque[float]] = {}
+
+    def allow(self, key: str, limit: int, now: float) -> bool:
+        calls = self._logs.get(key)
+        if calls is None:
+            calls = self._logs[key] = deque()
+        window_start = now - self.window
+        while calls and calls[0] < window_start:
+            calls.popleft()
+        if len(calls) >= limit:
+            return False
+        calls.append(now)
+        return True
+
+    def refund(self, key: str, limit: int, now: float) -> None:
+        calls = self._logs.get(key)
+        if calls:
+            calls.pop()
+
+    def reap(self, now: float) -> int:
+        window_start = now - self.window
+        idle = [key for key, calls in self._logs.items() if not calls or calls[-1] < window_start]
+        for key in idle:
+            del self._logs[key]
+        return len(idle)
+
+    def __len__(self) -> int:
+        return len(self._logs)
+
+
+class SlidingWindowCounterAlgorithm:
+    """Approximate sliding window from the current and previous fixed-window counts.
+
+    State per key is ``[window_index, current_count, previous_count]``.
+    """
+
+    def __init__(self, window_seconds: float = WINDOW_SECONDS) -> None:
+        self.window = window_seconds
+        self._counters: Dict[str, List[float]] = {}
+
+    def allow(self, key: str, limit: int, now: float) -> bool:
+        index = int(now // self.window)
+        state = self._counters.get(key)
+        if state is None:
+            state = self._counters[key] = [index, 0, 0]
+        elif state[0] != index:
+            state[2] = state[1] if state[0] == index - 1 else 0
+            state[1] = 0
+            state[0] = index
+        elapsed = (now % self.window) / self.window
+        estimated = state[2] * (1.0 - elapsed) + state[1]
+        if estimated + 1 > limit:
+            return False
+        state[1] += 1
+        return True
+
+    def refund(self, key: str, limit: int, now: float) -> None:
+        state = self._counters.get(key)
+        if state is not None and state[0] == int(now // self.window) and state[1] > 0:
+            state[1] -= 1
+
+    def reap(self, now: float) -> int:
+        index = int(now // self.window)
+        idle = [key for key, state in self._counters.items() if state[0] < index - 1]
+        for key in idle:
+            del self._counters[key]
+        return len(idle)
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+
+class TokenBucketAlgorithm:
+    """Token bucket refilled at ``limit`` tokens per window; state is ``[tokens, updated_at]``."""
+
+    def __init__(self, window_seconds: float = WINDOW_SECONDS) -> None:
+        self.window = window_seconds
+        self._buckets: Dict[str, List[float]] = {}
+
+    def allow(self, key: str, limit: int, now: float) -> bool:
+        state = self._buckets.get(key)
+        if state is None:
+            state = self._buckets[key] = [float(limit), now]
+        else:
+            refill = (now - state[1]) * limit / self.window
+            state[0] = min(float(limit), state[0] + refill)
+            state[1] = now
+        if state[0] < 1.0:
+            return False
+        state[0] -= 1.0
+        return True
+
+    def refund(self, key: str, limit: int, now: float) -> None:
+        state = self._buckets.get(key)
+        if state is not None:
+            state[0] = min(float(limit), state[0] + 1.0)
+
+    def reap(self, now: float) -> int:
+        # After a full window without calls a bucket is full again, which is the
+        # same as having no state at all.
+        idle = [key for key, state in self._buckets.items() if now - state[1] >= self.window]
+        for key in idle:
+            del self._buckets[key]
+        return len(idle)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+RATE_LIMIT_ALGORITHMS = {
+    "sliding_log": SlidingLogAlgorithm,
+    "sliding_window": SlidingWindowCounterAlgorithm,
+    "token_bucket": TokenBucketAlgorithm,
+}
 
 
 class RateLimiter:
-    def __init__(self, config: Dict[str, object]) -> None:
+    """Per-user and global request limits.
+
+    Without a backend, state lives in this process. With a shared ``StateBackend``
+    the limiter uses sliding-window counters keyed by wall-clock window so all
+    replicas see the same counts, at one backend round trip per check whether it
+    is admitted or not: a hit is only counted once every limit admits it.
+
+    Local per-key state is guarded by striped locks, so checks from the event
+    loop and from executor threads never lose or double-count a hit.
+    """
+
+    def __init__(self, config: Dict[str, object], backend: StateBackend | None = None) -> None:
         cfg = config.get("rate_limiting", {})
         self.enabled = bool(cfg.get("enabled", True))
         self.user_limit = int(cfg.get("requests_per_minute_per_user", 30))
         self.global_limit = int(cfg.get("requests_per_minute_global", 500))
-        self._buckets = defaultdict(list)
+        self._backend = backend
+        default_algorithm = "sliding_window" if backend is not None else "sliding_log"
+        self.algorithm = str(cfg.get("algorithm", default_algorithm)).lower()
+        algorithm_cls = RATE_LIMIT_ALGORITHMS.get(self.algorithm)
+        if algorithm_cls is None:
+            raise ConfigError(f"Unsupported rate limiting algorithm: {self.algorithm}")
+        if backend is not None and self.algorithm != "sliding_window":
+            raise ConfigError("Shared rate limiting state only supports the sliding_window algorithm")
+        self._buckets = algorithm_cls()
+        self._locks = StripedLock()
+        self._reap_interval = float(cfg.get("reap_interval_seconds", WINDOW_SECONDS))
+        self._clock = time.monotonic
+        self._next_reap = self._clock() + self._reap_interval
+        self.reaped_keys_total = 0
 
     def check(self, user_key: str | None) -> GuardrailResult:
         if not self.enabled:
             return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="rate_limit_disabled", reason="OK")
+        if self._backend is not None:
+            return self._check_shared(user_key)
+        now = self._clock()
+        if now >= self._next_reap:
+            self.reap(now)
         if user_key:
-            if not self._allow(f"user:{user_key}", self.user_limit):
+            if not self._allow(f"user:{user_key}", self.user_limit, now):
                 return GuardrailResult(
                     action=GuardrailAction.BLOCK,
                     rule_name="rate_limit_user",
                     reason="User rate limit exceeded",
                 )
-        if not self._allow("global", self.global_limit):
+        if not self._allow("global", self.global_limit, now):
             return GuardrailResult(
                 action=GuardrailAction.BLOCK,
                 rule_name="rate_limit_global",
@@ -33,13 +188,65 @@ class RateLimiter:
             )
         return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="rate_limit_ok", reason="OK")
 
-    def _allow(self, key: str, max_calls: int) -> bool:
+    def refund(self, user_key: str | None) -> None:
+        """Give back the hit of an admitted check whose request was then rejected elsewhere."""
+        if not self.enabled:
+            return
+        if self._backend is not None:
+            index = int(time.time() // WINDOW_SECONDS)
+            keys = [self._backend.key("rl", name, index) for name, _ in self._limits(user_key)]
+            self._backend.incr_and_get([(key, -1) for key in keys], [], 2 * WINDOW_SECONDS)
+            return
+        now = self._clock()
+        for key, limit in self._limits(user_key):
+            with self._locks(key):
+                self._buckets.refund(key, limit, now)
+
+    def _limits(self, user_key: str | None) -> List[Tuple[str, int]]:
+        limits = [("global", self.global_limit)]
+        if user_key:
+            limits.insert(0, (f"user:{user_key}", self.user_limit))
+        return limits
+
+    def _allow(self, key: str, limit: int, now: float) -> bool:
+        with self._locks(key):
+            return self._buckets.allow(key, limit, now)
+
+    def _check_shared(self, user_key: str | None) -> GuardrailResult:
+        assert self._backend is not None
         now = time.time()
-        window_start = now - 60
-        calls = self._buckets[key]
-        while calls and calls[0] < window_start:
-            calls.pop(0)
-        if len(calls) >= max_calls:
-            return False
-        calls.append(now)
-        return True
+        index = int(now // WINDOW_SECONDS)
+        elapsed = (now % WINDOW_SECONDS) / WINDOW_SECONDS
+        limits = self._limits(user_key)
+        windows = [
+            (self._backend.key("rl", name, index), self._backend.key("rl", name, index - 1), limit)
+            for name, limit in limits
+        ]
+        # A rejected call must not consume quota: the hit is counted only if every limit admits it.
+        over = self._backend.add_within_limits(windows, 1, 1.0 - elapsed, 2 * WINDOW_SECONDS)
+        if over is None:
+            return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="rate_limit_ok", reason="OK")
+        if limits[over][0] == "global":
+            return GuardrailResult(
+                action=GuardrailAction.BLOCK,
+                rule_name="rate_limit_global",
+                reason="Global rate limit exceeded",
+            )
+        return GuardrailResult(
+            action=GuardrailAction.BLOCK,
+            rule_name="rate_limit_user",
+            reason="User rate limit exceeded",
+        )
+
+    def reap(self, now: float | None = None) -> int:
+        """Drop keys that have been idle long enough to be indistinguishable from new ones."""
+        now = self._clock() if now is None else now
+        self._next_reap = now + self._reap_interval
+        with self._locks.all():
+            reaped = self._buckets.reap(now)
+            self.reaped_keys_total += reaped
+        return reaped
+
+    @property
+    def tracked_keys(self) -> int:
+        return len(self._buckets)
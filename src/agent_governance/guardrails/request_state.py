@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+DEFAULT_MAX_REQUESTS = 10_000
+DEFAULT_TTL_SECONDS = 900.0
+
+
+class RequestStateStore(Generic[V]):
+    """Bounded per-request state with TTL expiry and LRU eviction.
+
+    Entries are kept in least-recently-used order, so expired entries are always
+    at the front and are purged on access in time proportional to their number.
+    Request state that is never explicitly released therefore ages out instead of
+    accumulating for the life of the process. The LRU order is one shared
+    structure, so every operation holds a single lock. ``on_discard`` is called
+    with the key and value of each entry dropped by expiry or eviction, after
+    the lock is released, so owners can undo what the entry stood for.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_REQUESTS,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        on_discard: Optional[Callable[[str, V], None]] = None,
+    ) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._entries: "OrderedDict[str, Tuple[float, V]]" = OrderedDict()
+        self._clock = time.monotonic
+        self._lock = threading.Lock()
+        self.on_discard = on_discard
+        self.evictions_total = 0
+        self.expirations_total = 0
+
+    def get_or_create(self, key: str, factory: Callable[[], V]) -> V:
+        dropped: List[Tuple[str, V]] = []
+        with self._lock:
+            now = self._clock()
+            self._purge_expired(now, dropped)
+            item = self._entries.get(key)
+            if item is None:
+                value = factory()
+                self._entries[key] = (now, value)
+                if len(self._entries) > self.max_entries:
+                    evicted, (_, evicted_value) = self._entries.popitem(last=False)
+                    dropped.append((evicted, evicted_value))
+                    self.evictions_total += 1
+            else:
+                value = item[1]
+                self._entries[key] = (now, value)
+                self._entries.move_to_end(key)
+        self._discard(dropped)
+        return value
+
+    def get(self, key: str) -> Optional[V]:
+        dropped: List[Tuple[str, V]] = []
+        with self._lock:
+            self._purge_expired(self._clock(), dropped)
+            item = self._entries.get(key)
+        self._discard(dropped)
+        return item[1] if item else None
+
+    def pop(self, key: str) -> Optional[V]:
+        with self._lock:
+            item = self._entries.pop(key, None)
+            return item[1] if item else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def gauges(self, prefix: str) -> Dict[str, Any]:
+        return {
+            f"{prefix}_size": len(self._entries),
+            f"{prefix}_evictions_total": self.evictions_total,
+            f"{prefix}_expirations_total": self.expirations_total,
+        }
+
+    def _purge_expired(self, now: float, dropped: List[Tuple[str, V]]) -> None:
+        cutoff = now - self.ttl_seconds
+        entries = self._entries
+        while entries:
+            key, (touched_at, value) = next(iter(entries.items()))
+            if touched_at > cutoff:
+                break
+            del entries[key]
+            dropped.append((key, value))
+            self.expirations_total += 1
+
+    def _discard(self, dropped: List[Tuple[str, V]]) -> None:
+        if self.on_discard is not None:
+            for key, value in dropped:
+                self.on_discard(key, value)
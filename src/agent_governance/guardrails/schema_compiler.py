@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import numbers
+import re
+from collections.abc import Mapping, Sequence
+from typing import Any, Callable, Dict, List, Optional
+
+# A compiled pass/fail check for one schema.
+Check = Callable[[Any], bool]
+
+# Keywords that never affect validity (format is annotation-only without a format checker).
+ANNOTATION_KEYWORDS = frozenset(
+    {
+        "$schema",
+        "$id",
+        "$comment",
+        "title",
+        "description",
+        "default",
+        "examples",
+        "deprecated",
+        "readOnly",
+        "writeOnly",
+        "format",
+        "contentMediaType",
+        "contentEncoding",
+    }
+)
+
+_TYPE_CHECKS: Dict[str, Check] = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "string": lambda value: isinstance(value, str),
+    "null": lambda value: value is None,
+    "boolean": lambda value: isinstance(value, bool),
+    "number": lambda value: isinstance(value, numbers.Number) and not isinstance(value, bool),
+    "integer": lambda value: (isinstance(value, int) and not isinstance(value, bool))
+    or (isinstance(value, float) and value.is_integer()),
+}
+
+
+class Unsupported(Exception):
+    """The schema uses a keyword the compiler does not implement."""
+
+
+def compile_schema(schema: Any) -> Optional[Check]:
+    """Compile a JSON Schema (draft 2020-12) into a pass/fail closure, or return None.
+
+    Covers the keywords used by typical tool and model schemas: type, enum,
+    const, properties, required, additionalProperties, items, the length, size
+    and range limits, pattern, and allOf/anyOf/oneOf/not. Any other keyword,
+    including $ref, makes the whole schema fall back to jsonschema, so a
+    compiled check never accepts a payload that jsonschema would reject.
+    """
+    try:
+        return _compile(schema)
+    except (Unsupported, re.error, TypeError):
+        return None
+
+
+def _compile(schema: Any) -> Check:
+    if schema is True:
+        return lambda value: True
+    if schema is False:
+        return lambda value: False
+    if not isinstance(schema, dict):
+        raise Unsupported(repr(schema))
+
+    checks: List[Check] = []
+    for keyword, spec in schema.items():
+        if keyword in ANNOTATION_KEYWORDS:
+            continue
+        builder = _KEYWORDS.get(keyword)
+        if builder is None:
+            raise Unsupported(keyword)
+        check = builder(spec, schema)
+        if check is not None:
+            checks.append(check)
+
+    if not checks:
+        return lambda value: True
+    if len(checks) == 1:
+        return checks[0]
+    return lambda value: all(check(value) for check in checks)
+
+
+def _type(spec: Any, schema: Dict[str, Any]) -> Check:
+    names = [spec] if isinstance(spec, str) else list(spec)
+    try:
+        type_checks = [_TYPE_CHECKS[name] for name in names]
+    except KeyError as exc:
+        raise Unsupported(f"type {exc}") from None
+    if len(type_checks) == 1:
+        return type_checks[0]
+    return lambda value: any(check(value) for check in type_checks)
+
+
+def _enum(spec: Any, schema: Dict[str, Any]) -> Check:
+    options = list(spec)
+    return lambda value: any(_equal(option, value) for option in options)
+
+
+def _const(spec: Any, schema: Dict[str, Any]) -> Check:
+    return lambda value: _equal(spec, value)
+
+
+def _properties(spec: Any, schema: Dict[str, Any]) -> Optional[Check]:
+    compiled = [(name, _compile(subschema)) for name, subschema in spec.items()]
+    if not compiled:
+        return None
+
+    def check(value: Any) -> bool:
+        if not isinstance(value, dict):
+            return True
+        for name, sub in compiled:
+            if name in value and not sub(value[name]):
+                return False
+        return True
+
+    return check
+
+
+def _required(spec: Any, schema: Dict[str, Any]) -> Optional[Check]:
+    names = list(spec)
+    if not names:
+        return None
+    return lambda value: not isinstance(value, dict) or all(name in value for name in names)
+
+
+def _additional_properties(spec: Any, schema: Dict[str, Any]) -> Check:
+    known = frozenset(schema.get("properties", {}) or {})
+    if spec is False:
+        return lambda value: not isinstance(value, dict) or all(key in known for key in value)
+    sub = _compile(spec)
+
+    def check(value: Any) -> bool:
+        if not isinstance(value, dict):
+            return True
+        return all(sub(item) for key, item in value.items() if key not in known)
+
+    return check
+
+
+def _items(spec: Any, schema: Dict[str, Any]) -> Check:
+    sub = _compile(spec)
+    return lambda value: not isinstance(value, list) or all(sub(item) for item in value)
+
+
+def _bound(kind: str, compare: Callable[[Any, Any], bool]) -> Callable[[Any, Dict[str, Any]], Check]:
+    """Build a limit keyword that applies only to instances of ``kind``."""
+    applies = _TYPE_CHECKS[kind]
+
+    def builder(spec: Any, schema: Dict[str, Any]) -> Check:
+        if isinstance(spec, bool) or not isinstance(spec, numbers.Number):
+            raise Unsupported(repr(spec))
+        return lambda value: not applies(value) or compare(value, spec)
+
+    return builder
+
+
+def _pattern(spec: Any, schema: Dict[str, Any]) -> Check:
+    search = re.compile(spec).search
+    return lambda value: not isinstance(value, str) or search(value) is not None
+
+
+def _all_of(spec: Any, schema: Dict[str, Any]) -> Check:
+    subs = [_compile(sub) for sub in spec]
+    return lambda value: all(sub(value) for sub in subs)
+
+
+def _any_of(spec: Any, schema: Dict[str, Any]) -> Check:
+    subs = [_compile(sub) for sub in spec]
+    return lambda value: any(sub(value) for sub in subs)
+
+
+def _one_of(spec: Any, schema: Dict[str, Any]) -> Check:
+    subs = [_compile(sub) for sub in spec]
+    return lambda value: sum(1 for sub in subs if sub(value)) == 1
+
+
+def _not(spec: Any, schema: Dict[str, Any]) -> Check:
+    sub = _compile(spec)
+    return lambda value: not sub(value)
+
+
+_KEYWORDS: Dict[str, Callable[[Any, Dict[str, Any]], Optional[Check]]] = {
+    "type": _type,
+    "enum": _enum,
+    "const": _const,
+    "properties": _properties,
+    "required": _required,
+    "additionalProperties": _additional_properties,
+    "items": _items,
+    "minLength": _bound("string", lambda value, limit: len(value) >= limit),
+    "maxLength": _bound("string", lambda value, limit: len(value) <= limit),
+    "minItems": _bound("array", lambda value, limit: len(value) >= limit),
+    "maxItems": _bound("array", lambda value, limit: len(value) <= limit),
+    "minProperties": _bound("object", lambda value, limit: len(value) >= limit),
+    "maxProperties": _bound("object", lambda value, limit: len(value) <= limit),
+    "minimum": _bound("number", lambda value, limit: value >= limit),
+    "maximum": _bound("number", lambda value, limit: value <= limit),
+    "exclusiveMinimum": _bound("number", lambda value, limit: value > limit),
+    "exclusiveMaximum": _bound("number", lambda value, limit: value < limit),
+    "pattern": _pattern,
+    "allOf": _all_of,
+    "anyOf": _any_of,
+    "oneOf": _one_of,
+    "not": _not,
+}
+
+
+def _equal(one: Any, two: Any) -> bool:
+    """JSON Schema equality: ``True`` is not ``1``, recursing into arrays and objects."""
+    if one is two:
+        return True
+    if isinstance(one, str) or isinstance(two, str):
+        return one == two
+    if isinstance(one, Sequence) and isinstance(two, Sequence):
+        return len(one) == len(two) and all(_equal(a, b) for a, b in zip(one, two))
+    if isinstance(one, Mapping) and isinstance(two, Mapping):
+        return one.keys() == two.keys() and all(_equal(one[key], two[key]) for key in one)
+    if isinstance(one, bool) or isinstance(two, bool):
+        return isinstance(one, bool) and isinstance(two, bool) and one == two
+    return one == two
@@ -0,0 +1,421 @@
+from __future__ import annotations
+
+import select
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from ..exceptions import ConfigError, GuardrailError
+
+DEFAULT_KEY_PREFIX = "agent_governance:"
+
+# Sliding-window admission for RedisStateBackend.add_within_limits. KEYS are the
+# current window keys, then the previous ones; ARGV is amount, previous weight,
+# TTL in ms, then one limit per window. Returns the 0-based window over its
+# limit, or -1 once every current key has been incremented.
+_ADD_WITHIN_LIMITS_SCRIPT = """
+local n = #KEYS / 2
+local amount = tonumber(ARGV[1])
+local weight = tonumber(ARGV[2])
+for i = 1, n do
+  local current = tonumber(redis.call('GET', KEYS[i]) or '0')
+  local previous = tonumber(redis.call('GET', KEYS[n + i]) or '0')
+  if previous * weight + current + amount > tonumber(ARGV[3 + i]) then
+    return i - 1
+  end
+end
+for i = 1, n do
+  redis.call('INCRBY', KEYS[i], amount)
+  redis.call('PEXPIRE', KEYS[i], ARGV[3])
+end
+return -1
+"""
+
+# Commands that leave the same state when run twice, so a batch of only these can be re-sent.
+_IDEMPOTENT_COMMANDS = frozenset({"GET", "SET", "DEL", "PEXPIRE", "AUTH", "SELECT"})
+
+
+class StateBackend(ABC):
+    """Expiring integer counters shared by rate limiters and circuit breakers.
+
+    ``incr_and_get`` and ``add_within_limits`` are the calls on a guardrail
+    check's hot path and must each complete in a single round trip to the
+    store. Every increment refreshes the key's TTL.
+    """
+
+    def __init__(self, key_prefix: str = DEFAULT_KEY_PREFIX) -> None:
+        self.key_prefix = key_prefix
+
+    @abstractmethod
+    def incr_and_get(
+        self,
+        increments: Sequence[Tuple[str, int]],
+        reads: Sequence[str],
+        ttl_seconds: float,
+    ) -> Tuple[List[int], List[Optional[int]]]:
+        """Apply ``increments`` and read ``reads`` in one batch; return new and read values."""
+
+    @abstractmethod
+    def set(self, key: str, value: int, ttl_seconds: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, *keys: str) -> None:
+        ...
+
+    def add_within_limits(
+        self,
+        windows: Sequence[Tuple[str, str, float]],
+        amount: int,
+        previous_weight: float,
+        ttl_seconds: float,
+    ) -> Optional[int]:
+        """Add ``amount`` to each window's current key unless one would go over its limit.
+
+        ``windows`` are ``(current_key, previous_key, limit)``, and a window is
+        over when ``previous * previous_weight + current + amount > limit``.
+        Returns the position of the first window over its limit, with nothing
+        written, or ``None`` once every current key has been incremented. The
+        built-in backends do this atomically in one round trip; this fallback
+        for other backends undoes a rejected add with a second one.
+        """
+        counts, previous = self.incr_and_get(
+            [(current, amount) for current, _, _ in windows], [key for _, key, _ in windows], ttl_seconds
+        )
+        for position, (_, _, limit) in enumerate(windows):
+            if (previous[position] or 0) * previous_weight + counts[position] > limit:
+                self.incr_and_get([(current, -amount) for current, _, _ in windows], [], ttl_seconds)
+                return position
+        return None
+
+    def incr(self, key: str, amount: int, ttl_seconds: float) -> int:
+        return self.incr_and_get([(key, amount)], [], ttl_seconds)[0][0]
+
+    def get(self, key: str) -> Optional[int]:
+        return self.incr_and_get([], [key], 0)[1][0]
+
+    def key(self, *parts: object) -> str:
+        return self.key_prefix + ":".join(str(part) for part in parts)
+
+    def close(self) -> None:
+        return None
+
+
+class MemoryStateBackend(StateBackend):
+    """Process-local backend; state is shared by every engine holding the same instance."""
+
+    def __init__(self, key_prefix: str = DEFAULT_KEY_PREFIX) -> None:
+        super().__init__(key_prefix)
+        self._values: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self._clock = time.monotonic
+
+    def incr_and_get(self, increments, reads, ttl_seconds):
+        with self._lock:
+            now = self._clock()
+            new_values = []
+            for key, amount in increments:
+                current = self._live(key, now) or 0
+                self._values[key] = (current + amount, now + ttl_seconds)
+                new_values.append(current + amount)
+            return new_values, [self._live(key, now) for key in reads]
+
+    def add_within_limits(self, windows, amount, previous_weight, ttl_seconds):
+        with self._lock:
+            now = self._clock()
+            for position, (current, previous, limit) in enumerate(windows):
+                used = (self._live(previous, now) or 0) * previous_weight + (self._live(current, now) or 0)
+                if used + amount > limit:
+                    return position
+            for current, _, _ in windows:
+                self._values[current] = ((self._live(current, now) or 0) + amount, now + ttl_seconds)
+            return None
+
+    def set(self, key: str, value: int, ttl_seconds: float) -> None:
+        with self._lock:
+            self._values[key] = (value, self._clock() + ttl_seconds)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+
+    def _live(self, key: str, now: float) -> Optional[int]:
+        item = self._values.get(key)
+        if item is None:
+            return None
+        if item[1] <= now:
+            del self._values[key]
+            return None
+        return item[0]
+
+
+class SQLiteStateBackend(StateBackend):
+    """File-backed backend for several worker processes on one host."""
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS governance_counters ("
+        "key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL)"
+    )
+
+    def __init__(self, path: str, key_prefix: str = DEFAULT_KEY_PREFIX, purge_every: int = 1000) -> None:
+        super().__init__(key_prefix)
+        self.path = path
+        self._local = threading.local()
+        self._purge_every = purge_every
+        self._ops = 0
+        self._connect().execute(self._SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def incr_and_get(self, increments, reads, ttl_seconds):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            new_values = []
+            for key, amount in increments:
+                self._add(conn, key, amount, now, ttl_seconds)
+                new_values.append(self._select(conn, key, now) or 0)
+            read_values = [self._select(conn, key, now) for key in reads]
+            self._ops += 1
+            if self._ops % self._purge_every == 0:
+                conn.execute("DELETE FROM governance_counters WHERE expires_at <= ?", (now,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return new_values, read_values
+
+    def add_within_limits(self, windows, amount, previous_weight, ttl_seconds):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            over = None
+            for position, (current, previous, limit) in enumerate(windows):
+                used = (self._select(conn, previous, now) or 0) * previous_weight + (self._select(conn, current, now) or 0)
+                if used + amount > limit:
+                    over = position
+                    break
+            else:
+                for current, _, _ in windows:
+                    self._add(conn, current, amount, now, ttl_seconds)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return over
+
+    def set(self, key: str, value: int, ttl_seconds: float) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO governance_counters (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, time.time() + ttl_seconds),
+        )
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            placeholders = ",".join("?" for _ in keys)
+            self._connect().execute(f"DELETE FROM governance_counters WHERE key IN ({placeholders})", keys)
+
+    @staticmethod
+    def _add(conn: sqlite3.Connection, key: str, amount: int, now: float, ttl_seconds: float) -> None:
+        conn.execute(
+            "INSERT INTO governance_counters (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "value = CASE WHEN expires_at <= ? THEN excluded.value ELSE value + excluded.value END, "
+            "expires_at = excluded.expires_at",
+            (key, amount, now + ttl_seconds, now),
+        )
+
+    @staticmethod
+    def _select(conn: sqlite3.Connection, key: str, now: float) -> Optional[int]:
+        row = conn.execute(
+            "SELECT value FROM governance_counters WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return int(row[0]) if row else None
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RedisStateBackend(StateBackend):
+    """Backend for any server speaking the Redis protocol (RESP2).
+
+    Uses a minimal built-in client so no Redis package is required; each batch is
+    written as one pipeline and costs a single round trip. A connection the
+    server has closed is replaced before anything is written to it. If the
+    connection fails after a batch was written, the batch is re-sent only when
+    all of its commands are idempotent; otherwise the error is raised, since
+    the server may already have applied an ``INCRBY``.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        key_prefix: str = DEFAULT_KEY_PREFIX,
+        timeout_seconds: float = 1.0,
+    ) -> None:
+        super().__init__(key_prefix)
+        parsed = urlparse(url)
+        if parsed.scheme not in {"redis", ""}:
+            raise ConfigError(f"Unsupported Redis URL scheme: {parsed.scheme}")
+        self._host = parsed.hostname or "localhost"
+        self._port = parsed.port or 6379
+        self._password = parsed.password
+        self._db = int((parsed.path or "/0").lstrip("/") or 0)
+        self._timeout = timeout_seconds
+        self._sock: Optional[socket.socket] = None
+        self._reader: Any = None
+        self._lock = threading.Lock()
+
+    def incr_and_get(self, increments, reads, ttl_seconds):
+        ttl_ms = str(max(1, int(ttl_seconds * 1000)))
+        commands: List[Tuple[str, ...]] = []
+        for key, amount in increments:
+            commands.append(("INCRBY", key, str(amount)))
+            commands.append(("PEXPIRE", key, ttl_ms))
+        commands.extend(("GET", key) for key in reads)
+        replies = self.pipeline(commands)
+        new_values = [int(replies[i * 2]) for i in range(len(increments))]
+        read_values = [None if reply is None else int(reply) for reply in replies[len(increments) * 2 :]]
+        return new_values, read_values
+
+    def add_within_limits(self, windows, amount, previous_weight, ttl_seconds):
+        keys = [current for current, _, _ in windows] + [previous for _, previous, _ in windows]
+        args = [str(amount), repr(float(previous_weight)), str(max(1, int(ttl_seconds * 1000)))]
+        args += [repr(float(limit)) for _, _, limit in windows]
+        (over,) = self.pipeline([("EVAL", _ADD_WITHIN_LIMITS_SCRIPT, str(len(keys)), *keys, *args)])
+        return None if over < 0 else over
+
+    def set(self, key: str, value: int, ttl_seconds: float) -> None:
+        self.pipeline([("SET", key, str(value), "PX", str(max(1, int(ttl_seconds * 1000))))])
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.pipeline([("DEL", *keys)])
+
+    def pipeline(self, commands: Sequence[Tuple[str, ...]]) -> List[Any]:
+        if not commands:
+            return []
+        with self._lock:
+            try:
+                self._connect()
+            except OSError:
+                # Nothing was written yet: one reconnect attempt.
+                self.close()
+                self._connect()
+            try:
+                return self._send(commands)
+            except OSError:
+                self.close()
+                if not all(command[0] in _IDEMPOTENT_COMMANDS for command in commands):
+                    raise
+                self._connect()
+                return self._send(commands)
+
+    def _connect(self) -> None:
+        if self._sock is not None and self._stale():
+            self.close()
+        if self._sock is None:
+            self._open()
+
+    def _stale(self) -> bool:
+        # An idle connection has nothing to read: readable means the server closed
+        # it, or sent bytes no command asked for.
+        readable, _, _ = select.select([self._sock], [], [], 0)
+        return bool(readable)
+
+    def _send(self, commands: Sequence[Tuple[str, ...]]) -> List[Any]:
+        assert self._sock is not None
+        self._sock.sendall(b"".join(_encode_command(command) for command in commands))
+        replies = [self._read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, GuardrailError):
+                raise reply
+        return replies
+
+    def _open(self) -> None:
+        self._sock = socket.create_connection((self._host, self._port), timeout=self._timeout)
+        self._reader = self._sock.makefile("rb")
+        setup: List[Tuple[str, ...]] = []
+        if self._password:
+            setup.append(("AUTH", self._password))
+        if self._db:
+            setup.append(("SELECT", str(self._db)))
+        if setup:
+            self._send(setup)
+
+    def _read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode()
+        if prefix == b"-":
+            return GuardrailError(f"Redis error: {payload.decode()}")
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2].decode()
+        if prefix == b"*":
+            count = int(payload)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise GuardrailError(f"Unexpected Redis reply: {line!r}")
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+                self._reader = None
+
+
+def _encode_command(command: Sequence[str]) -> bytes:
+    parts = [f"*{len(command)}\r\n".encode()]
+    for arg in command:
+        data = arg.encode()
+        parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+    return b"".join(parts)
+
+
+def create_state_backend(config: Dict[str, Any] | None) -> Optional[StateBackend]:
+    """Build the backend described by ``guardrails.state_backend``; ``None`` keeps per-engine state."""
+    if not config:
+        return None
+    backend_type = str(config.get("type", "memory")).lower()
+    prefix = str(config.get("key_prefix", DEFAULT_KEY_PREFIX))
+    if backend_type == "memory":
+        return MemoryStateBackend(key_prefix=prefix)
+    if backend_type == "sqlite":
+        path = config.get("path")
+        if not path:
+            raise ConfigError("guardrails.state_backend.path is required for the sqlite backend")
+        return SQLiteStateBackend(str(path), key_prefix=prefix)
+    if backend_type == "redis":
+        return RedisStateBackend(
+            url=str(config.get("url", "redis://localhost:6379/0")),
+            key_prefix=prefix,
+            timeout_seconds=float(config.get("timeout_seconds", 1.0)),
+        )
+    raise ConfigError(f"Unsupported guardrails state backend: {backend_type}")
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from typing import Callable, List, Optional, Sequence
+
+from ..models import GuardrailAction, GuardrailResult
+from .text_checks import CONTENT, LENGTH, OUTPUT, SCHEMA, TextChecks, Verdict, error_result, passed_result
+from .text_view import normalize_text
+
+# Called with (event name, result) when the stream is blocked.
+BlockListener = Callable[[str, GuardrailResult], None]
+
+
+class StreamingOutputCheck:
+    """Incremental output guardrails for a response that arrives in chunks.
+
+    ``feed`` applies the length and content stages to each chunk as it arrives.
+    The normalized tail of the previous chunks is carried over, so a keyword
+    split across chunk boundaries is still found. ``finish`` runs the output
+    schema, the one stage that needs the complete text. The text is buffered
+    only when an output schema is configured.
+
+    Once a check blocks, the stream stays blocked and later calls return the
+    same result. Internal errors fail closed.
+    """
+
+    def __init__(self, checks: TextChecks, stages: Sequence[str], on_block: BlockListener | None = None) -> None:
+        self._checks = checks
+        self._on_block = on_block
+        self._check_length = LENGTH in stages
+        content_filter = checks.content_filter
+        self._check_content = CONTENT in stages and content_filter.active
+        self._check_schema = SCHEMA in stages and checks.schema_validator is not None
+        self._max_length = checks.output_validator.max_length
+        self._window = max(0, content_filter.max_keyword_length - 1) if self._check_content else 0
+        self._stage_order = [stage for stage in stages if stage in (LENGTH, CONTENT)]
+        self._length = 0
+        self._tail = ""
+        self._parts: List[str] = []
+        self._blocked: Optional[GuardrailResult] = None
+
+    @property
+    def holdback_chars(self) -> int:
+        """Characters a caller should withhold so that no part of a blocked keyword is released."""
+        return self._window
+
+    @property
+    def length(self) -> int:
+        return self._length
+
+    @property
+    def blocked(self) -> Optional[GuardrailResult]:
+        return self._blocked
+
+    def feed(self, chunk: str) -> GuardrailResult:
+        if self._blocked is not None:
+            return self._blocked
+        try:
+            self._length += len(chunk)
+            if self._check_schema:
+                self._parts.append(chunk)
+            window = ""
+            if self._check_content:
+                window = self._tail + normalize_text(chunk, self._checks.content_filter.normalization)
+                self._tail = window[-self._window :] if self._window else ""
+            for stage in self._stage_order:
+                verdict = self._length_verdict() if stage == LENGTH else self._content_verdict(window)
+                if verdict is not None:
+                    return self._block(verdict)
+        except Exception:
+            return self._block((None, error_result()))
+        return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="output_chunk_ok", reason="OK")
+
+    def finish(self) -> GuardrailResult:
+        if self._blocked is not None:
+            return self._blocked
+        try:
+            if self._check_schema:
+                verdict = self._checks.run(OUTPUT, (SCHEMA,), "".join(self._parts))
+                if verdict is not None:
+                    return self._block(verdict)
+        except Exception:
+            return self._block((None, error_result()))
+        finally:
+            self._parts = []
+        return passed_result()
+
+    def _length_verdict(self) -> Optional[Verdict]:
+        if not self._check_length or self._length <= self._max_length:
+            return None
+        result = GuardrailResult(
+            action=GuardrailAction.BLOCK,
+            rule_name="max_output_length",
+            reason="Output exceeds max length",
+        )
+        return "output_filtered", result
+
+    def _content_verdict(self, window: str) -> Optional[Verdict]:
+        if not window:
+            return None
+        result = self._checks.content_filter.check(window, window)
+        return ("output_filtered", result) if result.action == GuardrailAction.BLOCK else None
+
+    def _block(self, verdict: Verdict) -> GuardrailResult:
+        event_name, result = verdict
+        self._blocked = result
+        self._parts = []
+        if event_name and self._on_block is not None:
+            self._on_block(event_name, result)
+        return result
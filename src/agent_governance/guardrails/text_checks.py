@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..exceptions import ConfigError
+from ..models import GuardrailAction, GuardrailResult
+from .content_filter import ContentFilter
+from .input_validator import InputValidator
+from .model_schema import ModelSchemaValidator
+from .output_validator import OutputValidator
+from .text_view import TextView
+
+# (safety event name or None, result). A ``None`` event means nothing is emitted.
+Verdict = Tuple[Optional[str], GuardrailResult]
+# (stage name, elapsed ms)
+StageTiming = Tuple[str, float]
+
+INPUT = "input"
+OUTPUT = "output"
+
+RATE_LIMIT = "rate_limit"
+LENGTH = "length"
+INJECTION = "injection"
+SCHEMA = "schema"
+CONTENT = "content"
+
+# Cheapest first, from measured per-stage cost on 0.2-10k character inputs.
+DEFAULT_INPUT_STAGES = (RATE_LIMIT, LENGTH, SCHEMA, CONTENT, INJECTION)
+DEFAULT_OUTPUT_STAGES = (LENGTH, SCHEMA, CONTENT)
+
+# Independent CPU-bound stages that may run concurrently on large inputs. Length
+# stays inline so oversized payloads are rejected before being shipped to workers.
+PARALLEL_STAGES = frozenset({INJECTION, SCHEMA, CONTENT})
+
+INPUT_STAGE_NAMES = frozenset(DEFAULT_INPUT_STAGES)
+OUTPUT_STAGE_NAMES = frozenset(DEFAULT_OUTPUT_STAGES)
+
+
+def stage_order(configured: Any, default: Sequence[str], known: frozenset, pipeline: str) -> Tuple[str, ...]:
+    """Validate a configured stage list; stages left out of it are not run."""
+    if configured is None:
+        return tuple(default)
+    stages = tuple(str(name).lower() for name in configured)
+    unknown = [name for name in stages if name not in known]
+    if unknown:
+        raise ConfigError(f"Unknown guardrail {pipeline} stages: {', '.join(unknown)}")
+    if len(set(stages)) != len(stages):
+        raise ConfigError(f"Duplicate guardrail {pipeline} stages: {list(stages)}")
+    return stages
+
+
+class TextChecks:
+    """The stateless, CPU-bound guardrail stages for input and output text.
+
+    Holds no per-request state, so one instance can be shared by threads or
+    pickled to worker processes for batch checks. Stages receive a ``TextView``
+    so derived forms such as the normalized text are computed once per check.
+    """
+
+    def __init__(
+        self,
+        input_validator: InputValidator,
+        output_validator: OutputValidator,
+        content_filter: ContentFilter,
+        schema_validator: ModelSchemaValidator | None = None,
+    ) -> None:
+        self.input_validator = input_validator
+        self.output_validator = output_validator
+        self.content_filter = content_filter
+        self.schema_validator = schema_validator
+        self.normalization = content_filter.normalization
+        self._handlers: Dict[str, Dict[str, Callable[[TextView], Optional[Verdict]]]] = {
+            INPUT: {
+                LENGTH: self._input_length,
+                INJECTION: self._injection,
+                SCHEMA: self._input_schema,
+                CONTENT: self._input_content,
+            },
+            OUTPUT: {
+                LENGTH: self._output_length,
+                SCHEMA: self._output_schema,
+                CONTENT: self._output_content,
+            },
+        }
+
+    def run(
+        self,
+        pipeline: str,
+        stages: Sequence[str],
+        text: str | TextView,
+        timings: List[StageTiming] | None = None,
+    ) -> Optional[Verdict]:
+        """Run ``stages`` in order; return the first blocking verdict or ``None`` if all pass."""
+        view = text if isinstance(text, TextView) else self.view(text)
+        handlers = self._handlers[pipeline]
+        for name in stages:
+            start = time.perf_counter() if timings is not None else 0.0
+            verdict = handlers[name](view)
+            if timings is not None:
+                timings.append((name, (time.perf_counter() - start) * 1000.0))
+            if verdict is not None:
+                return verdict
+        return None
+
+    def view(self, text: str) -> TextView:
+        return TextView(text, self.normalization)
+
+    def _input_length(self, view: TextView) -> Optional[Verdict]:
+        result = self.input_validator.validate(view.text)
+        return ("input_rejected", result) if result.action == GuardrailAction.BLOCK else None
+
+    def _injection(self, view: TextView) -> Optional[Verdict]:
+        result = self.input_validator.check_injection(view.text, view.normalized)
+        return ("injection_detected", result) if result.action == GuardrailAction.BLOCK else None
+
+    def _input_schema(self, view: TextView) -> Optional[Verdict]:
+        if not self.schema_validator:
+            return None
+        errors = self.schema_validator.validate_input({"text": view.text})
+        if not errors:
+            return None
+        return "schema_validation", GuardrailResult(
+            action=GuardrailAction.BLOCK,
+            rule_name="input_schema",
+            reason="Input schema validation failed",
+            details={"errors": errors},
+        )
+
+    def _input_content(self, view: TextView) -> Optional[Verdict]:
+        result = self.content_filter.check(view.text, view.normalized)
+        return ("content_filtered", result) if result.action == GuardrailAction.BLOCK else None
+
+    def _output_length(self, view: TextView) -> Optional[Verdict]:
+        result = self.output_validator.validate_length(view.text)
+        return ("output_filtered", result) if result.action == GuardrailAction.BLOCK else None
+
+    def _output_schema(self, view: TextView) -> Optional[Verdict]:
+        if not self.schema_validator:
+            return None
+        errors = self.schema_validator.validate_output({"text": view.text})
+        if not errors:
+            return None
+        return "schema_validation", GuardrailResult(
+            action=GuardrailAction.BLOCK,
+            rule_name="output_schema",
+            reason="Output schema validation failed",
+            details={"errors": errors},
+        )
+
+    def _output_content(self, view: TextView) -> Optional[Verdict]:
+        result = self.content_filter.check(view.text, view.normalized)
+        return ("output_filtered", result) if result.action == GuardrailAction.BLOCK else None
+
+
+def run_text_checks(
+    checks: TextChecks,
+    pipeline: str,
+    stages: Sequence[str],
+    texts: Sequence[str],
+    profile: bool = False,
+) -> Tuple[List[Optional[Verdict]], List[StageTiming]]:
+    """Check each text, failing closed per item. Module-level so process pools can pickle it.
+
+    Timings are returned rather than reported so they survive a process boundary.
+    """
+    verdicts: List[Optional[Verdict]] = []
+    timings: List[StageTiming] | None = [] if profile else None
+    for text in texts:
+        try:
+            verdicts.append(checks.run(pipeline, stages, text, timings=timings))
+        except Exception:
+            verdicts.append((None, error_result()))
+    return verdicts, timings or []
+
+
+def run_stage(checks: TextChecks, pipeline: str, stage: str, text: str) -> Tuple[Optional[Verdict], float]:
+    """Run one stage; return its verdict and elapsed ms. Used for parallel stage execution."""
+    start = time.perf_counter()
+    verdict = checks.run(pipeline, (stage,), text)
+    return verdict, (time.perf_counter() - start) * 1000.0
+
+
+_worker_checks: TextChecks | None = None
+
+
+def init_stage_worker(checks: TextChecks) -> None:
+    """Process pool initializer: unpickle the checks once per worker, not once per call."""
+    global _worker_checks
+    _worker_checks = checks
+
+
+def run_worker_stage(pipeline: str, stage: str, text: str) -> Tuple[Optional[Verdict], float]:
+    assert _worker_checks is not None, "init_stage_worker was not run in this process"
+    return run_stage(_worker_checks, pipeline, stage, text)
+
+
+def passed_result() -> GuardrailResult:
+    return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="all_passed", reason="OK")
+
+
+def error_result() -> GuardrailResult:
+    return GuardrailResult(action=GuardrailAction.BLOCK, rule_name="guardrail_error", reason="Error")
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import unicodedata
+from typing import Any, Dict, Optional
+
+from ..exceptions import ConfigError
+
+LOWER = "lower"
+CASEFOLD = "casefold"
+NFKC_CASEFOLD = "nfkc_casefold"
+NORMALIZATIONS = (LOWER, CASEFOLD, NFKC_CASEFOLD)
+
+
+def normalization_mode(config: Dict[str, Any]) -> str:
+    """Read ``guardrails.normalization``: the form keywords and texts are matched in."""
+    mode = str(config.get("normalization", LOWER) or LOWER).lower()
+    if mode not in NORMALIZATIONS:
+        raise ConfigError(f"Unsupported guardrail normalization: {mode} (expected one of {', '.join(NORMALIZATIONS)})")
+    return mode
+
+
+def normalize_text(text: str, mode: str = LOWER) -> str:
+    if mode == LOWER:
+        return text.lower()
+    if mode == CASEFOLD:
+        return text.casefold()
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+class TextView:
+    """One text and its derived forms, computed lazily and at most once.
+
+    A view is created per check and shared by every stage, so an accepted text
+    is normalized once, and a text rejected by the length stage is never copied.
+    """
+
+    __slots__ = ("text", "mode", "_lower", "_normalized")
+
+    def __init__(self, text: str, mode: str = LOWER) -> None:
+        self.text = text
+        self.mode = mode
+        self._lower: Optional[str] = None
+        self._normalized: Optional[str] = None
+
+    @property
+    def length(self) -> int:
+        return len(self.text)
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    @property
+    def normalized(self) -> str:
+        """The text in the configured matching form; equal to ``lower`` by default."""
+        if self._normalized is None:
+            self._normalized = self.lower if self.mode == LOWER else normalize_text(self.text, self.mode)
+        return self._normalized
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Protocol, Tuple
+
+from ..exceptions import ConfigError
+
+try:  # Optional: native BPE merges when tiktoken is installed.
+    import tiktoken
+except ImportError:  # pragma: no cover - exercised when the extra is absent
+    tiktoken = None
+
+DEFAULT_CHARS_PER_TOKEN = 4.0
+DEFAULT_CACHE_SIZE = 4096
+_PIECE_CACHE_SIZE = 65_536
+
+# GPT-2 style pre-tokenization, restricted to what the stdlib ``re`` supports.
+BPE_SPLIT_PATTERN = r"""'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+
+
+class TokenCounter(Protocol):
+    def count(self, text: str, limit: Optional[int] = None) -> int:
+        """Count tokens in ``text``.
+
+        With ``limit``, counting may stop as soon as the count exceeds it. The
+        return value is then some number greater than ``limit``, not the exact
+        count.
+        """
+
+
+class WordTokenCounter:
+    """Whitespace-separated words: the historical ``len(text.split())`` count.
+
+    With a limit, at most ``limit + 1`` words are split off, so huge inputs are
+    never split in full.
+    """
+
+    def count(self, text: str, limit: Optional[int] = None) -> int:
+        if limit is None:
+            return len(text.split())
+        return len(text.split(None, limit))
+
+
+class CharRatioTokenCounter:
+    """Approximate tokens as ``ceil(len(text) / chars_per_token)``; O(1), allocates nothing."""
+
+    def __init__(self, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN) -> None:
+        if chars_per_token <= 0:
+            raise ConfigError("token_counter.chars_per_token must be positive")
+        self.chars_per_token = float(chars_per_token)
+
+    def count(self, text: str, limit: Optional[int] = None) -> int:
+        return -int(-len(text) // self.chars_per_token)
+
+
+class BPETokenCounter:
+    """Byte-pair-encoding token count from a local tiktoken-format vocab file.
+
+    Each line of the file is ``<base64 token> <rank>``. The file is read on the
+    first ``count``, not at construction. When ``tiktoken`` is installed it does
+    the merges; otherwise a pure-Python merge loop is used, with a cache of
+    per-piece counts.
+    """
+
+    def __init__(self, vocab_file: str | Path, split_pattern: str = BPE_SPLIT_PATTERN) -> None:
+        self.vocab_file = Path(vocab_file)
+        self.split_pattern = split_pattern
+        self._lock = threading.Lock()
+        self._ranks: Optional[Dict[bytes, int]] = None
+        self._encoding: Any = None
+        self._split = re.compile(split_pattern).finditer
+        self._piece_counts: Dict[str, int] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Workers reload the vocab lazily instead of unpickling it.
+        return {"vocab_file": self.vocab_file, "split_pattern": self.split_pattern}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["vocab_file"], state["split_pattern"])
+
+    @property
+    def loaded(self) -> bool:
+        return self._ranks is not None
+
+    def count(self, text: str, limit: Optional[int] = None) -> int:
+        ranks = self._ranks if self._ranks is not None else self._load()
+        if self._encoding is not None and limit is None:
+            return len(self._encoding.encode_ordinary(text))
+        total = 0
+        piece_counts = self._piece_counts
+        for match in self._split(text):
+            piece = match.group()
+            count = piece_counts.get(piece)
+            if count is None:
+                count = self._count_piece(piece.encode("utf-8", "surrogatepass"), ranks)
+                if len(piece_counts) >= _PIECE_CACHE_SIZE:
+                    piece_counts.clear()
+                piece_counts[piece] = count
+            total += count
+            if limit is not None and total > limit:
+                return total
+        return total
+
+    def _count_piece(self, piece: bytes, ranks: Dict[bytes, int]) -> int:
+        if piece in ranks:
+            return 1
+        if self._encoding is not None:
+            return len(self._encoding.encode_single_piece(piece))
+        parts = [piece[i : i + 1] for i in range(len(piece))]
+        while len(parts) > 1:
+            best_rank: Optional[int] = None
+            best_index = -1
+            for i in range(len(parts) - 1):
+                rank = ranks.get(parts[i] + parts[i + 1])
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_rank, best_index = rank, i
+            if best_rank is None:
+                break
+            parts[best_index : best_index + 2] = [parts[best_index] + parts[best_index + 1]]
+        return len(parts)
+
+    def _load(self) -> Dict[bytes, int]:
+        with self._lock:
+            if self._ranks is None:
+                ranks: Dict[bytes, int] = {}
+                for line in self.vocab_file.read_bytes().splitlines():
+                    if not line.strip():
+                        continue
+                    token, rank = line.split()
+                    ranks[base64.b64decode(token)] = int(rank)
+                if tiktoken is not None:
+                    self._encoding = tiktoken.Encoding(
+                        name=f"local:{self.vocab_file.name}",
+                        pat_str=self.split_pattern,
+                        mergeable_ranks=ranks,
+                        special_tokens={},
+                    )
+                self._ranks = ranks
+            return self._ranks
+
+
+class MemoizedTokenCounter:
+    """Bounded LRU of counts for repeated texts, keyed by a 128-bit text digest.
+
+    An early-stopped count is kept as a lower bound. It answers later calls
+    only if it still exceeds their limit.
+    """
+
+    def __init__(self, counter: TokenCounter, max_entries: int = DEFAULT_CACHE_SIZE) -> None:
+        self.counter = counter
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[bytes, Tuple[int, bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_total = 0
+        self.misses_total = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"counter": self.counter, "max_entries": self.max_entries}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["counter"], state["max_entries"])
+
+    def count(self, text: str, limit: Optional[int] = None) -> int:
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] or (limit is not None and entry[0] > limit)):
+                self._entries.move_to_end(key)
+                self.hits_total += 1
+                return entry[0]
+            self.misses_total += 1
+        value = self.counter.count(text, limit)
+        exact = limit is None or value <= limit
+        with self._lock:
+            self._entries[key] = (value, exact)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+def create_token_counter(config: Dict[str, Any] | None) -> TokenCounter:
+    """Build the counter configured under ``input_validation.token_counter``."""
+    cfg = config or {}
+    counter_type = str(cfg.get("type", "words")).lower()
+    counter: TokenCounter
+    if counter_type == "words":
+        counter = WordTokenCounter()
+    elif counter_type == "chars":
+        counter = CharRatioTokenCounter(float(cfg.get("chars_per_token", DEFAULT_CHARS_PER_TOKEN)))
+    elif counter_type == "bpe":
+        vocab_file = cfg.get("vocab_file")
+        if not vocab_file:
+            raise ConfigError("token_counter.vocab_file is required for the bpe token counter")
+        counter = BPETokenCounter(str(vocab_file))
+    else:
+        raise ConfigError(f"Unsupported token counter type: {counter_type}")
+    cache_size = int(cfg.get("cache_size", 0))
+    return MemoizedTokenCounter(counter, cache_size) if cache_size > 0 else counter
@@ -1,9 +1,53 @@
 from __future__ import annotations
 
-from collections import defaultdict
-from typing import Any, Dict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Optional, Tuple
 
 from ..models import GuardrailAction, GuardrailResult
+from .locks import StripedLock
+from .request_state import DEFAULT_MAX_REQUESTS, DEFAULT_TTL_SECONDS, RequestStateStore
+
+
+@dataclass(frozen=True)
+class CompiledToolPolicy:
+    """One tool's policy, resolved from governance.yaml once at startup.
+
+    Parameter values are compared as strings, the same way call parameters are.
+    ``configured`` is False for the shared default policy of unlisted tools.
+    """
+
+    tool_name: str
+    configured: bool
+    allowed: bool
+    max_calls_per_request: Optional[int] = None
+    blocked_params: Tuple[Tuple[str, FrozenSet[str]], ...] = ()
+    allowed_params: Tuple[Tuple[str, FrozenSet[str]], ...] = ()
+    requires_confirmation: bool = False
+
+    @property
+    def has_param_rules(self) -> bool:
+        return bool(self.blocked_params or self.allowed_params)
+
+    @classmethod
+    def compile(cls, policy: Dict[str, Any]) -> "CompiledToolPolicy":
+        return cls(
+            tool_name=policy.get("tool_name"),
+            configured=True,
+            allowed=bool(policy.get("allowed", True)),
+            max_calls_per_request=policy.get("max_calls_per_request") or None,
+            blocked_params=_compile_values(policy.get("blocked_params")),
+            allowed_params=_compile_values(policy.get("allowed_params")),
+            requires_confirmation=bool(policy.get("requires_confirmation")),
+        )
+
+
+def _compile_values(spec: Any) -> Tuple[Tuple[str, FrozenSet[str]], ...]:
+    compiled = []
+    for param_name, values in (spec or {}).items():
+        if not isinstance(values, (list, tuple, set, frozenset)):
+            values = [values]
+        compiled.append((param_name, frozenset(str(value) for value in values)))
+    return tuple(compiled)
 
 
 class ToolPolicyEnforcer:
@@ -13,15 +57,25 @@ class ToolPolicyEnforcer:
         tools_cfg = config.get("tools", {})
         default_policy = tools_cfg.get("default_policy", {})
         self._default_allowed = bool(default_policy.get("allowed", False))
-        self._policies: Dict[str, Dict[str, Any]] = {}
+        self._policies: Dict[str, CompiledToolPolicy] = {}
         for policy in tools_cfg.get("policies", []) or []:
-            self._policies[policy.get("tool_name")] = policy
-        self._request_call_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+            self._policies[policy.get("tool_name")] = CompiledToolPolicy.compile(policy)
+        self._default_policy = CompiledToolPolicy(tool_name="*", configured=False, allowed=self._default_allowed)
+        request_cfg = tools_cfg.get("request_state", {}) or {}
+        self._request_call_counts: RequestStateStore[Dict[str, int]] = RequestStateStore(
+            max_entries=int(request_cfg.get("max_requests", DEFAULT_MAX_REQUESTS)),
+            ttl_seconds=float(request_cfg.get("ttl_seconds", DEFAULT_TTL_SECONDS)),
+        )
+        self._request_locks = StripedLock()
 
-    def check_allowed(self, tool_name: str) -> GuardrailResult:
-        policy = self._policies.get(tool_name)
-        if not policy:
-            if self._default_allowed:
+    def resolve(self, tool_name: str) -> CompiledToolPolicy:
+        """Return the compiled policy for ``tool_name``; pass it to the checks to avoid repeat lookups."""
+        return self._policies.get(tool_name, self._default_policy)
+
+    def check_allowed(self, tool_name: str, policy: CompiledToolPolicy | None = None) -> GuardrailResult:
+        policy = policy or self.resolve(tool_name)
+        if not policy.configured:
+            if policy.allowed:
                 return GuardrailResult(
                     action=GuardrailAction.ALLOW,
                     rule_name="default_allow",
@@ -36,7 +90,7 @@ class ToolPolicyEnforcer:
                 ),
             )
 
-        if not policy.get("allowed", True):
+        if not policy.allowed:
             return GuardrailResult(
                 action=GuardrailAction.BLOCK,
                 rule_name="tool_explicitly_blocked",
@@ -49,14 +103,18 @@ class ToolPolicyEnforcer:
             reason=f"Tool '{tool_name}' is in the allowlist",
         )
 
-    def check_call_limit(self, request_id: str, tool_name: str) -> GuardrailResult:
-        policy = self._policies.get(tool_name)
-        max_calls = policy.get("max_calls_per_request") if policy else None
+    def check_call_limit(
+        self, request_id: str, tool_name: str, policy: CompiledToolPolicy | None = None
+    ) -> GuardrailResult:
+        policy = policy or self.resolve(tool_name)
+        max_calls = policy.max_calls_per_request
         if not max_calls:
             return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="no_call_limit", reason="No call limit")
 
-        self._request_call_counts[request_id][tool_name] += 1
-        count = self._request_call_counts[request_id][tool_name]
+        with self._request_locks(request_id):
+            counts = self._request_call_counts.get_or_create(request_id, dict)
+            count = counts.get(tool_name, 0) + 1
+            counts[tool_name] = count
         if count > max_calls:
             return GuardrailResult(
                 action=GuardrailAction.BLOCK,
@@ -72,13 +130,14 @@ class ToolPolicyEnforcer:
             reason=f"Call {count}/{max_calls}",
         )
 
-    def check_params(self, tool_name: str, params: Dict[str, Any]) -> GuardrailResult:
-        policy = self._policies.get(tool_name)
-        if not policy:
+    def check_params(
+        self, tool_name: str, params: Dict[str, Any], policy: CompiledToolPolicy | None = None
+    ) -> GuardrailResult:
+        policy = policy or self.resolve(tool_name)
+        if not policy.configured:
             return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="no_param_policy", reason="No policy")
 
-        blocked = policy.get("blocked_params") or {}
-        for param_name, blocked_values in blocked.items():
+        for param_name, blocked_values in policy.blocked_params:
             if param_name in params and str(params[param_name]) in blocked_values:
                 return GuardrailResult(
                     action=GuardrailAction.BLOCK,
@@ -86,8 +145,7 @@ class ToolPolicyEnforcer:
                     reason=f"Parameter '{param_name}' has blocked value for tool '{tool_name}'",
                 )
 
-        allowed = policy.get("allowed_params") or {}
-        for param_name, allowed_values in allowed.items():
+        for param_name, allowed_values in policy.allowed_params:
             if param_name in params and str(params[param_name]) not in allowed_values:
                 return GuardrailResult(
                     action=GuardrailAction.BLOCK,
@@ -97,9 +155,11 @@ class ToolPolicyEnforcer:
 
         return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="params_valid", reason="Parameters valid")
 
-    def check_confirmation_required(self, tool_name: str) -> GuardrailResult:
-        policy = self._policies.get(tool_name)
-        if policy and policy.get("requires_confirmation"):
+    def check_confirmation_required(
+        self, tool_name: str, policy: CompiledToolPolicy | None = None
+    ) -> GuardrailResult:
+        policy = policy or self.resolve(tool_name)
+        if policy.requires_confirmation:
             return GuardrailResult(
                 action=GuardrailAction.CONFIRM,
                 rule_name="confirmation_required",
@@ -109,5 +169,13 @@ class ToolPolicyEnforcer:
             )
         return GuardrailResult(action=GuardrailAction.ALLOW, rule_name="no_confirmation", reason="No confirmation")
 
+    def adopt_request_state(self, previous: "ToolPolicyEnforcer") -> None:
+        """Continue counting calls for requests that started under ``previous``."""
+        self._request_call_counts = previous._request_call_counts
+        self._request_locks = previous._request_locks
+
     def clear_request(self, request_id: str) -> None:
-        self._request_call_counts.pop(request_id, None)
+        self._request_call_counts.pop(request_id)
+
+    def gauges(self) -> Dict[str, Any]:
+        return self._request_call_counts.gauges("tool_request_state")
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from .text_checks import Verdict
+
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_MAX_TEXT_CHARS = 100_000
+
+# (policy fingerprint, pipeline, stages, text digest)
+CacheKey = Tuple[str, str, Tuple[str, ...], bytes]
+
+_MISS = object()
+
+
+def policy_fingerprint(material: Dict[str, Any]) -> str:
+    """Stable digest of everything that can change a text verdict."""
+    encoded = json.dumps(material, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class VerdictCache:
+    """Bounded LRU of stateless guardrail verdicts keyed by text digest and policy.
+
+    Texts are keyed by a 128-bit BLAKE2b digest, so memory per entry does not
+    depend on text size. ``bind`` drops every entry when the policy fingerprint
+    changes, so an instance can be handed from one engine to its replacement.
+    Only stateless stage results belong here; rate limiting never does. Texts
+    longer than ``max_text_chars`` bypass the cache and are never hashed.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_text_chars: int = DEFAULT_MAX_TEXT_CHARS) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.max_text_chars = int(max_text_chars)
+        self.fingerprint: Optional[str] = None
+        self._entries: "OrderedDict[CacheKey, Optional[Verdict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_total = 0
+        self.misses_total = 0
+        self.evictions_total = 0
+        self.invalidations_total = 0
+
+    def bind(self, fingerprint: str) -> None:
+        with self._lock:
+            if fingerprint == self.fingerprint:
+                return
+            if self.fingerprint is not None:
+                self._entries.clear()
+                self.invalidations_total += 1
+            self.fingerprint = fingerprint
+
+    def accepts(self, text: str) -> bool:
+        return len(text) <= self.max_text_chars
+
+    def key(self, pipeline: str, stages: Sequence[str], text: str) -> CacheKey:
+        digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        return (self.fingerprint or "", pipeline, tuple(stages), digest)
+
+    def get(self, key: CacheKey) -> Tuple[bool, Optional[Verdict]]:
+        """Return ``(hit, verdict)``; a hit returns a copy the caller may mutate."""
+        with self._lock:
+            verdict = self._entries.get(key, _MISS)
+            if verdict is _MISS:
+                self.misses_total += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits_total += 1
+        return True, _copy(verdict)  # type: ignore[arg-type]
+
+    def put(self, key: CacheKey, verdict: Optional[Verdict]) -> None:
+        if key[0] != (self.fingerprint or ""):
+            return
+        with self._lock:
+            self._entries[key] = _copy(verdict)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions_total += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def gauges(self, prefix: str) -> Dict[str, Any]:
+        lookups = self.hits_total + self.misses_total
+        return {
+            f"{prefix}_size": len(self._entries),
+            f"{prefix}_hits_total": self.hits_total,
+            f"{prefix}_misses_total": self.misses_total,
+            f"{prefix}_hit_rate": round(self.hits_total / lookups, 4) if lookups else 0.0,
+            f"{prefix}_evictions_total": self.evictions_total,
+            f"{prefix}_invalidations_total": self.invalidations_total,
+        }
+
+
+def _copy(verdict: Optional[Verdict]) -> Optional[Verdict]:
+    if verdict is None:
+        return None
+    event_name, result = verdict
+    return event_name, result.model_copy(deep=True)
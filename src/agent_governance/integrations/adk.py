@@ -3,13 +3,16 @@ from __future__ import annotations
 import hashlib
 import json
 import time
-from typing import Any, Dict
+from typing import Any, Dict, Set
 
 from ..config import load_config
 from ..dlp.scanner import DLPScanner
+from ..dlp.structured import StructuredDLPScanner
 from ..exceptions import InputBlockedError, OutputBlockedError, ToolBlockedError
 from ..guardrails.engine import GuardrailsEngine
-from ..models import DLPAction, GuardrailAction, RequestContext
+from ..guardrails.policy_watcher import DEFAULT_INTERVAL_SECONDS, PolicyWatcher
+from ..guardrails.streaming import StreamingOutputCheck
+from ..models import DLPAction, DLPScanResult, GuardrailAction, RequestContext
 from ..telemetry import GovernanceLogger, init_telemetry
 from ..telemetry.cost_tracker import CostTracker
 from ..telemetry.metrics import AgentMetricsTracker
@@ -44,20 +47,37 @@ class GovernanceADKMiddleware:
         self._guardrails_enabled = bool(guardrails_cfg.get("enabled", True))
         self._guardrails_policy = guardrails_cfg.get("policy_file") or guardrails_cfg.get("policy_path") or "inline_or_default"
         self._guardrails_policy_fingerprint = _policy_fingerprint(guardrails_cfg)
-        self._guardrails = GuardrailsEngine(guardrails_cfg, self._logger)
+        telemetry_cfg = config.section("telemetry") or {}
+        self._metrics = AgentMetricsTracker(telemetry_cfg.get("metrics", {}))
+        self._cost_tracker = CostTracker(telemetry_cfg.get("cost_tracking", {}))
+        self._guardrails = GuardrailsEngine(
+            guardrails_cfg,
+            self._logger,
+            load_signal=self._metrics.load,
+            cost_estimator=self._cost_tracker.estimate,
+        )
         dlp_cfg = config.section("dlp")
         self._dlp = DLPScanner.from_config(dlp_cfg) if dlp_cfg.get("enabled", True) else None
+        self._structured_dlp = StructuredDLPScanner(self._dlp, dlp_cfg.get("safe_fields") or ()) if self._dlp else None
         self._dlp_provider = dlp_cfg.get("provider", "sensitive_data_protection")
         self._active_spans = {}
         self._tool_spans = {}
         self._request_metrics: Dict[str, Dict[str, Any]] = {}
         self._session_turns: Dict[str, int] = {}
-        telemetry_cfg = config.section("telemetry") or {}
-        self._cost_tracker = CostTracker(telemetry_cfg.get("cost_tracking", {}))
-        self._metrics = AgentMetricsTracker(telemetry_cfg.get("metrics", {}))
         self._prompt_fingerprint: str | None = None
         self._prompt_length_chars: int | None = None
         self._emit_guardrails_status()
+        self._policy_watcher: PolicyWatcher | None = None
+        reload_cfg = guardrails_cfg.get("hot_reload", {}) or {}
+        if reload_cfg.get("enabled"):
+            self._policy_watcher = PolicyWatcher(
+                self._guardrails,
+                self._load_guardrails_section,
+                interval_seconds=float(reload_cfg.get("interval_seconds", DEFAULT_INTERVAL_SECONDS)),
+                on_reload=self._swap_guardrails,
+                on_error=self._report_reload_error,
+            )
+            self._policy_watcher.start()
 
     @property
     def agent(self):
@@ -78,12 +98,15 @@ class GovernanceADKMiddleware:
         user_id: str | None = None,
         session_id: str | None = None,
         prompt_text: str | None = None,
+        priority: str | None = None,
     ) -> tuple[str, RequestContext, float]:
         ctx = RequestContext(
             user_id_hash=RequestContext.hash_user_id(user_id) if user_id else None,
             session_id=session_id,
+            priority=priority,
         )
         start_time = time.monotonic()
+        self._metrics.record_request_start()
         if prompt_text is not None:
             self.set_prompt(prompt_text)
 
@@ -118,6 +141,7 @@ class GovernanceADKMiddleware:
 
         guard = await self._guardrails.check_input(ctx, user_input, agent=agent_identity)
         if guard.action == GuardrailAction.BLOCK:
+            self.release_request(ctx, error=guard.reason)
             raise InputBlockedError(guard.reason)
 
         if self._dlp and self._config.section("dlp").get("scan_input", True):
@@ -155,21 +179,12 @@ class GovernanceADKMiddleware:
         key = f"{ctx.request_id}:{tool_name}:{len(self._tool_spans)}"
         self._tool_spans[key] = (tool_span_ctx, tool_span)
 
-        if self._dlp and self._config.section("dlp").get("scan_tool_params", True):
+        if self._structured_dlp and self._config.section("dlp").get("scan_tool_params", True):
             action = DLPAction(self._config.section("dlp").get("action_on_input_pii", "log"))
-            _, scan = self._dlp.scan_and_process(str(tool_params), action)
-            if scan.findings:
-                self._logger.dlp_event(
-                    agent_identity,
-                    ctx,
-                    stage="tool_params",
-                    provider=self._dlp_provider,
-                    tool_name=tool_name,
-                    action=action.value,
-                    findings_count=len(scan.findings),
-                    info_types=sorted({finding.info_type for finding in scan.findings}),
-                )
+            tool_params, scan = self._structured_dlp.scan_and_process(tool_params, action)
+            self._log_tool_dlp(agent_identity, ctx, "tool_params", tool_name, action, scan)
             if action == DLPAction.BLOCK and scan.findings:
+                self._guardrails.release_tool_call(tool_name, ctx.request_id)
                 raise ToolBlockedError("Tool params blocked by DLP")
 
         return tool_params
@@ -184,7 +199,7 @@ class GovernanceADKMiddleware:
         success: bool,
         error: str | None = None,
     ) -> Any:
-        self._guardrails.record_tool_result(tool_name, success)
+        self._guardrails.record_tool_result(tool_name, success, request_id=ctx.request_id)
         status = "success" if success else "error"
         self._metrics.record_tool_call_end(tool_name, status, latency_ms)
         self._logger.tool_call_end(agent_identity, ctx, tool_name, status, latency_ms, error_message=error)
@@ -194,35 +209,54 @@ class GovernanceADKMiddleware:
                 tool_span_ctx.__exit__(None, None, None)
                 self._tool_spans.pop(key, None)
                 break
+        if self._structured_dlp and self._config.section("dlp").get("scan_tool_results", False):
+            action = DLPAction(self._config.section("dlp").get("action_on_output_pii", "log"))
+            result, scan = self._structured_dlp.scan_and_process(result, action)
+            self._log_tool_dlp(agent_identity, ctx, "tool_result", tool_name, action, scan)
+            if action == DLPAction.BLOCK and scan.findings:
+                raise ToolBlockedError("Tool result blocked by DLP")
         return result
 
+    def _log_tool_dlp(
+        self, agent_identity, ctx: RequestContext, stage: str, tool_name: str, action: DLPAction, scan: DLPScanResult
+    ) -> None:
+        if not scan.findings:
+            return
+        self._logger.dlp_event(
+            agent_identity,
+            ctx,
+            stage=stage,
+            provider=self._dlp_provider,
+            tool_name=tool_name,
+            action=action.value,
+            findings_count=len(scan.findings),
+            info_types=sorted({finding.info_type for finding in scan.findings}),
+            paths=sorted({finding.path for finding in scan.findings if finding.path}),
+        )
+
     async def after_agent_call(
         self, agent_identity, ctx: RequestContext, output: str, start_time: float
     ) -> str:
-        guard = await self._guardrails.check_output(ctx, output, agent=agent_identity)
-        if guard.action == GuardrailAction.BLOCK:
-            raise OutputBlockedError(guard.reason)
+        try:
+            output = await self._enforce_output(agent_identity, ctx, output)
+        except Exception as exc:
+            self.release_request(ctx, error=str(exc))
+            raise
 
-        if self._dlp and self._config.section("dlp").get("scan_output", True):
-            action = DLPAction(self._config.section("dlp").get("action_on_output_pii", "log"))
-            output, scan = self._dlp.scan_and_process(output, action)
-            if scan.findings:
-                self._logger.dlp_event(
-                    agent_identity,
-                    ctx,
-                    stage="output",
-                    provider=self._dlp_provider,
-                    action=action.value,
-                    findings_count=len(scan.findings),
-                    info_types=sorted({finding.info_type for finding in scan.findings}),
-                )
-            if action == DLPAction.BLOCK and scan.findings:
-                raise OutputBlockedError("Output blocked by DLP")
+        self._finish_request(agent_identity, ctx, start_time)
+        return output
 
+    def stream_output(self, agent_identity, ctx: RequestContext, start_time: float) -> "AgentOutputStream":
+        """Streaming counterpart of ``after_agent_call``; see ``AgentOutputStream``."""
+        return AgentOutputStream(self, agent_identity, ctx, start_time)
+
+    def _finish_request(self, agent_identity, ctx: RequestContext, start_time: float) -> None:
         latency_ms = int((time.monotonic() - start_time) * 1000)
         self._metrics.record_request_end("success", latency_ms)
         request_cost_usd = self._cost_tracker.finalize_request(ctx.request_id) if self._cost_tracker.enabled else 0.0
         request_metrics = self._request_metrics.pop(ctx.request_id, {})
+        self._guardrails.clear_request(ctx.request_id)
+        self._metrics.record_gauges(self._guardrails.gauges())
         self._logger.agent_request_end(
             agent_identity,
             ctx,
@@ -256,8 +290,52 @@ class GovernanceADKMiddleware:
             span.set_attribute("governance.agent.tool_calls", int(request_metrics.get("tool_calls", 0)))
             span.set_attribute("governance.agent.session_turn", int(request_metrics.get("session_turn", 0)))
             span_ctx.__exit__(None, None, None)
+
+    async def _enforce_output(self, agent_identity, ctx: RequestContext, output: str) -> str:
+        guard = await self._guardrails.check_output(ctx, output, agent=agent_identity)
+        if guard.action == GuardrailAction.BLOCK:
+            raise OutputBlockedError(guard.reason)
+
+        if self._dlp and self._config.section("dlp").get("scan_output", True):
+            action = DLPAction(self._config.section("dlp").get("action_on_output_pii", "log"))
+            output, scan = self._dlp.scan_and_process(output, action)
+            if scan.findings:
+                self._logger.dlp_event(
+                    agent_identity,
+                    ctx,
+                    stage="output",
+                    provider=self._dlp_provider,
+                    action=action.value,
+                    findings_count=len(scan.findings),
+                    info_types=sorted({finding.info_type for finding in scan.findings}),
+                )
+            if action == DLPAction.BLOCK and scan.findings:
+                raise OutputBlockedError("Output blocked by DLP")
         return output
 
+    def release_request(self, ctx: RequestContext, error: str | None = None) -> None:
+        """Drop per-request state for a request that ends without a successful ``after_agent_call``.
+
+        Called automatically when the middleware blocks a request; call it from
+        application error handlers when the agent itself raises.
+        """
+        self._guardrails.clear_request(ctx.request_id)
+        if self._request_metrics.pop(ctx.request_id, None) is not None:
+            self._metrics.record_request_released()
+        self._cost_tracker.finalize_request(ctx.request_id)
+        prefix = f"{ctx.request_id}:"
+        for key in [key for key in self._tool_spans if key.startswith(prefix)]:
+            tool_span_ctx, tool_span = self._tool_spans.pop(key)
+            tool_span.set_attribute("status", "error")
+            tool_span_ctx.__exit__(None, None, None)
+        active = self._active_spans.pop(ctx.request_id, None)
+        if active is not None:
+            span_ctx, span = active
+            span.set_attribute("status", "error")
+            if error:
+                span.set_attribute("error_message", error)
+            span_ctx.__exit__(None, None, None)
+
     async def record_llm_usage(
         self,
         agent_identity,
@@ -268,10 +346,11 @@ class GovernanceADKMiddleware:
         output_tokens: int,
         delegation_chain: str | None = None,
     ) -> Dict[str, float]:
+        usage = self._cost_tracker.estimate(model, input_tokens, output_tokens)
+        self._guardrails.reconcile_usage(ctx, usage)
         if not self._cost_tracker.enabled:
             return {"request_total_usd": 0.0, "session_total_usd": 0.0}
 
-        usage = self._cost_tracker.estimate(model, input_tokens, output_tokens)
         totals = self._cost_tracker.record(ctx.request_id, ctx.session_id, usage)
         self._metrics.record_cost(usage.estimated_usd, usage.input_tokens, usage.output_tokens)
         metrics = self._request_metrics.get(ctx.request_id)
@@ -363,6 +442,34 @@ class GovernanceADKMiddleware:
             if chain_str:
                 metrics["delegation_chain"] = chain_str
 
+    def close(self) -> None:
+        """Stop the policy watcher and the guardrail worker pool, if running."""
+        if self._policy_watcher is not None:
+            self._policy_watcher.stop()
+        self._guardrails.close()
+
+    def _load_guardrails_section(self) -> Dict[str, Any]:
+        policy_file = self._guardrails.config.get("policy_file") or self._guardrails.config.get("policy_path")
+        return load_config(self._config.path, guardrails_path=policy_file).section("guardrails")
+
+    def _swap_guardrails(self, engine: GuardrailsEngine) -> None:
+        guardrails_cfg = engine.config
+        self._guardrails_enabled = bool(guardrails_cfg.get("enabled", True))
+        self._guardrails_policy_fingerprint = _policy_fingerprint(guardrails_cfg)
+        self._guardrails = engine
+        self._emit_guardrails_status()
+
+    def _report_reload_error(self, exc: Exception) -> None:
+        self._logger.error_event(
+            self.agent,
+            RequestContext(),
+            message=f"Guardrails policy reload failed; keeping the previous policy: {exc}",
+            severity="error",
+            alert_type="guardrails_reload_failed",
+            guardrails_policy=self._guardrails_policy,
+            guardrails_policy_fingerprint=self._guardrails_policy_fingerprint,
+        )
+
     def _emit_guardrails_status(self) -> None:
         ctx = RequestContext()
         self._logger.safety_event(
@@ -419,6 +526,111 @@ class GovernanceADKMiddleware:
         return turn
 
 
+class AgentOutputStream:
+    """Enforces output governance on a response streamed chunk by chunk.
+
+    ``feed`` returns the part of the stream that is safe to forward. It holds
+    back just enough trailing text to catch a content keyword or DLP match that
+    spans chunks (``dlp.stream_holdback_chars``, default 64). ``close`` flushes
+    the rest, runs the checks that need the full text and ends the request.
+    A block raises ``OutputBlockedError`` mid-stream and releases the request.
+    """
+
+    def __init__(self, middleware: GovernanceADKMiddleware, agent_identity, ctx: RequestContext, start_time: float):
+        self._middleware = middleware
+        self._agent = agent_identity
+        self._ctx = ctx
+        self._start_time = start_time
+        self._guard: StreamingOutputCheck = middleware._guardrails.stream_output(ctx, agent=agent_identity)
+        dlp_cfg = middleware._config.section("dlp")
+        self._dlp = middleware._dlp if dlp_cfg.get("scan_output", True) else None
+        self._dlp_action = DLPAction(dlp_cfg.get("action_on_output_pii", "log"))
+        dlp_holdback = int(dlp_cfg.get("stream_holdback_chars", 64)) if self._dlp else 0
+        self._holdback = max(self._guard.holdback_chars, dlp_holdback)
+        self._pending = ""
+        self._findings_count = 0
+        self._info_types: Set[str] = set()
+        self._closed = False
+
+    async def feed(self, chunk: str) -> str:
+        self._ensure_open()
+        try:
+            self._enforce(self._guard.feed(chunk))
+            self._pending += chunk
+            cutoff = len(self._pending) - self._holdback
+            if cutoff <= 0:
+                return ""
+            release = self._dlp_boundary(cutoff) if self._dlp else cutoff
+            return self._release(release)
+        except Exception as exc:
+            self._fail(exc)
+            raise
+
+    async def close(self) -> str:
+        self._ensure_open()
+        try:
+            self._enforce(self._guard.finish())
+            output = self._release(len(self._pending))
+            self._log_dlp()
+        except Exception as exc:
+            self._fail(exc)
+            raise
+        self._closed = True
+        self._middleware._finish_request(self._agent, self._ctx, self._start_time)
+        return output
+
+    def _ensure_open(self) -> None:
+        if self._closed:
+            raise RuntimeError("Output stream is closed")
+
+    def _enforce(self, guard) -> None:
+        if guard.action == GuardrailAction.BLOCK:
+            raise OutputBlockedError(guard.reason)
+
+    def _dlp_boundary(self, cutoff: int) -> int:
+        """Move the release point back so it never splits a DLP match."""
+        spans = self._dlp.match_spans(self._pending)
+        release = cutoff
+        moved = True
+        while moved:
+            moved = False
+            for _, start, end in spans:
+                if start < release < end:
+                    release = start
+                    moved = True
+        return release
+
+    def _release(self, release: int) -> str:
+        segment, self._pending = self._pending[:release], self._pending[release:]
+        if not segment or self._dlp is None:
+            return segment
+        segment, scan = self._dlp.scan_and_process(segment, self._dlp_action)
+        if scan.findings:
+            self._findings_count += len(scan.findings)
+            self._info_types.update(finding.info_type for finding in scan.findings)
+            if self._dlp_action == DLPAction.BLOCK:
+                raise OutputBlockedError("Output blocked by DLP")
+        return segment
+
+    def _log_dlp(self) -> None:
+        if not self._findings_count:
+            return
+        self._middleware._logger.dlp_event(
+            self._agent,
+            self._ctx,
+            stage="output",
+            provider=self._middleware._dlp_provider,
+            action=self._dlp_action.value,
+            findings_count=self._findings_count,
+            info_types=sorted(self._info_types),
+        )
+
+    def _fail(self, exc: Exception) -> None:
+        self._closed = True
+        self._log_dlp()
+        self._middleware.release_request(self._ctx, error=str(exc))
+
+
 def _policy_fingerprint(policy: Dict[str, Any]) -> str:
     serialized = json.dumps(policy, sort_keys=True, separators=(",", ":"), default=str)
     return hashlib.sha256(serialized.encode("utf-8")).hexdigest()[:16]
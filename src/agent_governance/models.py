@@ -112,6 +112,7 @@ class RequestContext(BaseModel):
     span_id: Optional[str] = None
     user_id_hash: Optional[str] = None
     session_id: Optional[str] = None
+    priority: Optional[str] = None
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     def model_post_init(self, __context) -> None:
@@ -161,6 +162,10 @@ class DLPFinding(BaseModel):
     info_type: str
     quote: Optional[str] = None
     likelihood: Optional[str] = None
+    start: Optional[int] = None
+    end: Optional[int] = None
+    # JSON path of the string leaf, for findings in structured payloads.
+    path: Optional[str] = None
 
 
 class DLPScanResult(BaseModel):
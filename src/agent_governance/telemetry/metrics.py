@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import time
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+DEFAULT_RECENT_WINDOW = 500
+DEFAULT_RECENT_WINDOW_SECONDS = 60.0
 
 
 @dataclass
@@ -11,10 +16,18 @@ class ToolStats:
     latency_ms: List[int] = field(default_factory=list)
 
 
+class LoadSample(NamedTuple):
+    """Current load, as read by adaptive admission control."""
+
+    p95_latency_ms: int
+    in_flight: int
+    samples: int
+
+
 class AgentMetricsTracker:
     """In-process runtime metrics aggregation for agent health analytics."""
 
-    def __init__(self, config: Dict[str, Any] | None = None) -> None:
+    def __init__(self, config: Dict[str, Any] | None = None, clock: Callable[[], float] = time.monotonic) -> None:
         cfg = config or {}
         self.enabled = bool(cfg.get("enabled", True))
         self._request_latencies: List[int] = []
@@ -26,8 +39,43 @@ class AgentMetricsTracker:
         self._output_tokens_total = 0
         self._tool_stats: Dict[str, ToolStats] = {}
         self._delegation_edges: Dict[Tuple[str, str], int] = {}
+        self._gauges: Dict[str, Any] = {}
+        # Load signal for admission control; bounded in count and age, and kept even when metrics are disabled.
+        self._clock = clock
+        self._recent_window_seconds = float(cfg.get("recent_window_seconds", DEFAULT_RECENT_WINDOW_SECONDS))
+        self._recent_latencies: Deque[Tuple[float, int]] = deque(
+            maxlen=max(1, int(cfg.get("recent_window", DEFAULT_RECENT_WINDOW)))
+        )
+        self._recent_p95: Optional[int] = None
+        self._in_flight = 0
+
+    def record_request_start(self) -> None:
+        self._in_flight += 1
+
+    def record_request_released(self) -> None:
+        """A request ended without ``record_request_end`` (blocked or failed)."""
+        self._in_flight = max(0, self._in_flight - 1)
+
+    def load(self) -> LoadSample:
+        """p95 over the last ``recent_window`` request latencies, and requests in flight.
+
+        Latencies older than ``recent_window_seconds`` are dropped, so the
+        signal recovers once traffic stops, even if every request since a
+        spike was shed and recorded no latency.
+        """
+        recent = self._recent_latencies
+        horizon = self._clock() - self._recent_window_seconds
+        while recent and recent[0][0] < horizon:
+            recent.popleft()
+            self._recent_p95 = None
+        if self._recent_p95 is None:
+            self._recent_p95 = _percentile([latency for _, latency in recent], 95.0)
+        return LoadSample(self._recent_p95, self._in_flight, len(recent))
 
     def record_request_end(self, status: str, latency_ms: int) -> None:
+        self._in_flight = max(0, self._in_flight - 1)
+        self._recent_latencies.append((self._clock(), max(0, int(latency_ms))))
+        self._recent_p95 = None
         if not self.enabled:
             return
         self._requests_total += 1
@@ -58,6 +106,11 @@ class AgentMetricsTracker:
         self._input_tokens_total += max(0, int(input_tokens))
         self._output_tokens_total += max(0, int(output_tokens))
 
+    def record_gauges(self, gauges: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        self._gauges.update(gauges)
+
     def snapshot(self) -> Dict[str, Any]:
         if not self.enabled:
             return {}
@@ -82,6 +135,7 @@ class AgentMetricsTracker:
             "input_tokens_total": self._input_tokens_total,
             "output_tokens_total": self._output_tokens_total,
             "tool_analytics": tool_analytics,
+            "gauges": dict(self._gauges),
             "delegation_edges": [
                 {"source_agent": src, "target_agent": dst, "count": count}
                 for (src, dst), count in sorted(self._delegation_edges.items(), key=lambda item: item[1], reverse=True)
@@ -1,5 +1,7 @@
 import pytest
 
+from agent_governance.exceptions import OutputBlockedError
+from agent_governance.guardrails.request_state import RequestStateStore
 from agent_governance.integrations import GovernanceADKMiddleware
 
 
@@ -61,3 +63,207 @@ dlp:
 
     output = await governance.after_agent_call(agent, ctx, "response", start_time)
     assert output == "response"
+
+
+@pytest.mark.asyncio
+async def test_adk_middleware_releases_request_state(tmp_path):
+    config_path = tmp_path / "governance.yaml"
+    config_path.write_text(
+        """
+agent:
+  agent_id: "test-agent"
+  agent_name: "Test Agent"
+  agent_type: "adk"
+  version: "0.1.0"
+  env: "dev"
+  gcp_project: "test-project"
+
+guardrails:
+  profile: custom
+  content_safety:
+    block_categories: ["violence"]
+  tools:
+    default_policy:
+      allowed: true
+    policies:
+      - tool_name: "search"
+        max_calls_per_request: 3
+
+dlp:
+  enabled: false
+"""
+    )
+    governance = GovernanceADKMiddleware.from_config(str(config_path))
+    agent = governance.agent
+    call_counts = governance._guardrails._tool_enforcer._request_call_counts
+
+    _, ctx, start_time = await governance.before_agent_call(agent, "hello", user_id="u1")
+    await governance.before_tool_call(agent, ctx, "search", {"q": "x"})
+    assert len(call_counts) == 1
+    await governance.after_agent_call(agent, ctx, "done", start_time)
+    assert len(call_counts) == 0
+    assert governance._metrics.snapshot()["gauges"]["tool_request_state_size"] == 0
+
+    _, ctx, start_time = await governance.before_agent_call(agent, "hello", user_id="u1")
+    await governance.before_tool_call(agent, ctx, "search", {"q": "x"})
+    with pytest.raises(OutputBlockedError):
+        await governance.after_agent_call(agent, ctx, "kill it", start_time)
+    assert len(call_counts) == 0
+    assert ctx.request_id not in governance._request_metrics
+
+
+def test_request_state_store_ttl_and_lru():
+    store = RequestStateStore(max_entries=2, ttl_seconds=10)
+    now = [0.0]
+    store._clock = lambda: now[0]
+
+    store.get_or_create("a", dict)
+    store.get_or_create("b", dict)
+    store.get_or_create("a", dict)
+    store.get_or_create("c", dict)
+    assert "b" not in store and store.evictions_total == 1
+
+    now[0] = 11.0
+    assert store.get("a") is None
+    assert len(store) == 0
+    assert store.gauges("req")["req_expirations_total"] == 2
+
+
+@pytest.mark.asyncio
+async def test_adk_middleware_streams_output_with_holdback(tmp_path):
+    config_path = tmp_path / "governance.yaml"
+    config_path.write_text(
+        """
+agent:
+  agent_id: "test-agent"
+  agent_name: "Test Agent"
+  agent_type: "adk"
+  version: "0.1.0"
+  env: "dev"
+  gcp_project: "test-project"
+
+guardrails:
+  profile: custom
+  content_safety:
+    block_categories: ["violence"]
+  tools:
+    default_policy:
+      allowed: true
+
+dlp:
+  enabled: true
+  info_types: ["EMAIL_ADDRESS"]
+  action_on_output_pii: redact
+  stream_holdback_chars: 8
+"""
+    )
+    governance = GovernanceADKMiddleware.from_config(str(config_path))
+    agent = governance.agent
+
+    _, ctx, start_time = await governance.before_agent_call(agent, "hello", user_id="u1")
+    stream = governance.stream_output(agent, ctx, start_time)
+    released = [await stream.feed(chunk) for chunk in ["Write to jane.do", "e@example.com", " for the recipe today"]]
+    assert released[0] == "Write to"
+    released.append(await stream.close())
+    assert "".join(released) == "Write to [REDACTED] for the recipe today"
+    assert ctx.request_id not in governance._request_metrics
+
+    _, ctx, start_time = await governance.before_agent_call(agent, "hello", user_id="u1")
+    stream = governance.stream_output(agent, ctx, start_time)
+    first = await stream.feed("Step one is fine. Then we bo")
+    assert "bo" not in first
+    with pytest.raises(OutputBlockedError):
+        await stream.feed("mb the")
+    assert ctx.request_id not in governance._request_metrics
+
+
+@pytest.mark.asyncio
+async def test_adk_middleware_hot_reloads_policy_file(tmp_path):
+    from agent_governance.exceptions import ToolBlockedError
+
+    policy_path = tmp_path / "guardrails.yaml"
+    policy_path.write_text("tools:\n  default_policy:\n    allowed: true\n")
+    config_path = tmp_path / "governance.yaml"
+    config_path.write_text(
+        f"""
+agent:
+  agent_id: "test-agent"
+  agent_name: "Test Agent"
+  agent_type: "adk"
+  version: "0.1.0"
+  env: "dev"
+  gcp_project: "test-project"
+
+guardrails:
+  profile: custom
+  hot_reload:
+    enabled: true
+    interval_seconds: 3600
+
+dlp:
+  enabled: false
+"""
+    )
+    governance = GovernanceADKMiddleware.from_config(str(config_path), guardrails_path=str(policy_path))
+    agent = governance.agent
+    _, ctx, _ = await governance.before_agent_call(agent, "hello", user_id="u1")
+    try:
+        await governance.before_tool_call(agent, ctx, "search", {"q": "x"})
+
+        policy_path.write_text("tools:\n  default_policy:\n    allowed: false\n")
+        assert governance._policy_watcher.check_now()
+        with pytest.raises(ToolBlockedError):
+            await governance.before_tool_call(agent, ctx, "search", {"q": "x"})
+    finally:
+        governance.release_request(ctx)
+        governance.close()
+
+
+@pytest.mark.asyncio
+async def test_adk_middleware_redacts_tool_params_by_json_path(tmp_path):
+    config_path = tmp_path / "governance.yaml"
+    config_path.write_text(
+        """
+agent:
+  agent_id: "test-agent"
+  agent_name: "Test Agent"
+  agent_type: "adk"
+  version: "0.1.0"
+  env: "dev"
+  gcp_project: "test-project"
+
+guardrails:
+  profile: custom
+  tools:
+    default_policy:
+      allowed: true
+
+dlp:
+  enabled: true
+  info_types: ["EMAIL_ADDRESS"]
+  action_on_input_pii: redact
+  safe_fields: ["reply_to", "$.rows[*].owner"]
+"""
+    )
+    governance = GovernanceADKMiddleware.from_config(str(config_path))
+    agent = governance.agent
+    events = []
+    governance._logger.dlp_event = lambda agent, ctx, **details: events.append(details)
+
+    _, ctx, _ = await governance.before_agent_call(agent, "hello", user_id="u1")
+    params = {
+        "to": ["a@b.co"],
+        "reply_to": "x@y.co",
+        "rows": [{"owner": "o@p.co", "note": "ping c@d.io", "n": 3}],
+        "a@b.co": None,
+    }
+    result = await governance.before_tool_call(agent, ctx, "send", params)
+
+    assert result is params
+    assert params == {
+        "to": ["[REDACTED]"],
+        "reply_to": "x@y.co",
+        "rows": [{"owner": "o@p.co", "note": "ping [REDACTED]", "n": 3}],
+        "a@b.co": None,
+    }
+    assert events[0]["stage"] == "tool_params" and events[0]["paths"] == ["$.rows[0].note", "$.to[0]"]
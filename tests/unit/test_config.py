@@ -5,3 +5,16 @@ def test_load_config(fixtures_dir, monkeypatch):
     path = fixtures_dir / "sample_governance.yaml"
     cfg = load_config(path)
     assert cfg.agent.agent_id == "sample-agent"
+
+
+def test_load_config_records_the_policy_file_it_loaded(fixtures_dir, tmp_path):
+    stale = tmp_path / "stale.yaml"
+    stale.write_text("input_validation:\n  max_input_length: 10\n")
+    config_path = tmp_path / "governance.yaml"
+    config_path.write_text(
+        (fixtures_dir / "sample_governance.yaml").read_text() + f'guardrails:\n  policy_file: "{stale}"\n'
+    )
+    strict = fixtures_dir / "strict_guardrails.yaml"
+
+    cfg = load_config(config_path, guardrails_path=strict)
+    assert cfg.section("guardrails")["policy_file"] == str(strict)
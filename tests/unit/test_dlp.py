@@ -0,0 +1,155 @@
+from agent_governance.dlp import DLPScanner
+from agent_governance.dlp.engine import CompiledPatternSet
+from agent_governance.dlp.scanner import DEFAULT_PATTERNS, INFO_TYPE_ALIASES
+
+
+def test_single_pass_spans_match_per_type_scans():
+    text = "Mail jane.doe@example.com, SSN 123-45-6789, visit 12 Main street. Ask John Smith."
+    scanner = DLPScanner(info_types=["EMAIL_ADDRESS", "SSN", "PERSONAL_ADDRESS", "NAME"])
+
+    spans = scanner.match_spans(text)
+
+    expected = sorted(
+        (INFO_TYPE_ALIASES.get(name, name), match.start(), match.end())
+        for name in ["EMAIL_ADDRESS", "SSN", "PERSONAL_ADDRESS", "NAME"]
+        for match in DEFAULT_PATTERNS[INFO_TYPE_ALIASES.get(name, name)].finditer(text)
+    )
+    assert spans == sorted(spans, key=lambda span: span[1]) and sorted(spans) == expected
+    assert [finding.quote for finding in scanner.scan_text(text).findings] == [text[s:e] for _, s, e in spans]
+    assert CompiledPatternSet({}).spans(text) == []
+
+
+def test_span_redaction_merges_overlaps_and_uses_info_type_tokens():
+    from agent_governance.dlp.redactor import redact_text
+    from agent_governance.models import DLPAction, DLPFinding
+
+    scanner = DLPScanner.from_config(
+        {"action_on_input_pii": "redact", "redaction_style": "info_type", "redaction_tokens": {"US_SSN": "<ssn>"}}
+    )
+    text = "a@b.co, 123-45-6789, again a@b.co"
+    redacted, scan = scanner.scan_and_process(text, DLPAction.REDACT)
+    assert redacted == "[EMAIL], <ssn>, again [EMAIL]"
+    assert [(f.start, f.end) for f in scan.findings] == [(0, 6), (8, 19), (27, 33)]
+
+    overlapping = [
+        DLPFinding(info_type="PERSON_NAME", start=0, end=8),
+        DLPFinding(info_type="ADDRESS", start=5, end=11),
+        DLPFinding(info_type="PERSON_NAME", quote="x"),
+    ]
+    assert redact_text("John Doe St, x", overlapping, {"PERSON_NAME": "[NAME]"}) == "[REDACTED], [NAME]"
+
+
+def test_card_and_phone_detectors_check_luhn_and_structure():
+    from agent_governance.dlp.detectors import CreditCardDetector, PhoneNumberDetector, luhn_valid
+
+    assert luhn_valid("4111111111111111") and not luhn_valid("4111111111111112")
+    cards = CreditCardDetector()
+    assert list(cards.spans("card 4111 1111 1111 1111 2024, ref 4111-1111-1111-1112")) == [(5, 24)]
+    assert list(cards.spans("order 1234567890123 and 4111111111111111abc")) == []
+    for text in ("card:-4111 1111 1111 1111", "ref-4111111111111111"):
+        assert [text[start:end].replace(" ", "") for start, end in cards.spans(text)] == ["4111111111111111"]
+
+    text = "call 415-555-0134, (415) 555-0134 or +44 20 7946 0958; id 4155550134, 415-555.0134, 2024-05-01"
+    assert [text[start:end] for start, end in PhoneNumberDetector().spans(text)] == [
+        "415-555-0134",
+        "(415) 555-0134",
+        "+44 20 7946 0958",
+    ]
+
+    adversarial = "1 " * 20000 + "1 - " * 20000 + "+1 " * 20000
+    assert list(cards.spans(adversarial)) == [] and list(PhoneNumberDetector().spans(adversarial)) == []
+    scanner = DLPScanner(info_types=["CREDIT_CARD", "PHONE_NUMBER", "SSN"])
+    assert scanner.match_spans("4111 1111 1111 1111 / 415-555-0134 / 123-45-6789") == [
+        ("CREDIT_CARD_NUMBER", 0, 19),
+        ("PHONE_NUMBER", 22, 34),
+        ("US_SSN", 37, 48),
+    ]
+
+
+def test_streaming_scan_finds_matches_across_chunks_with_stream_offsets():
+    import io
+
+    from agent_governance.models import DLPAction
+
+    scanner = DLPScanner.from_config(
+        {"action_on_input_pii": "redact", "redaction_style": "info_type", "stream_holdback_chars": 32}
+    )
+    text = ("filler line without secrets. " * 40 + "mail jane.doe@example.com, card 4111 1111 1111 1111. ") * 5
+    expected = [(f.info_type, f.start, f.end, f.quote) for f in scanner.scan_text(text).findings]
+    assert len(expected) == 10
+
+    for source in (io.StringIO(text), [text[i : i + 7] for i in range(0, len(text), 7)]):
+        found = [(f.info_type, f.start, f.end, f.quote) for f in scanner.scan_stream(source, chunk_chars=50)]
+        assert found == expected
+
+    pieces = list(scanner.redact_stream(io.StringIO(text), chunk_chars=50))
+    assert len(pieces) > 1
+    assert "".join(pieces) == scanner.scan_and_process(text, DLPAction.REDACT)[0]
+
+
+def test_structured_scan_reports_json_paths_and_skips_safe_fields():
+    from agent_governance.dlp import StructuredDLPScanner
+    from agent_governance.models import DLPAction
+
+    scanner = StructuredDLPScanner(
+        DLPScanner(info_types=["EMAIL_ADDRESS", "SSN"]), safe_fields=["trace", "$.items[*].id"]
+    )
+    payload = {
+        "user": {"email": "a@b.co", "age": 41, "ok": True, "trace": "t@x.io"},
+        "items": [{"id": "i@x.io", "memo": "ssn 123-45-6789"}, None],
+        "odd key": "c@d.io",
+    }
+
+    scan = scanner.scan(payload)
+    assert [(f.path, f.info_type, f.start, f.end) for f in scan.findings] == [
+        ("$.user.email", "EMAIL_ADDRESS", 0, 6),
+        ("$.items[0].memo", "US_SSN", 4, 15),
+        ('$["odd key"]', "EMAIL_ADDRESS", 0, 6),
+    ]
+    assert payload["user"]["email"] == "a@b.co"
+
+    redacted, result = scanner.scan_and_process(payload, DLPAction.REDACT)
+    assert redacted is payload and len(result.findings) == 3
+    assert payload["items"][0] == {"id": "i@x.io", "memo": "ssn [REDACTED]"}
+    assert payload["user"]["trace"] == "t@x.io" and payload["odd key"] == "[REDACTED]"
+    assert scanner.scan_and_process("mail a@b.co", DLPAction.REDACT)[0] == "mail [REDACTED]"
+
+
+def test_streaming_with_chunks_smaller_than_overlap_matches_whole_text():
+    from agent_governance.models import DLPAction
+
+    scanner = DLPScanner(action=DLPAction.REDACT)
+    text = "call 415-555-0134 now, mail jane.doe@example.com and then reach out to x.long.name@example.org"
+    expected, scan = scanner.scan_and_process(text, DLPAction.REDACT)
+    for chunk_chars in (1, 16, 48):
+        assert "".join(scanner.redact_stream([text], chunk_chars=chunk_chars)) == expected
+        found = [(f.start, f.end) for f in scanner.scan_stream([text], chunk_chars=chunk_chars)]
+        assert found == [(f.start, f.end) for f in scan.findings]
+
+
+def test_overlapping_matches_of_other_info_types_are_kept_and_redacted():
+    from agent_governance.models import DLPAction
+
+    scanner = DLPScanner(action=DLPAction.REDACT)
+    spans = scanner.match_spans("Ship to 12 Main St.bob@example.com")
+    assert ("ADDRESS", 8, 18) in spans and ("EMAIL_ADDRESS", 16, 34) in spans
+    assert scanner.scan_text("Ship to 12 Main St.bob@example.com").redacted_text == "Ship to [REDACTED]"
+    assert scanner.scan_text("Alice Brown-alice@x.io").redacted_text == "[REDACTED]"
+    assert "".join(scanner.redact_stream(["Alice Brown-alice@x.io, ok"], chunk_chars=8)) == "[REDACTED], ok"
+
+
+def test_structured_scan_walks_tuples_scans_other_objects_and_survives_cycles():
+    from agent_governance.dlp import StructuredDLPScanner
+    from agent_governance.models import DLPAction
+
+    scanner = StructuredDLPScanner(DLPScanner(info_types=["EMAIL_ADDRESS"]))
+    payload = {"to": ("a@b.co", "ok"), "cc": {"c@d.io"}, "n": 3}
+    payload["self"] = payload
+
+    assert [f.path for f in scanner.scan(payload).findings] == ["$.to[0]", "$.cc"]
+    assert payload["to"] == ("a@b.co", "ok") and payload["cc"] == {"c@d.io"}
+
+    redacted, result = scanner.scan_and_process(payload, DLPAction.REDACT)
+    assert redacted is payload and len(result.findings) == 2
+    assert payload["to"] == ("[REDACTED]", "ok") and payload["cc"] == "{'[REDACTED]'}"
+    assert scanner.scan_and_process(("x", ("a@b.co",)), DLPAction.REDACT)[0] == ("x", ("[REDACTED]",))
@@ -0,0 +1,231 @@
+import socketserver
+import threading
+import time
+
+import pytest
+
+from agent_governance.guardrails.circuit_breaker import CircuitBreakerRegistry
+from agent_governance.guardrails.engine import GuardrailsEngine
+from agent_governance.guardrails.state_backend import (
+    MemoryStateBackend,
+    RedisStateBackend,
+    SQLiteStateBackend,
+)
+from agent_governance.models import GuardrailAction, RequestContext
+
+
+class _RespStandIn(socketserver.StreamRequestHandler):
+    """Just enough of the Redis protocol for RedisStateBackend.
+
+    EVAL runs a Python port of the backend's one Lua script.
+    """
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2].decode())
+            self.server.commands.append(args[0])
+            if args[0] == self.server.hang_up_before:
+                self.server.hang_up_before = None
+                return
+            command, key = args[0].upper(), args[1]
+            now = time.monotonic()
+            for name in [name for name, (_, expires_at) in store.items() if expires_at <= now]:
+                del store[name]
+            if command == "EVAL":
+                self.wfile.write(f":{_add_within_limits(store, args[2:], now)}\r\n".encode())
+            elif command == "INCRBY":
+                value = int(store.get(key, (0, float("inf")))[0]) + int(args[2])
+                store[key] = (value, store.get(key, (0, float("inf")))[1])
+                self.wfile.write(f":{value}\r\n".encode())
+            elif command == "PEXPIRE":
+                store[key] = (store[key][0], now + int(args[2]) / 1000)
+                self.wfile.write(b":1\r\n")
+            elif command == "GET":
+                value = store.get(key)
+                data = b"$-1\r\n" if value is None else f"${len(str(value[0]))}\r\n{value[0]}\r\n".encode()
+                self.wfile.write(data)
+            elif command == "SET":
+                store[key] = (args[2], now + int(args[4]) / 1000)
+                self.wfile.write(b"+OK\r\n")
+            elif command == "DEL":
+                for name in args[1:]:
+                    store.pop(name, None)
+                self.wfile.write(b":1\r\n")
+            else:
+                self.wfile.write(b"-ERR unknown command\r\n")
+            if args[0] == self.server.hang_up_after:
+                self.server.hang_up_after = None
+                self.wfile.flush()
+                return
+
+
+def _add_within_limits(store, args, now):
+    count = int(args[0]) // 2
+    keys, (amount, weight, ttl_ms, *limits) = args[1 : 1 + 2 * count], args[1 + 2 * count :]
+    for position in range(count):
+        current = int(store.get(keys[position], (0,))[0])
+        previous = int(store.get(keys[count + position], (0,))[0])
+        if previous * float(weight) + current + int(amount) > float(limits[position]):
+            return position
+    for key in keys[:count]:
+        store[key] = (int(store.get(key, (0,))[0]) + int(amount), now + int(ttl_ms) / 1000)
+    return -1
+
+
+@pytest.fixture()
+def redis_stand_in():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _RespStandIn)
+    server.daemon_threads = True
+    server.store = {}
+    server.commands = []
+    server.hang_up_before = server.hang_up_after = None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryStateBackend()
+    elif request.param == "sqlite":
+        backend = SQLiteStateBackend(str(tmp_path / "state.db"))
+        yield backend
+        backend.close()
+    else:
+        server = request.getfixturevalue("redis_stand_in")
+        backend = RedisStateBackend(f"redis://127.0.0.1:{server.server_address[1]}/0")
+        yield backend
+        backend.close()
+
+
+def test_backend_counters_and_expiry(backend):
+    assert backend.incr_and_get([("a", 2), ("b", 1)], ["a", "missing"], 60) == ([2, 1], [2, None])
+    assert backend.incr("a", -1, 60) == 1
+    backend.set("open", 1, 0.05)
+    assert backend.get("open") == 1
+    time.sleep(0.1)
+    assert backend.get("open") is None
+    backend.delete("a", "b")
+    assert backend.get("a") is None
+
+
+def test_add_within_limits_writes_all_or_nothing(backend):
+    backend.incr("prev", 4, 60)
+    windows = [("user", "prev", 5), ("global", "none", 3)]
+
+    assert backend.add_within_limits(windows, 1, 0.5, 60) is None  # 4 * 0.5 + 0 + 1 <= 5
+    assert backend.add_within_limits(windows, 3, 0.5, 60) == 0  # 2 + 1 + 3 > 5
+    assert backend.add_within_limits([("global", "none", 3)], 3, 0.5, 60) == 0
+    assert (backend.get("user"), backend.get("global")) == (1, 1)
+    assert backend.add_within_limits(windows, 2, 0.5, 60) is None
+    assert (backend.get("user"), backend.get("global")) == (3, 3)
+
+
+@pytest.mark.asyncio
+async def test_engines_sharing_a_backend_share_the_global_limit(backend):
+    config = {"rate_limiting": {"requests_per_minute_per_user": 100, "requests_per_minute_global": 3}}
+    replicas = [GuardrailsEngine(config, state_backend=backend) for _ in range(3)]
+
+    results = [await engine.check_input(RequestContext(), "hello") for engine in replicas]
+    blocked = await replicas[0].check_input(RequestContext(), "hello")
+
+    assert [r.action for r in results] == [GuardrailAction.ALLOW] * 3
+    assert blocked.rule_name == "rate_limit_global"
+    # The rejected hit is refunded at once, not with some later check.
+    assert backend.get(backend.key("rl", "global", int(time.time() // 60))) == 3
+
+
+def test_shared_circuit_breaker_opens_for_every_replica(backend):
+    config = {
+        "tools": {
+            "policies": [{"tool_name": "search", "circuit_breaker_threshold": 2, "circuit_breaker_reset_seconds": 0.2}]
+        }
+    }
+    first, second = CircuitBreakerRegistry(config, backend), CircuitBreakerRegistry(config, backend)
+
+    first.record_failure("search")
+    second.record_failure("search")
+
+    assert first.check("search").rule_name == "circuit_open"
+    assert second.check("search").rule_name == "circuit_open"
+    second.record_success("search")  # a straggler admitted before the trip
+    assert first.check("search").rule_name == "circuit_open"
+
+    time.sleep(0.25)
+    assert first.check("search").action == GuardrailAction.ALLOW
+    assert second.check("search").rule_name == "circuit_open"
+    first.release("search")
+    assert second.check("search").action == GuardrailAction.ALLOW
+    second.record_success("search")
+    assert first.check("search").action == GuardrailAction.ALLOW
+
+
+def test_redis_check_is_a_single_pipeline(redis_stand_in):
+    backend = RedisStateBackend(f"redis://127.0.0.1:{redis_stand_in.server_address[1]}")
+    limiter = GuardrailsEngine({}, state_backend=backend)._rate_limiter
+
+    assert limiter.check("u1").action == GuardrailAction.ALLOW
+    assert redis_stand_in.commands == ["EVAL"]
+    backend.close()
+
+
+def test_redis_replaces_closed_connections_without_resending_increments(redis_stand_in):
+    backend = RedisStateBackend(f"redis://127.0.0.1:{redis_stand_in.server_address[1]}")
+
+    redis_stand_in.hang_up_after = "GET"  # server drops the idle connection after replying
+    assert backend.incr_and_get([("hits", 1)], ["hits"], 60) == ([1], [1])
+    time.sleep(0.05)
+    assert backend.incr_and_get([("hits", 1)], [], 60) == ([2], [])
+
+    redis_stand_in.hang_up_before = "PEXPIRE"  # INCRBY applied, then the connection dies
+    with pytest.raises(OSError):
+        backend.incr_and_get([("hits", 1)], [], 60)
+    assert backend.get("hits") == 3
+
+    redis_stand_in.hang_up_before = "GET"  # reads are re-sent
+    assert backend.get("hits") == 3
+    backend.close()
+
+
+@pytest.mark.asyncio
+async def test_shared_breaker_checks_and_successes_cost_one_round_trip():
+    class CountingBackend(MemoryStateBackend):
+        round_trips = 0
+
+        def incr_and_get(self, increments, reads, ttl_seconds):
+            self.round_trips += 1
+            return super().incr_and_get(increments, reads, ttl_seconds)
+
+        def set(self, key, value, ttl_seconds):
+            self.round_trips += 1
+            super().set(key, value, ttl_seconds)
+
+        def delete(self, *keys):
+            self.round_trips += 1
+            super().delete(*keys)
+
+    backend = CountingBackend()
+    config = {
+        "rate_limiting": {"enabled": False},
+        "tools": {
+            "default_policy": {"allowed": True},
+            "policies": [{"tool_name": "search", "circuit_breaker_error_rate": 0.5}],
+        },
+    }
+    engine = GuardrailsEngine(config, state_backend=backend)
+    ctx = RequestContext()
+
+    assert (await engine.check_tool_call(ctx, "search", {})).action == GuardrailAction.ALLOW
+    assert backend.round_trips == 1
+    engine.record_tool_result("search", True, request_id=ctx.request_id)
+    assert backend.round_trips == 2